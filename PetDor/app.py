@@ -2,69 +2,64 @@
 import streamlit as st
 from datetime import datetime
 from fpdf import FPDF
-import bcrypt
 import logging
 
 # -------------------------------
 # 🔌 Conexão e Migração
 # -------------------------------
-from database.connection import conectar_db
+from database.escritor import executar_escrita
+from database.avaliacoes import salvar_avaliacao_completa
+from database.paginacao import iterar_pets
 from database.migration import migrar_banco_completo
 from auth.user import cadastrar_usuario, autenticar_usuario
+from auth.password_hashing import gerar_hash, verificar_senha
 from database.models import buscar_usuario_por_id
+from utils.pdf_generator import pdf_em_bytes, relatorio_em_cache
+from utils.email_worker import iniciar_trabalhador
 
 # -------------------------------
 # 🔰 Inicialização do banco
 # -------------------------------
-migrar_banco_completo()  # Cria todas as tabelas se não existirem
+migrar_banco_completo()  # Aplica só as migrações pendentes (schema_version)
+iniciar_trabalhador()   # Thread de envio (uma por processo); retoma a outbox
 
 # -------------------------------
 # 📌 Funções auxiliares
 # -------------------------------
 def criar_hash(senha):
-    return bcrypt.hashpw(senha.encode(), bcrypt.gensalt()).decode()
+    return gerar_hash(senha)
 
 def validar_senha(senha, senha_hash):
-    return bcrypt.checkpw(senha.encode(), senha_hash.encode())
+    return verificar_senha(senha, senha_hash)
 
 # -------------------------------
 # 📋 CRUD Pets
 # -------------------------------
 def cadastrar_pet(tutor_id, nome, especie, raca=None, peso=None):
-    conn = conectar_db()
-    cur = conn.cursor()
-    cur.execute(
+    executar_escrita(lambda conn: conn.execute(
         "INSERT INTO pets (tutor_id, nome, especie, raca, peso) VALUES (?, ?, ?, ?, ?)",
         (tutor_id, nome, especie, raca, peso)
-    )
-    conn.commit()
-    conn.close()
+    ))
 
 def listar_pets(tutor_id):
-    conn = conectar_db()
-    cur = conn.cursor()
-    cur.execute("SELECT * FROM pets WHERE tutor_id = ?", (tutor_id,))
-    pets = cur.fetchall()
-    conn.close()
-    return pets
+    # Em lotes, pelo índice (tutor_id, nome)
+    return list(iterar_pets(tutor_id=tutor_id))
 
 # -------------------------------
 # 📝 Avaliações
 # -------------------------------
 def registrar_avaliacao(pet_id, usuario_id, percentual, observacoes):
-    conn = conectar_db()
-    cur = conn.cursor()
-    cur.execute(
-        "INSERT INTO avaliacoes (pet_id, usuario_id, percentual_dor, observacoes) VALUES (?, ?, ?, ?)",
-        (pet_id, usuario_id, percentual, observacoes)
-    )
-    conn.commit()
-    conn.close()
+    salvar_avaliacao_completa(pet_id, usuario_id, percentual, observacoes=observacoes)
 
 # -------------------------------
 # 📄 PDF
 # -------------------------------
 def gerar_pdf(nome_pet, percentual, obs):
+    # Mesmo pet, percentual e observações: devolve o PDF do cache
+    dados = {'nome_pet': nome_pet, 'percentual': percentual, 'obs': obs}
+    return relatorio_em_cache("resumo", dados, lambda: _renderizar_pdf(nome_pet, percentual, obs))
+
+def _renderizar_pdf(nome_pet, percentual, obs):
     pdf = FPDF()
     pdf.add_page()
     pdf.set_font("Arial", size=14)
@@ -72,9 +67,7 @@ def gerar_pdf(nome_pet, percentual, obs):
     pdf.cell(0, 10, f"Pet: {nome_pet}", ln=True)
     pdf.cell(0, 10, f"Percentual de dor: {percentual}%", ln=True)
     pdf.multi_cell(0, 10, f"Observações:\n{obs}")
-    filename = f"relatorio_{nome_pet}.pdf"
-    pdf.output(filename)
-    return filename
+    return pdf_em_bytes(pdf)
 
 # -------------------------------
 # 🎨 Interface Streamlit
@@ -126,9 +119,12 @@ if menu == "Login":
                 registrar_avaliacao(pet["id"], user["id"], percentual, obs)
                 st.success("Avaliação salva!")
             if st.button("Gerar PDF"):
-                filename = gerar_pdf(pet["nome"], percentual, obs)
-                with open(filename, "rb") as f:
-                    st.download_button("Baixar PDF", f, file_name=filename)
+                st.download_button(
+                    "Baixar PDF",
+                    gerar_pdf(pet["nome"], percentual, obs),
+                    file_name=f"relatorio_{pet['nome']}.pdf",
+                    mime="application/pdf",
+                )
 
 # -------------------------------
 # CRIAR CONTA
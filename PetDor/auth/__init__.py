@@ -13,9 +13,6 @@ from .user import (
     autenticar_usuario,
     buscar_usuario_por_id,
     buscar_usuario_por_email,
-    atualizar_usuario,
-    alterar_senha,
-    deletar_usuario
 )
 
 __all__ = [
@@ -23,7 +20,4 @@ __all__ = [
     'autenticar_usuario',
     'buscar_usuario_por_id',
     'buscar_usuario_por_email',
-    'atualizar_usuario',
-    'alterar_senha',
-    'deletar_usuario'
 ]
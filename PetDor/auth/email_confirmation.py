@@ -9,20 +9,14 @@ root_path = Path(__file__).parent.parent
 if str(root_path) not in sys.path:
     sys.path.insert(0, str(root_path))
 
-import sqlite3
+from database.connection import obter_conexao
 import secrets
 import logging
 from datetime import datetime, timedelta
-from config import DATABASE_PATH
 
 logger = logging.getLogger(__name__)
 
 
-def conectar_db():
-    """Conecta ao banco de dados"""
-    return sqlite3.connect(DATABASE_PATH)
-
-
 def gerar_token_confirmacao(usuario_id, email):
     """
     Gera token de confirmação de email
@@ -41,18 +35,15 @@ def gerar_token_confirmacao(usuario_id, email):
         # Define expiração (24 horas)
         expiracao = (datetime.now() + timedelta(hours=24)).strftime("%Y-%m-%d %H:%M:%S")
 
-        conn = conectar_db()
-        cursor = conn.cursor()
-
-        # Salva token no banco
-        cursor.execute("""
-            UPDATE usuarios 
-            SET token_confirmacao = ?, data_expiracao_token = ?
-            WHERE id = ?
-        """, (token, expiracao, usuario_id))
+        with obter_conexao() as conn:
+            cursor = conn.cursor()
 
-        conn.commit()
-        conn.close()
+            # Salva token no banco
+            cursor.execute("""
+                UPDATE usuarios 
+                SET token_confirmacao = ?, data_expiracao_token = ?
+                WHERE id = ?
+            """, (token, expiracao, usuario_id))
 
         logger.info(f"Token de confirmação gerado para usuário {usuario_id}")
         return True, token
@@ -73,38 +64,34 @@ def validar_token_confirmacao(token):
         Tupla (valido, usuario_id, mensagem)
     """
     try:
-        conn = conectar_db()
-        cursor = conn.cursor()
+        with obter_conexao() as conn:
+            cursor = conn.cursor()
 
-        # Busca usuário pelo token
-        cursor.execute("""
-            SELECT id, email, email_confirmado, data_expiracao_token
-            FROM usuarios
-            WHERE token_confirmacao = ?
-        """, (token,))
+            # Busca usuário pelo token
+            cursor.execute("""
+                SELECT id, email, email_confirmado, data_expiracao_token
+                FROM usuarios
+                WHERE token_confirmacao = ?
+            """, (token,))
 
-        row = cursor.fetchone()
+            row = cursor.fetchone()
 
-        if not row:
-            conn.close()
-            return False, None, "Token inválido ou não encontrado"
+            if not row:
+                return False, None, "Token inválido ou não encontrado"
 
-        usuario_id, email, email_confirmado, expiracao = row
+            usuario_id, email, email_confirmado, expiracao = row
 
-        # Verifica se já foi confirmado
-        if email_confirmado:
-            conn.close()
-            return False, None, "Email já confirmado anteriormente"
+            # Verifica se já foi confirmado
+            if email_confirmado:
+                return False, None, "Email já confirmado anteriormente"
 
-        # Verifica expiração
-        if expiracao:
-            expiracao_dt = datetime.strptime(expiracao, "%Y-%m-%d %H:%M:%S")
-            if datetime.now() > expiracao_dt:
-                conn.close()
-                return False, None, "Token expirado. Solicite um novo email de confirmação"
+            # Verifica expiração
+            if expiracao:
+                expiracao_dt = datetime.strptime(expiracao, "%Y-%m-%d %H:%M:%S")
+                if datetime.now() > expiracao_dt:
+                    return False, None, "Token expirado. Solicite um novo email de confirmação"
 
-        conn.close()
-        return True, usuario_id, "Token válido"
+            return True, usuario_id, "Token válido"
 
     except Exception as e:
         logger.error(f"Erro ao validar token: {e}")
@@ -122,22 +109,19 @@ def confirmar_email(usuario_id):
         Tupla (sucesso, mensagem)
     """
     try:
-        conn = conectar_db()
-        cursor = conn.cursor()
+        with obter_conexao() as conn:
+            cursor = conn.cursor()
 
-        # Marca email como confirmado e remove token
-        cursor.execute("""
-            UPDATE usuarios 
-            SET email_confirmado = 1, 
-                token_confirmacao = NULL, 
-                data_expiracao_token = NULL
-            WHERE id = ?
-        """, (usuario_id,))
+            # Marca email como confirmado e remove token
+            cursor.execute("""
+                UPDATE usuarios 
+                SET email_confirmado = 1, 
+                    token_confirmacao = NULL, 
+                    data_expiracao_token = NULL
+                WHERE id = ?
+            """, (usuario_id,))
 
-        afetados = cursor.rowcount
-
-        conn.commit()
-        conn.close()
+            afetados = cursor.rowcount
 
         if afetados > 0:
             logger.info(f"Email confirmado para usuário {usuario_id}")
@@ -161,29 +145,25 @@ def reenviar_email_confirmacao(email):
         Tupla (sucesso, mensagem, usuario_id, token)
     """
     try:
-        conn = conectar_db()
-        cursor = conn.cursor()
-
-        # Busca usuário
-        cursor.execute("""
-            SELECT id, nome, email_confirmado
-            FROM usuarios
-            WHERE email = ? AND ativo = 1
-        """, (email,))
+        with obter_conexao() as conn:
+            cursor = conn.cursor()
 
-        row = cursor.fetchone()
+            # Busca usuário
+            cursor.execute("""
+                SELECT id, nome, email_confirmado
+                FROM usuarios
+                WHERE email = ? AND ativo = 1
+            """, (email,))
 
-        if not row:
-            conn.close()
-            return False, "Email não encontrado", None, None
+            row = cursor.fetchone()
 
-        usuario_id, nome, email_confirmado = row
+            if not row:
+                return False, "Email não encontrado", None, None
 
-        if email_confirmado:
-            conn.close()
-            return False, "Este email já foi confirmado", None, None
+            usuario_id, nome, email_confirmado = row
 
-        conn.close()
+            if email_confirmado:
+                return False, "Este email já foi confirmado", None, None
 
         # Gera novo token
         sucesso, token = gerar_token_confirmacao(usuario_id, email)
@@ -209,29 +189,27 @@ def buscar_usuario_por_token(token):
         Dict com dados do usuário ou None
     """
     try:
-        conn = conectar_db()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT id, nome, email, tipo_usuario
-            FROM usuarios
-            WHERE token_confirmacao = ?
-        """, (token,))
-
-        row = cursor.fetchone()
-
-        if row:
-            usuario = {
-                'id': row[0],
-                'nome': row[1],
-                'email': row[2],
-                'tipo_usuario': row[3] or 'tutor'
-            }
-            conn.close()
-            return usuario
-
-        conn.close()
-        return None
+        with obter_conexao() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute("""
+                SELECT id, nome, email, tipo_usuario
+                FROM usuarios
+                WHERE token_confirmacao = ?
+            """, (token,))
+
+            row = cursor.fetchone()
+
+            if row:
+                usuario = {
+                    'id': row[0],
+                    'nome': row[1],
+                    'email': row[2],
+                    'tipo_usuario': row[3] or 'tutor'
+                }
+                return usuario
+
+            return None
 
     except Exception as e:
         logger.error(f"Erro ao buscar usuário por token: {e}")
@@ -249,19 +227,18 @@ def verificar_email_confirmado(email):
         Boolean
     """
     try:
-        conn = conectar_db()
-        cursor = conn.cursor()
+        with obter_conexao() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute("""
-            SELECT email_confirmado
-            FROM usuarios
-            WHERE email = ?
-        """, (email,))
+            cursor.execute("""
+                SELECT email_confirmado
+                FROM usuarios
+                WHERE email = ?
+            """, (email,))
 
-        row = cursor.fetchone()
-        conn.close()
+            row = cursor.fetchone()
 
-        return bool(row and row[0])
+            return bool(row and row[0])
 
     except Exception as e:
         logger.error(f"Erro ao verificar email: {e}")
@@ -0,0 +1,311 @@
+"""
+Serviço de hash de senhas do PETDor
+
+O bcrypt é propositalmente lento. Rodá-lo na thread do script do
+Streamlit trava todas as outras sessões do mesmo worker durante uma
+rajada de logins, então o trabalho vai para um ProcessPoolExecutor.
+
+- `gerar_hash()` / `verificar_senha()`: API síncrona (bloqueia só a
+  sessão que chamou);
+- `gerar_hash_async()` / `verificar_senha_async()`: mesma coisa para
+  código asyncio;
+- no máximo HASH_MAX_PENDENTES operações ficam em andamento; acima
+  disso a chamada espera até HASH_TIMEOUT_FILA segundos (síncrona) ou
+  falha na hora (async) com FilaHashCheiaError;
+- `metricas_hashing()` expõe a profundidade da fila e a latência.
+
+Configuração (variáveis de ambiente): HASH_WORKERS, HASH_MAX_PENDENTES,
+HASH_TIMEOUT_FILA e HASH_MP_CONTEXT. O custo do bcrypt vem de
+config.SEGURANCA_CONFIG e pode ser calibrado para o hardware:
+
+    python -m auth.password_hashing --calibrar [--alvo-ms 250] [--salvar]
+"""
+import sys
+from pathlib import Path
+
+# Adiciona a raiz do projeto ao path
+root_path = Path(__file__).parent.parent
+if str(root_path) not in sys.path:
+    sys.path.insert(0, str(root_path))
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import re
+import statistics
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import bcrypt
+
+from config import ROOT_DIR, SEGURANCA_CONFIG
+
+logger = logging.getLogger(__name__)
+
+HASH_CONFIG = {
+    'workers': int(os.getenv("HASH_WORKERS", str(min(4, os.cpu_count() or 1)))),
+    'max_pendentes': int(os.getenv("HASH_MAX_PENDENTES", "64")),
+    'timeout_fila': float(os.getenv("HASH_TIMEOUT_FILA", "5")),
+    # "spawn" evita herdar, via fork, locks das threads do Streamlit
+    'mp_context': os.getenv("HASH_MP_CONTEXT", "spawn"),
+    'rounds': SEGURANCA_CONFIG['bcrypt_rounds'],
+}
+
+# Limites aceitos pelo bcrypt; abaixo de 10 não é considerado seguro
+CUSTO_MINIMO = 10
+CUSTO_MAXIMO = 16
+
+_RE_CUSTO = re.compile(r"^\$2[abxy]?\$(\d{2})\$")
+
+
+class FilaHashCheiaError(RuntimeError):
+    """Há operações de hash demais em andamento; tente novamente."""
+
+
+# ---------------------------------------------------------
+# Funções executadas nos processos do pool
+# ---------------------------------------------------------
+def _hashpw(senha: bytes, rounds: int) -> bytes:
+    return bcrypt.hashpw(senha, bcrypt.gensalt(rounds))
+
+
+def _checkpw(senha: bytes, senha_hash: bytes) -> bool:
+    try:
+        return bcrypt.checkpw(senha, senha_hash)
+    except ValueError:
+        # Hash corrompido ou em formato desconhecido
+        return False
+
+
+def _como_bytes(valor) -> bytes:
+    if isinstance(valor, str):
+        return valor.encode("utf-8")
+    return bytes(valor)
+
+
+class ServicoHash:
+    """Pool de processos limitado para bcrypt, com métricas."""
+
+    def __init__(self, workers: int, max_pendentes: int, timeout_fila: float, mp_context: str):
+        self.workers = workers
+        self.timeout_fila = timeout_fila
+        self.max_pendentes = max_pendentes
+        self._mp_context = mp_context
+        self._executor = None
+        self._lock = threading.Lock()
+        self._vagas = threading.BoundedSemaphore(max_pendentes)
+        self._metricas = {
+            'pendentes': 0,
+            'concluidas': 0,
+            'rejeitadas': 0,
+            'latencia_total': 0.0,
+            'latencia_max': 0.0,
+        }
+
+    def _obter_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context(self._mp_context),
+                )
+            return self._executor
+
+    def _reiniciar_executor(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _submeter(self, funcao, *args):
+        """Submete ao pool (a vaga já deve ter sido reservada)."""
+        inicio = time.perf_counter()
+        with self._lock:
+            self._metricas['pendentes'] += 1
+
+        try:
+            try:
+                futuro = self._obter_executor().submit(funcao, *args)
+            except BrokenProcessPool:
+                logger.warning("Pool de hash quebrado; recriando")
+                self._reiniciar_executor()
+                futuro = self._obter_executor().submit(funcao, *args)
+        except BaseException:
+            self._concluir(inicio)
+            raise
+
+        futuro.add_done_callback(lambda _: self._concluir(inicio))
+        return futuro
+
+    def _concluir(self, inicio: float):
+        latencia = time.perf_counter() - inicio
+        with self._lock:
+            m = self._metricas
+            m['pendentes'] -= 1
+            m['concluidas'] += 1
+            m['latencia_total'] += latencia
+            m['latencia_max'] = max(m['latencia_max'], latencia)
+        self._vagas.release()
+
+    def _rejeitar(self):
+        with self._lock:
+            self._metricas['rejeitadas'] += 1
+        raise FilaHashCheiaError(
+            f"{self.max_pendentes} operações de hash já em andamento"
+        )
+
+    # -----------------------------------------------------
+    # API síncrona
+    # -----------------------------------------------------
+    def executar(self, funcao, *args):
+        if not self._vagas.acquire(timeout=self.timeout_fila):
+            self._rejeitar()
+        return self._submeter(funcao, *args).result()
+
+    # -----------------------------------------------------
+    # API asyncio
+    # -----------------------------------------------------
+    async def executar_async(self, funcao, *args):
+        # Não bloqueia o event loop esperando vaga: rejeita na hora
+        if not self._vagas.acquire(blocking=False):
+            self._rejeitar()
+        return await asyncio.wrap_future(self._submeter(funcao, *args))
+
+    def metricas(self) -> dict:
+        with self._lock:
+            m = dict(self._metricas)
+        m['latencia_media'] = m['latencia_total'] / m['concluidas'] if m['concluidas'] else 0.0
+        m['max_pendentes'] = self.max_pendentes
+        m['workers'] = self.workers
+        return m
+
+    def encerrar(self):
+        self._reiniciar_executor()
+
+
+_servico = ServicoHash(
+    workers=HASH_CONFIG['workers'],
+    max_pendentes=HASH_CONFIG['max_pendentes'],
+    timeout_fila=HASH_CONFIG['timeout_fila'],
+    mp_context=HASH_CONFIG['mp_context'],
+)
+
+
+def gerar_hash(senha: str) -> str:
+    """Gera o hash bcrypt da senha (como texto, pronto para gravar)."""
+    resultado = _servico.executar(_hashpw, senha.encode("utf-8"), HASH_CONFIG['rounds'])
+    return resultado.decode("utf-8")
+
+
+def verificar_senha(senha: str, senha_hash) -> bool:
+    """Confere a senha contra um hash salvo (str ou bytes)."""
+    if not senha_hash:
+        return False
+    return _servico.executar(_checkpw, senha.encode("utf-8"), _como_bytes(senha_hash))
+
+
+async def gerar_hash_async(senha: str) -> str:
+    resultado = await _servico.executar_async(
+        _hashpw, senha.encode("utf-8"), HASH_CONFIG['rounds']
+    )
+    return resultado.decode("utf-8")
+
+
+async def verificar_senha_async(senha: str, senha_hash) -> bool:
+    if not senha_hash:
+        return False
+    return await _servico.executar_async(
+        _checkpw, senha.encode("utf-8"), _como_bytes(senha_hash)
+    )
+
+
+def metricas_hashing() -> dict:
+    """Profundidade da fila, rejeições e latência por hash."""
+    return _servico.metricas()
+
+
+# ---------------------------------------------------------
+# ⏱️ Calibração do custo e rehash
+# ---------------------------------------------------------
+def custo_do_hash(senha_hash):
+    """Extrai o custo (log2 das rodadas) de um hash bcrypt, ou None."""
+    if not senha_hash:
+        return None
+    if not isinstance(senha_hash, str):
+        senha_hash = _como_bytes(senha_hash).decode("ascii", errors="ignore")
+    m = _RE_CUSTO.match(senha_hash)
+    return int(m.group(1)) if m else None
+
+
+def precisa_rehash(senha_hash) -> bool:
+    """True se o hash salvo usa um custo diferente do configurado."""
+    return custo_do_hash(senha_hash) != HASH_CONFIG['rounds']
+
+
+def medir_verificacao(custo: int, amostras: int = 3) -> float:
+    """Tempo mediano (ms) de um checkpw com o custo dado, neste processo."""
+    senha = b"calibracao-petdor"
+    senha_hash = bcrypt.hashpw(senha, bcrypt.gensalt(custo))
+    tempos = []
+    for _ in range(amostras):
+        inicio = time.perf_counter()
+        bcrypt.checkpw(senha, senha_hash)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+
+def calibrar_custo(tempo_alvo_ms: float = None, amostras: int = 3) -> int:
+    """
+    Escolhe o maior custo cuja verificação fica dentro do tempo alvo.
+
+    Cada ponto de custo dobra o tempo, então a medição sobe a partir do
+    mínimo e para no primeiro custo que estoura o alvo. O resultado
+    nunca fica abaixo de CUSTO_MINIMO.
+    """
+    alvo = tempo_alvo_ms or SEGURANCA_CONFIG['bcrypt_tempo_alvo_ms']
+    escolhido = CUSTO_MINIMO
+
+    for custo in range(CUSTO_MINIMO, CUSTO_MAXIMO + 1):
+        tempo = medir_verificacao(custo, amostras)
+        logger.info(f"bcrypt custo {custo}: {tempo:.1f} ms")
+        if tempo > alvo:
+            break
+        escolhido = custo
+
+    return escolhido
+
+
+def salvar_custo(custo: int, caminho_env: Path = None):
+    """Grava BCRYPT_ROUNDS no .env e passa a usar o novo custo neste processo."""
+    caminho_env = caminho_env or (ROOT_DIR / ".env")
+    linhas = caminho_env.read_text(encoding="utf-8").splitlines() if caminho_env.exists() else []
+    linhas = [l for l in linhas if not l.startswith("BCRYPT_ROUNDS=")]
+    linhas.append(f"BCRYPT_ROUNDS={custo}")
+    caminho_env.write_text("\n".join(linhas) + "\n", encoding="utf-8")
+
+    HASH_CONFIG['rounds'] = custo
+    SEGURANCA_CONFIG['bcrypt_rounds'] = custo
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    parser = argparse.ArgumentParser(description="Calibra o custo do bcrypt para este host")
+    parser.add_argument("--calibrar", action="store_true", help="mede e sugere o custo")
+    parser.add_argument("--alvo-ms", type=float, default=None, help="tempo alvo por verificação")
+    parser.add_argument("--salvar", action="store_true", help="grava BCRYPT_ROUNDS no .env")
+    args = parser.parse_args()
+
+    if not args.calibrar:
+        parser.print_help()
+        sys.exit(0)
+
+    custo = calibrar_custo(args.alvo_ms)
+    print(f"Custo recomendado: {custo} (atual: {HASH_CONFIG['rounds']})")
+    if args.salvar:
+        salvar_custo(custo)
+        print(f"BCRYPT_ROUNDS={custo} gravado em {ROOT_DIR / '.env'}")
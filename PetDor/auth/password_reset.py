@@ -9,7 +9,7 @@ root_path = Path(__file__).parent.parent
 if str(root_path) not in sys.path:
     sys.path.insert(0, str(root_path))
 
-import sqlite3
+from database.connection import obter_conexao
 import secrets
 import logging
 from datetime import datetime, timedelta
@@ -17,12 +17,6 @@ from datetime import datetime, timedelta
 logger = logging.getLogger(__name__)
 
 
-def conectar_db():
-    """Conecta ao banco de dados"""
-    from config import DATABASE_PATH
-    return sqlite3.connect(DATABASE_PATH)
-
-
 def buscar_usuario_por_email(email):
     """
     Busca usuário por email
@@ -34,31 +28,29 @@ def buscar_usuario_por_email(email):
         Dicionário com dados do usuário ou None
     """
     try:
-        conn = conectar_db()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT id, nome, email, ativo 
-            FROM usuarios 
-            WHERE email = ?
-        """, (email,))
-
-        row = cursor.fetchone()
-
-        if row:
-            return {
-                'id': row[0],
-                'nome': row[1],
-                'email': row[2],
-                'ativo': row[3]
-            }
-        return None
+        with obter_conexao() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute("""
+                SELECT id, nome, email, ativo 
+                FROM usuarios 
+                WHERE email = ?
+            """, (email,))
+
+            row = cursor.fetchone()
+
+            if row:
+                return {
+                    'id': row[0],
+                    'nome': row[1],
+                    'email': row[2],
+                    'ativo': row[3]
+                }
+            return None
 
     except Exception as e:
         logger.error(f"Erro ao buscar usuário por email: {e}")
         return None
-    finally:
-        conn.close()
 
 
 def criar_token_reset(usuario_id):
@@ -72,22 +64,20 @@ def criar_token_reset(usuario_id):
         Tupla (sucesso, token)
     """
     try:
-        conn = conectar_db()
-        cursor = conn.cursor()
+        with obter_conexao() as conn:
+            cursor = conn.cursor()
 
-        # Gera token único
-        token = secrets.token_urlsafe(32)
+            # Gera token único
+            token = secrets.token_urlsafe(32)
 
-        # Calcula data de expiração (1 hora)
-        expiracao = (datetime.now() + timedelta(hours=1)).strftime("%Y-%m-%d %H:%M:%S")
+            # Calcula data de expiração (1 hora)
+            expiracao = (datetime.now() + timedelta(hours=1)).strftime("%Y-%m-%d %H:%M:%S")
 
-        # Salva token no banco
-        cursor.execute("""
-            INSERT INTO tokens_reset (usuario_id, token, expiracao, usado)
-            VALUES (?, ?, ?, 0)
-        """, (usuario_id, token, expiracao))
-
-        conn.commit()
+            # Salva token no banco
+            cursor.execute("""
+                INSERT INTO tokens_reset (usuario_id, token, expiracao, usado)
+                VALUES (?, ?, ?, 0)
+            """, (usuario_id, token, expiracao))
 
         logger.info(f"Token de reset criado para usuário {usuario_id}")
         return True, token
@@ -95,8 +85,6 @@ def criar_token_reset(usuario_id):
     except Exception as e:
         logger.error(f"Erro ao criar token de reset: {e}")
         return False, None
-    finally:
-        conn.close()
 
 
 def validar_token_reset(token):
@@ -110,38 +98,36 @@ def validar_token_reset(token):
         Tupla (válido, usuario_id, mensagem)
     """
     try:
-        conn = conectar_db()
-        cursor = conn.cursor()
+        with obter_conexao() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute("""
-            SELECT usuario_id, expiracao, usado
-            FROM tokens_reset
-            WHERE token = ?
-        """, (token,))
+            cursor.execute("""
+                SELECT usuario_id, expiracao, usado
+                FROM tokens_reset
+                WHERE token = ?
+            """, (token,))
 
-        row = cursor.fetchone()
+            row = cursor.fetchone()
 
-        if not row:
-            return False, None, "Token inválido"
+            if not row:
+                return False, None, "Token inválido"
 
-        usuario_id, expiracao, usado = row
+            usuario_id, expiracao, usado = row
 
-        if usado:
-            return False, None, "Token já foi utilizado"
+            if usado:
+                return False, None, "Token já foi utilizado"
 
-        # Verifica expiração
-        expiracao_dt = datetime.strptime(expiracao, "%Y-%m-%d %H:%M:%S")
+            # Verifica expiração
+            expiracao_dt = datetime.strptime(expiracao, "%Y-%m-%d %H:%M:%S")
 
-        if datetime.now() > expiracao_dt:
-            return False, None, "Token expirado"
+            if datetime.now() > expiracao_dt:
+                return False, None, "Token expirado"
 
-        return True, usuario_id, "Token válido"
+            return True, usuario_id, "Token válido"
 
     except Exception as e:
         logger.error(f"Erro ao validar token: {e}")
         return False, None, "Erro ao validar token"
-    finally:
-        conn.close()
 
 
 def marcar_token_usado(token):
@@ -155,16 +141,14 @@ def marcar_token_usado(token):
         bool: Sucesso da operação
     """
     try:
-        conn = conectar_db()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            UPDATE tokens_reset
-            SET usado = 1
-            WHERE token = ?
-        """, (token,))
+        with obter_conexao() as conn:
+            cursor = conn.cursor()
 
-        conn.commit()
+            cursor.execute("""
+                UPDATE tokens_reset
+                SET usado = 1
+                WHERE token = ?
+            """, (token,))
 
         logger.info(f"Token marcado como usado")
         return True
@@ -172,8 +156,6 @@ def marcar_token_usado(token):
     except Exception as e:
         logger.error(f"Erro ao marcar token como usado: {e}")
         return False
-    finally:
-        conn.close()
 
 
 def redefinir_senha(usuario_id, nova_senha):
@@ -188,22 +170,20 @@ def redefinir_senha(usuario_id, nova_senha):
         Tupla (sucesso, mensagem)
     """
     try:
-        import bcrypt
-
-        conn = conectar_db()
-        cursor = conn.cursor()
+        from auth.password_hashing import gerar_hash
 
-        # Hash da nova senha
-        senha_hash = bcrypt.hashpw(nova_senha.encode('utf-8'), bcrypt.gensalt())
+        # Hash da nova senha (calculado fora da thread do Streamlit)
+        senha_hash = gerar_hash(nova_senha)
 
-        # Atualiza senha
-        cursor.execute("""
-            UPDATE usuarios
-            SET senha_hash = ?
-            WHERE id = ?
-        """, (senha_hash, usuario_id))
+        with obter_conexao() as conn:
+            cursor = conn.cursor()
 
-        conn.commit()
+            # Atualiza senha
+            cursor.execute("""
+                UPDATE usuarios
+                SET senha_hash = ?
+                WHERE id = ?
+            """, (senha_hash, usuario_id))
 
         logger.info(f"Senha redefinida para usuário {usuario_id}")
         return True, "Senha redefinida com sucesso!"
@@ -211,5 +191,3 @@ def redefinir_senha(usuario_id, nova_senha):
     except Exception as e:
         logger.error(f"Erro ao redefinir senha: {e}")
         return False, f"Erro ao redefinir senha: {e}"
-    finally:
-        conn.close()
@@ -1,50 +1,75 @@
 """
 Funções de autenticação e cadastro
 """
-from database.connection import conectar_db
-import bcrypt
+from database.connection import obter_conexao
+from database.escritor import executar_escrita
+from database.models import buscar_usuario_por_id, buscar_usuario_por_email
+from auth.password_hashing import gerar_hash, verificar_senha, precisa_rehash
 from datetime import datetime
 import logging
 
 logger = logging.getLogger(__name__)
 
+def _inserir_usuario(conn, nome, email, senha_hash):
+    cursor = conn.cursor()
+    cursor.execute("SELECT id FROM usuarios WHERE email = ?", (email,))
+    if cursor.fetchone():
+        return False
+    cursor.execute("""
+        INSERT INTO usuarios (nome, email, senha_hash)
+        VALUES (?, ?, ?)
+    """, (nome, email, senha_hash))
+    return True
+
 def cadastrar_usuario(nome, email, senha, confirmar_senha):
     try:
         if senha != confirmar_senha:
             return False, "Senhas não conferem"
-        conn = conectar_db()
-        cursor = conn.cursor()
-        cursor.execute("SELECT id FROM usuarios WHERE email = ?", (email.lower(),))
-        if cursor.fetchone():
-            conn.close()
+        email = email.lower().strip()
+        with obter_conexao() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id FROM usuarios WHERE email = ?", (email,))
+            if cursor.fetchone():
+                return False, "Email já cadastrado"
+        senha_hash = gerar_hash(senha)
+        # A checagem é repetida dentro da escrita: outra sessão pode ter
+        # cadastrado o mesmo email enquanto o hash era calculado
+        if not executar_escrita(_inserir_usuario, nome.strip(), email, senha_hash):
             return False, "Email já cadastrado"
-        senha_hash = bcrypt.hashpw(senha.encode(), bcrypt.gensalt())
-        cursor.execute("""
-            INSERT INTO usuarios (nome, email, senha_hash)
-            VALUES (?, ?, ?)
-        """, (nome.strip(), email.lower().strip(), senha_hash))
-        conn.commit()
-        conn.close()
         return True, "Conta criada com sucesso!"
     except Exception as e:
         logger.error(f"Erro no cadastro: {e}")
         return False, str(e)
 
+def _atualizar_hash(usuario_id, senha, hash_antigo):
+    """Regrava o hash com o custo atual; falhas não impedem o login."""
+    try:
+        novo_hash = gerar_hash(senha)
+        # Só troca se ninguém alterou a senha nesse meio-tempo
+        executar_escrita(lambda conn: conn.execute(
+            "UPDATE usuarios SET senha_hash = ? WHERE id = ? AND senha_hash = ?",
+            (novo_hash, usuario_id, hash_antigo)
+        ))
+        logger.info(f"Hash de senha atualizado para o custo atual (usuário {usuario_id})")
+    except Exception as e:
+        logger.warning(f"Não foi possível atualizar o hash do usuário {usuario_id}: {e}")
+
 def autenticar_usuario(email, senha):
     try:
-        conn = conectar_db()
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT id, nome, senha_hash, ativo FROM usuarios WHERE email = ?
-        """, (email.lower().strip(),))
-        row = cursor.fetchone()
-        conn.close()
+        with obter_conexao() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT id, nome, senha_hash, ativo FROM usuarios WHERE email = ?
+            """, (email.lower().strip(),))
+            row = cursor.fetchone()
         if not row:
             return False, "Email ou senha incorretos", None
         usuario_id, nome, senha_hash, ativo = row
         if not ativo:
             return False, "Conta desativada", None
-        if bcrypt.checkpw(senha.encode(), senha_hash):
+        if verificar_senha(senha, senha_hash):
+            if precisa_rehash(senha_hash):
+                _atualizar_hash(usuario_id, senha, senha_hash)
             return True, f"Bem-vindo, {nome}!", usuario_id
         return False, "Email ou senha incorretos", None
     except Exception as e:
@@ -25,6 +25,11 @@ EMAIL_CONFIG = {
     'senha': os.getenv('EMAIL_PASSWORD', '')
 }
 
+# Custo do bcrypt. Calibre para o hardware com:
+#   python -m auth.password_hashing --calibrar --salvar
+SEGURANCA_CONFIG = {
+    'bcrypt_rounds': int(os.getenv('BCRYPT_ROUNDS', '12')),
+    'bcrypt_tempo_alvo_ms': int(os.getenv('BCRYPT_TEMPO_ALVO_MS', '250')),
 }
 
 
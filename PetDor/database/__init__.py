@@ -1,7 +1,14 @@
 # PetDor/database/__init__.py
 
-from .connection import conectar_db
+from .connection import conectar_db, obter_conexao, metricas_pool
+from .escritor import executar_escrita
 from .migration import criar_tabelas, migrar_banco_completo
 
-__all__ = ["conectar_db", "criar_tabelas", "migrar_banco_completo"]
-
+__all__ = [
+    "conectar_db",
+    "obter_conexao",
+    "metricas_pool",
+    "executar_escrita",
+    "criar_tabelas",
+    "migrar_banco_completo",
+]
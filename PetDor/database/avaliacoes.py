@@ -0,0 +1,376 @@
+"""
+Gravação e leitura de avaliações de dor do PETDOR
+
+`salvar_avaliacao_completa()` grava a avaliação e todas as respostas
+numa única transação do escritor (um INSERT da avaliação e um
+executemany das respostas em avaliacao_respostas).
+
+Opcionalmente (AVALIACAO_RESPOSTAS_COMPACTAS=1; desligado por padrão),
+quando todas as respostas são rótulos exatos da escala, elas vão
+compactadas na própria linha da avaliação (coluna `respostas_compactas`),
+um byte por pergunta:
+
+    byte 0      formato (2)
+    bytes 1-4   id do esquema em `esquemas_respostas`
+    bytes 5..   índice da opção de cada pergunta, na ordem do esquema
+                (0xFF = sem resposta)
+
+O esquema é uma cópia imutável dos IDs das perguntas e dos rótulos da
+escala no momento da gravação. A leitura usa essa cópia, nunca a
+configuração atual da espécie: editar perguntas ou a escala depois não
+afeta as avaliações já gravadas.
+
+O formato 1 (antigo) guardava só um crc32 da configuração e ficava
+ilegível depois de qualquer edição; a migração 13 converte essas
+linhas para avaliacao_respostas (converter_respostas_formato1).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import zlib
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from especies.base import EspecieConfig, PontuadorCompilado
+from especies.loader import buscar_especie, normalizar_nome
+
+from .connection import obter_conexao
+from .escritor import executar_escrita
+
+logger = logging.getLogger(__name__)
+
+AVALIACOES_CONFIG = {
+    'respostas_compactas': os.getenv("AVALIACAO_RESPOSTAS_COMPACTAS", "0") == "1",
+}
+
+_FORMATO_CRC = 1        # legado: só leitura, via configuração atual
+_FORMATO_ESQUEMA = 2
+_SEM_RESPOSTA = 0xFF
+_TAMANHO_CABECALHO = 5
+
+DDL_ESQUEMAS: Tuple[str, ...] = (
+    """
+    CREATE TABLE IF NOT EXISTS esquemas_respostas (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        impressao TEXT UNIQUE NOT NULL,
+        especie_chave TEXT,
+        perguntas TEXT NOT NULL,
+        opcoes TEXT NOT NULL,
+        data_criacao TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+)
+
+# Esquemas nunca mudam depois de gravados: cache sem invalidação
+_esquemas: Dict[int, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {}
+_ids_por_impressao: Dict[str, int] = {}
+_lock_esquemas = threading.Lock()
+
+# Chamadas com o id de cada avaliação excluída (ver ao_excluir_avaliacao)
+_ao_excluir: List[Callable[[int], object]] = []
+
+
+# ---------------------------------------------------------
+# 🗜️ Codificação compacta das respostas
+# ---------------------------------------------------------
+def _impressao(pontuador: PontuadorCompilado) -> str:
+    conteudo = json.dumps([pontuador.ids, pontuador.opcoes], ensure_ascii=False)
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+
+def _crc_formato1(pontuador: PontuadorCompilado) -> bytes:
+    texto = "\x1f".join((*pontuador.ids, "\x1e", *pontuador.opcoes))
+    return zlib.crc32(texto.encode("utf-8")).to_bytes(4, "big")
+
+
+def _id_esquema(conn, pontuador: PontuadorCompilado, especie_chave: Optional[str]) -> int:
+    """Id do esquema da config (cria se preciso); roda dentro da escrita."""
+    impressao = _impressao(pontuador)
+    with _lock_esquemas:
+        esquema_id = _ids_por_impressao.get(impressao)
+    if esquema_id is not None:
+        return esquema_id
+
+    row = conn.execute(
+        "SELECT id FROM esquemas_respostas WHERE impressao = ?", (impressao,)
+    ).fetchone()
+    if row is not None:
+        # Só entra no cache o que já está gravado (um INSERT pode sofrer rollback)
+        with _lock_esquemas:
+            _ids_por_impressao[impressao] = row[0]
+        return row[0]
+
+    return conn.execute("""
+        INSERT INTO esquemas_respostas (impressao, especie_chave, perguntas, opcoes)
+        VALUES (?, ?, ?, ?)
+    """, (
+        impressao, especie_chave,
+        json.dumps(pontuador.ids, ensure_ascii=False),
+        json.dumps(pontuador.opcoes, ensure_ascii=False),
+    )).lastrowid
+
+
+def _esquema(esquema_id: int) -> Optional[Tuple[Tuple[str, ...], Tuple[str, ...]]]:
+    with _lock_esquemas:
+        esquema = _esquemas.get(esquema_id)
+    if esquema is not None:
+        return esquema
+
+    with obter_conexao() as conn:
+        row = conn.execute(
+            "SELECT perguntas, opcoes FROM esquemas_respostas WHERE id = ?", (esquema_id,)
+        ).fetchone()
+    if row is None:
+        return None
+    esquema = (tuple(json.loads(row[0])), tuple(json.loads(row[1])))
+    with _lock_esquemas:
+        _esquemas[esquema_id] = esquema
+    return esquema
+
+
+def codificar_respostas(pontuador: PontuadorCompilado, respostas: Dict[str, str]) -> Optional[bytes]:
+    """
+    Índices das respostas na ordem das perguntas (corpo do formato
+    compacto, sem cabeçalho), ou None se não for possível (pergunta fora
+    da config, resposta fora da escala, escala > 255 opções).
+    """
+    if not pontuador.ids or len(pontuador.opcoes) >= _SEM_RESPOSTA:
+        return None
+
+    valores = bytearray([_SEM_RESPOSTA]) * len(pontuador.ids)
+    for pergunta_id, resposta in respostas.items():
+        coluna = pontuador.indice_pergunta.get(pergunta_id)
+        indice = pontuador.indice_por_rotulo.get(resposta)
+        if coluna is None or indice is None:
+            return None
+        valores[coluna] = indice
+    return bytes(valores)
+
+
+def _decodificar(ids: Tuple[str, ...], opcoes: Tuple[str, ...], corpo: bytes) -> Optional[Dict[str, str]]:
+    if len(corpo) != len(ids):
+        return None
+    return {
+        pergunta_id: opcoes[indice]
+        for pergunta_id, indice in zip(ids, corpo)
+        if indice != _SEM_RESPOSTA and indice < len(opcoes)
+    }
+
+
+def decodificar_coluna(especie_chave: Optional[str], dados) -> Optional[Dict[str, str]]:
+    """Decodifica avaliacoes.respostas_compactas; None se não for possível."""
+    dados = bytes(dados)
+    if len(dados) < _TAMANHO_CABECALHO:
+        return None
+    corpo = dados[_TAMANHO_CABECALHO:]
+
+    if dados[0] == _FORMATO_ESQUEMA:
+        esquema = _esquema(int.from_bytes(dados[1:_TAMANHO_CABECALHO], "big"))
+        if esquema is None:
+            logger.warning(f"Respostas compactas com esquema inexistente ({especie_chave!r})")
+            return None
+        return _decodificar(*esquema, corpo)
+
+    if dados[0] == _FORMATO_CRC:
+        config = buscar_especie(especie_chave) if especie_chave else None
+        if config is None:
+            return None
+        pontuador = config.compilar()
+        if dados[1:_TAMANHO_CABECALHO] != _crc_formato1(pontuador):
+            logger.warning(f"Respostas compactas (formato 1) de config alterada: {especie_chave!r}")
+            return None
+        return _decodificar(pontuador.ids, pontuador.opcoes, corpo)
+
+    return None
+
+
+def converter_respostas_formato1(conn) -> int:
+    """
+    Passo da migração 13: move as respostas do formato 1 para
+    avaliacao_respostas enquanto a configuração ainda confere. Linhas
+    que já não conferem ficam como estão (recuperáveis restaurando a
+    configuração antiga) e são contadas no log.
+    """
+    convertidas = perdidas = 0
+    rows = conn.execute("""
+        SELECT id, especie_chave, respostas_compactas FROM avaliacoes
+        WHERE respostas_compactas IS NOT NULL AND substr(respostas_compactas, 1, 1) = X'01'
+    """).fetchall()
+    for avaliacao_id, especie_chave, dados in rows:
+        respostas = decodificar_coluna(especie_chave, dados)
+        if respostas is None:
+            perdidas += 1
+            continue
+        conn.executemany("""
+            INSERT INTO avaliacao_respostas (avaliacao_id, pergunta_id, resposta)
+            VALUES (?, ?, ?)
+        """, [(avaliacao_id, p, r) for p, r in respostas.items()])
+        conn.execute("UPDATE avaliacoes SET respostas_compactas = NULL WHERE id = ?", (avaliacao_id,))
+        convertidas += 1
+
+    if convertidas or perdidas:
+        logger.info(f"Respostas compactas formato 1: {convertidas} convertidas para linhas")
+    if perdidas:
+        logger.warning(f"{perdidas} avaliações em formato 1 não conferem com a config atual; mantidas")
+    return convertidas
+
+
+# ---------------------------------------------------------
+# 💾 Gravação
+# ---------------------------------------------------------
+def _inserir_avaliacao_completa(conn, pet_id, usuario_id, percentual_dor,
+                                respostas, observacoes, especie_chave, pontuador, corpo):
+    compactadas = None
+    if corpo is not None:
+        esquema_id = _id_esquema(conn, pontuador, especie_chave)
+        compactadas = bytes([_FORMATO_ESQUEMA]) + esquema_id.to_bytes(4, "big") + corpo
+
+    cursor = conn.execute("""
+        INSERT INTO avaliacoes
+            (pet_id, usuario_id, percentual_dor, observacoes, especie_chave, respostas_compactas)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (pet_id, usuario_id, percentual_dor, observacoes, especie_chave, compactadas))
+    avaliacao_id = cursor.lastrowid
+
+    if compactadas is None and respostas:
+        conn.executemany("""
+            INSERT INTO avaliacao_respostas (avaliacao_id, pergunta_id, resposta)
+            VALUES (?, ?, ?)
+        """, [(avaliacao_id, pergunta_id, resposta) for pergunta_id, resposta in respostas.items()])
+
+    return avaliacao_id
+
+
+def salvar_avaliacao_completa(
+    pet_id: int,
+    usuario_id: int,
+    percentual_dor: float,
+    respostas: Optional[Dict[str, str]] = None,
+    observacoes: Optional[str] = None,
+    especie_config: Optional[EspecieConfig] = None,
+    compactar: Optional[bool] = None,
+) -> int:
+    """
+    Grava a avaliação e as respostas numa única transação e retorna o id.
+
+    Exceções do banco são repassadas ao chamador.
+    """
+    respostas = dict(respostas or {})
+    compactar = AVALIACOES_CONFIG['respostas_compactas'] if compactar is None else compactar
+
+    especie_chave = normalizar_nome(especie_config.nome) if especie_config else None
+    pontuador = corpo = None
+    if compactar and especie_config is not None and buscar_especie(especie_chave) is especie_config:
+        pontuador = especie_config.compilar()
+        corpo = codificar_respostas(pontuador, respostas)
+
+    return executar_escrita(
+        _inserir_avaliacao_completa,
+        pet_id, usuario_id, percentual_dor, respostas, observacoes,
+        especie_chave, pontuador, corpo,
+    )
+
+
+# ---------------------------------------------------------
+# 🔔 Exclusão
+# ---------------------------------------------------------
+def ao_excluir_avaliacao(funcao: Callable[[int], object]) -> Callable[[int], object]:
+    """
+    Registra `funcao(avaliacao_id)` para rodar depois que uma avaliação
+    é excluída. Camadas de cima (ex.: o cache de PDFs) se registram aqui,
+    e o banco não precisa conhecê-las.
+    """
+    if funcao not in _ao_excluir:
+        _ao_excluir.append(funcao)
+    return funcao
+
+
+def avisar_exclusao(avaliacao_id: int):
+    """Chama as funções registradas; erro numa delas não impede as outras."""
+    for funcao in list(_ao_excluir):
+        try:
+            funcao(avaliacao_id)
+        except Exception as e:
+            logger.error(f"[ERRO] avisar_exclusao ({getattr(funcao, '__qualname__', funcao)}): {e}")
+
+
+# ---------------------------------------------------------
+# 📖 Leitura
+# ---------------------------------------------------------
+def buscar_respostas_avaliacao(avaliacao_id: int) -> List[Dict[str, str]]:
+    """
+    Respostas de uma avaliação como [{'pergunta_id', 'resposta'}],
+    venham elas da coluna compacta ou de avaliacao_respostas.
+    """
+    try:
+        with obter_conexao() as conn:
+            row = conn.execute("""
+                SELECT especie_chave, respostas_compactas
+                FROM avaliacoes
+                WHERE id = ?
+            """, (avaliacao_id,)).fetchone()
+
+            if row is None:
+                return []
+
+            if row["respostas_compactas"] is None:
+                rows = conn.execute("""
+                    SELECT pergunta_id, resposta
+                    FROM avaliacao_respostas
+                    WHERE avaliacao_id = ?
+                    ORDER BY id
+                """, (avaliacao_id,)).fetchall()
+                return [dict(r) for r in rows]
+
+        respostas = decodificar_coluna(row["especie_chave"], row["respostas_compactas"]) or {}
+        return [{"pergunta_id": p, "resposta": r} for p, r in respostas.items()]
+
+    except Exception as e:
+        logger.error(f"[ERRO] buscar_respostas_avaliacao: {e}")
+        return []
+
+
+def iterar_respostas(tamanho_lote: int = 500) -> Iterator[Dict]:
+    """
+    Todas as respostas de todas as avaliações, como
+    {'avaliacao_id', 'pergunta_id', 'resposta'}, em ordem de avaliação.
+
+    Percorre avaliacoes por id em lotes (keyset), sem segurar conexão
+    entre lotes, juntando as respostas em linhas e as compactas.
+    """
+    apos = 0
+    while True:
+        with obter_conexao() as conn:
+            avaliacoes = conn.execute("""
+                SELECT id, especie_chave, respostas_compactas
+                FROM avaliacoes
+                WHERE id > ?
+                ORDER BY id
+                LIMIT ?
+            """, (apos, tamanho_lote)).fetchall()
+            if not avaliacoes:
+                return
+
+            em_linhas = [a["id"] for a in avaliacoes if a["respostas_compactas"] is None]
+            linhas: Dict[int, List] = {}
+            if em_linhas:
+                marcadores = ", ".join("?" * len(em_linhas))
+                for row in conn.execute(f"""
+                    SELECT avaliacao_id, pergunta_id, resposta
+                    FROM avaliacao_respostas
+                    WHERE avaliacao_id IN ({marcadores})
+                    ORDER BY avaliacao_id, id
+                """, em_linhas):
+                    linhas.setdefault(row["avaliacao_id"], []).append((row["pergunta_id"], row["resposta"]))
+
+        for a in avaliacoes:
+            if a["respostas_compactas"] is None:
+                respostas = linhas.get(a["id"], [])
+            else:
+                respostas = (decodificar_coluna(a["especie_chave"], a["respostas_compactas"]) or {}).items()
+            for pergunta_id, resposta in respostas:
+                yield {"avaliacao_id": a["id"], "pergunta_id": pergunta_id, "resposta": resposta}
+
+        apos = avaliacoes[-1]["id"]
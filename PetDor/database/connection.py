@@ -1,9 +1,36 @@
 """
 Conexão central do banco SQLite do PETDOR
+
+Além de `conectar_db()` (fábrica de conexões), este módulo mantém um
+pool de conexões compartilhado pelo processo:
+
+- tamanho máximo limitado (DB_POOL_TAMANHO, padrão 8);
+- checkout por thread: chamadas aninhadas na mesma thread reutilizam
+  a conexão já obtida, em vez de pegar outra do pool;
+- verificação de saúde (`SELECT 1`) antes de entregar uma conexão
+  ociosa (DB_POOL_VERIFICAR_SAUDE, padrão 1);
+- espera limitada quando o pool está saturado (DB_POOL_TIMEOUT, em segundos);
+- métricas de tempo de espera e saturação via `metricas_pool()`.
+
+Toda conexão recebe o PERFIL_PRAGMAS (WAL, busy_timeout, synchronous,
+mmap_size, cache_size), configurável por variáveis DB_*. Escritas
+concorrentes devem passar por `database.escritor.executar_escrita()`.
+
+Uso:
+
+    with obter_conexao() as conn:
+        conn.execute("SELECT ...")
+
+Ao sair do bloco sem exceção a transação é confirmada; com exceção,
+é desfeita. Em ambos os casos a conexão volta para o pool.
 """
 
 import sqlite3
 import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
 import logging
 
@@ -24,10 +51,53 @@ DATABASE_PATH = os.getenv(
     str(ROOT_DIR / "petdor.db")
 )
 
-def conectar_db():
+# -----------------------------------------------
+# 📌 Configuração do pool (via variáveis de ambiente)
+# -----------------------------------------------
+POOL_CONFIG = {
+    'tamanho': int(os.getenv("DB_POOL_TAMANHO", "8")),
+    'timeout': float(os.getenv("DB_POOL_TIMEOUT", "10")),
+    'verificar_saude': os.getenv("DB_POOL_VERIFICAR_SAUDE", "1") == "1",
+}
+
+# -----------------------------------------------
+# 📌 Perfil de PRAGMAs aplicado a toda conexão
+#     WAL deixa leitores e o escritor trabalharem ao mesmo
+#     tempo; busy_timeout evita "database is locked" imediato.
+# -----------------------------------------------
+PERFIL_PRAGMAS = {
+    'journal_mode': os.getenv("DB_JOURNAL_MODE", "WAL"),
+    'busy_timeout': int(os.getenv("DB_BUSY_TIMEOUT_MS", "5000")),
+    'synchronous': os.getenv("DB_SYNCHRONOUS", "NORMAL"),
+    'mmap_size': int(os.getenv("DB_MMAP_SIZE", str(64 * 1024 * 1024))),
+    # Negativo = tamanho em KiB (aqui, ~16 MB por conexão)
+    'cache_size': int(os.getenv("DB_CACHE_SIZE", "-16000")),
+    'foreign_keys': "ON",
+}
+
+
+def aplicar_pragmas(conn, perfil: dict = None):
+    """Aplica o perfil de PRAGMAs em uma conexão recém-aberta."""
+    perfil = PERFIL_PRAGMAS if perfil is None else perfil
+
+    # busy_timeout primeiro: trocar o journal_mode também precisa de lock
+    if 'busy_timeout' in perfil:
+        conn.execute(f"PRAGMA busy_timeout = {int(perfil['busy_timeout'])}")
+
+    for nome, valor in perfil.items():
+        if nome == 'busy_timeout':
+            continue
+        conn.execute(f"PRAGMA {nome} = {valor}")
+
+
+def conectar_db(check_same_thread: bool = True):
     """
     Conecta ao banco SQLite.
     Cria diretórios automaticamente se necessário.
+
+    Retorna uma conexão nova, fora do pool e já com o PERFIL_PRAGMAS
+    aplicado. Prefira `obter_conexao()`; esta função fica para quem
+    precisa de uma conexão dedicada.
     """
     try:
         db_dir = os.path.dirname(DATABASE_PATH)
@@ -35,10 +105,261 @@ def conectar_db():
         if db_dir and not os.path.exists(db_dir):
             os.makedirs(db_dir, exist_ok=True)
 
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = sqlite3.connect(
+            DATABASE_PATH,
+            timeout=PERFIL_PRAGMAS['busy_timeout'] / 1000,
+            check_same_thread=check_same_thread,
+        )
         conn.row_factory = sqlite3.Row
+        aplicar_pragmas(conn)
         return conn
 
     except Exception as e:
         logger.error(f"[ERRO] Falha ao conectar ao banco: {e}")
         raise
+
+
+class PoolEsgotadoError(sqlite3.OperationalError):
+    """Nenhuma conexão ficou livre dentro do tempo limite do pool."""
+
+
+class PoolConexoes:
+    """Pool limitado de conexões SQLite, seguro para uso entre threads."""
+
+    def __init__(self, tamanho: int, timeout: float, verificar_saude: bool = True):
+        if tamanho < 1:
+            raise ValueError("O pool precisa de pelo menos uma conexão")
+
+        self.tamanho = tamanho
+        self.timeout = timeout
+        self.verificar_saude = verificar_saude
+
+        self._livres = queue.LifoQueue(maxsize=tamanho)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._criadas = 0
+        self._fechado = False
+
+        self._metricas = {
+            'checkouts': 0,
+            'esperas': 0,
+            'timeouts': 0,
+            'tempo_espera_total': 0.0,
+            'tempo_espera_max': 0.0,
+            'conexoes_criadas': 0,
+            'conexoes_descartadas': 0,
+            'em_uso': 0,
+            'pico_em_uso': 0,
+        }
+
+    # -------------------------------------------
+    # Ciclo de vida das conexões
+    # -------------------------------------------
+    def _nova_conexao(self):
+        # check_same_thread=False: a conexão pode voltar ao pool e ser
+        # entregue a outra thread, mas nunca a duas ao mesmo tempo.
+        conn = conectar_db(check_same_thread=False)
+        with self._lock:
+            self._metricas['conexoes_criadas'] += 1
+        return conn
+
+    def _descartar(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._criadas -= 1
+            self._metricas['conexoes_descartadas'] += 1
+
+    @staticmethod
+    def _saudavel(conn) -> bool:
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _adquirir(self):
+        if self._fechado:
+            raise PoolEsgotadoError("Pool de conexões já foi encerrado")
+
+        inicio = time.perf_counter()
+        esperou = False
+
+        while True:
+            nova = False
+            try:
+                conn = self._livres.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    nova = self._criadas < self.tamanho
+                    if nova:
+                        self._criadas += 1
+
+                if nova:
+                    try:
+                        conn = self._nova_conexao()
+                    except Exception:
+                        with self._lock:
+                            self._criadas -= 1
+                        raise
+                else:
+                    # Pool saturado: espera alguém devolver uma conexão
+                    esperou = True
+                    restante = self.timeout - (time.perf_counter() - inicio)
+                    try:
+                        if restante <= 0:
+                            raise queue.Empty
+                        conn = self._livres.get(timeout=restante)
+                    except queue.Empty:
+                        with self._lock:
+                            self._metricas['timeouts'] += 1
+                        raise PoolEsgotadoError(
+                            f"Nenhuma conexão livre em {self.timeout:.1f}s "
+                            f"(pool com {self.tamanho} conexões)"
+                        )
+
+            if not nova and self.verificar_saude and not self._saudavel(conn):
+                logger.warning("Conexão do pool falhou na verificação de saúde; recriando")
+                self._descartar(conn)
+                continue
+
+            espera = time.perf_counter() - inicio
+            with self._lock:
+                m = self._metricas
+                m['checkouts'] += 1
+                m['tempo_espera_total'] += espera
+                m['tempo_espera_max'] = max(m['tempo_espera_max'], espera)
+                if esperou:
+                    m['esperas'] += 1
+                m['em_uso'] += 1
+                m['pico_em_uso'] = max(m['pico_em_uso'], m['em_uso'])
+            return conn
+
+    def _devolver(self, conn, descartar: bool = False):
+        with self._lock:
+            self._metricas['em_uso'] -= 1
+
+        if not descartar:
+            try:
+                # Nunca devolve uma transação aberta para o pool
+                if conn.in_transaction:
+                    conn.rollback()
+            except sqlite3.Error:
+                descartar = True
+
+        if descartar or self._fechado:
+            self._descartar(conn)
+            return
+
+        try:
+            self._livres.put_nowait(conn)
+        except queue.Full:
+            self._descartar(conn)
+
+    # -------------------------------------------
+    # API pública
+    # -------------------------------------------
+    @contextmanager
+    def conexao(self):
+        """
+        Context manager que entrega uma conexão do pool.
+
+        Se a thread atual já está dentro de um `conexao()`, a mesma
+        conexão é reutilizada e só o bloco mais externo confirma a
+        transação e devolve a conexão.
+        """
+        atual = getattr(self._local, "conn", None)
+        if atual is not None:
+            self._local.profundidade += 1
+            try:
+                yield atual
+            finally:
+                self._local.profundidade -= 1
+            return
+
+        conn = self._adquirir()
+        self._local.conn = conn
+        self._local.profundidade = 1
+        descartar = False
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                descartar = True
+            raise
+        finally:
+            self._local.conn = None
+            self._local.profundidade = 0
+            self._devolver(conn, descartar=descartar)
+
+    def metricas(self) -> dict:
+        """Retorna um retrato das métricas do pool."""
+        with self._lock:
+            m = dict(self._metricas)
+            m['conexoes_abertas'] = self._criadas
+        m['tamanho'] = self.tamanho
+        m['livres'] = self._livres.qsize()
+        m['tempo_espera_medio'] = (
+            m['tempo_espera_total'] / m['checkouts'] if m['checkouts'] else 0.0
+        )
+        m['saturacao'] = m['em_uso'] / self.tamanho
+        return m
+
+    def fechar(self):
+        """Fecha todas as conexões ociosas e impede novos checkouts."""
+        self._fechado = True
+        while True:
+            try:
+                conn = self._livres.get_nowait()
+            except queue.Empty:
+                break
+            self._descartar(conn)
+
+
+# -----------------------------------------------
+# 📌 Pool global do processo
+# -----------------------------------------------
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def obter_pool() -> PoolConexoes:
+    """Retorna o pool global, criando-o no primeiro uso."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PoolConexoes(
+                    tamanho=POOL_CONFIG['tamanho'],
+                    timeout=POOL_CONFIG['timeout'],
+                    verificar_saude=POOL_CONFIG['verificar_saude'],
+                )
+                logger.info(
+                    f"Pool de conexões criado ({POOL_CONFIG['tamanho']} conexões) "
+                    f"para {DATABASE_PATH}"
+                )
+    return _pool
+
+
+def obter_conexao():
+    """Atalho para `obter_pool().conexao()`."""
+    return obter_pool().conexao()
+
+
+def metricas_pool() -> dict:
+    """Métricas do pool global (tempo de espera, saturação, etc.)."""
+    return obter_pool().metricas()
+
+
+def fechar_pool():
+    """Encerra o pool global. Um novo pool é criado no próximo uso."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.fechar()
+            _pool = None
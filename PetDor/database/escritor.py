@@ -0,0 +1,166 @@
+"""
+Serialização de escritas do PETDOR
+
+O SQLite aceita um único escritor por vez. Com várias sessões do
+Streamlit gravando ao mesmo tempo, cada uma disputando o lock, os
+INSERTs acabam em "database is locked". Aqui todas as escritas vão
+para uma fila atendida por uma única thread, dona de uma conexão
+dedicada. Em modo WAL os leitores (pool de `obter_conexao()`) seguem
+lendo normalmente enquanto a fila é processada.
+
+Uso:
+
+    def _inserir(conn, nome):
+        return conn.execute("INSERT ...", (nome,)).lastrowid
+
+    novo_id = executar_escrita(_inserir, "Rex")
+
+A função recebe a conexão do escritor já dentro de uma transação
+(BEGIN IMMEDIATE); o commit/rollback é feito pelo escritor.
+"""
+
+import os
+import queue
+import threading
+import time
+import logging
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+
+from .connection import conectar_db
+
+logger = logging.getLogger(__name__)
+
+ESCRITOR_CONFIG = {
+    'tamanho_fila': int(os.getenv("DB_ESCRITOR_FILA", "1000")),
+    'timeout': float(os.getenv("DB_ESCRITOR_TIMEOUT", "30")),
+}
+
+
+class EscritorSerializado:
+    """Executa funções de escrita, uma de cada vez, numa thread dedicada."""
+
+    def __init__(self, tamanho_fila: int, timeout: float):
+        self.timeout = timeout
+        self._fila = queue.Queue(maxsize=tamanho_fila)
+        self._thread = None
+        self._conn = None
+        self._lock = threading.Lock()
+        self._metricas = {
+            'escritas': 0,
+            'falhas': 0,
+            'canceladas': 0,
+            'tempo_fila_total': 0.0,
+            'tempo_execucao_total': 0.0,
+        }
+
+    def _garantir_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._loop, name="petdor-escritor", daemon=True
+                )
+                self._thread.start()
+
+    def _loop(self):
+        self._conn = conectar_db(check_same_thread=False)
+        while True:
+            item = self._fila.get()
+            if item is None:
+                break
+
+            funcao, args, kwargs, futuro, enfileirado_em = item
+            if not futuro.set_running_or_notify_cancel():
+                continue   # O chamador desistiu (timeout) antes de a escrita começar
+
+            inicio = time.perf_counter()
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+                resultado = funcao(self._conn, *args, **kwargs)
+                self._conn.commit()
+            except BaseException as e:
+                try:
+                    self._conn.rollback()
+                except Exception:
+                    pass
+                with self._lock:
+                    self._metricas['falhas'] += 1
+                futuro.set_exception(e)
+            else:
+                futuro.set_result(resultado)
+            finally:
+                fim = time.perf_counter()
+                with self._lock:
+                    self._metricas['escritas'] += 1
+                    self._metricas['tempo_fila_total'] += inicio - enfileirado_em
+                    self._metricas['tempo_execucao_total'] += fim - inicio
+
+        self._conn.close()
+        self._conn = None
+
+    def executar(self, funcao, *args, **kwargs):
+        """
+        Enfileira `funcao(conn, *args, **kwargs)` e espera o resultado.
+
+        Exceções levantadas pela função são repassadas ao chamador.
+        Chamadas feitas de dentro de uma escrita (na própria thread do
+        escritor) rodam direto, na mesma transação.
+
+        TimeoutError só é levantado se a escrita nunca vai rodar (ainda
+        estava na fila e foi cancelada): o chamador pode repetir sem
+        duplicar dados. Se ela já começou, espera o resultado real.
+        """
+        if threading.current_thread() is self._thread:
+            return funcao(self._conn, *args, **kwargs)
+
+        self._garantir_thread()
+        futuro = Future()
+        try:
+            self._fila.put(
+                (funcao, args, kwargs, futuro, time.perf_counter()),
+                timeout=self.timeout,
+            )
+        except queue.Full:
+            raise TimeoutError("Fila de escrita do banco está cheia") from None
+        try:
+            return futuro.result(timeout=self.timeout)
+        except FuturesTimeoutError:
+            if not futuro.cancel():
+                # Já está rodando: o commit pode acontecer, então não é falha
+                logger.warning(f"Escrita {getattr(funcao, '__name__', funcao)} demorando "
+                               f"mais de {self.timeout:g}s; aguardando")
+                return futuro.result()
+            with self._lock:
+                self._metricas['canceladas'] += 1
+            raise TimeoutError("Escrita no banco não começou a tempo (fila lenta)") from None
+
+    def metricas(self) -> dict:
+        with self._lock:
+            m = dict(self._metricas)
+        m['fila'] = self._fila.qsize()
+        m['tempo_fila_medio'] = m['tempo_fila_total'] / m['escritas'] if m['escritas'] else 0.0
+        return m
+
+    def parar(self):
+        """Processa o que já está na fila e encerra a thread."""
+        if self._thread is not None and self._thread.is_alive():
+            self._fila.put(None)
+            self._thread.join()
+
+
+_escritor = EscritorSerializado(
+    tamanho_fila=ESCRITOR_CONFIG['tamanho_fila'],
+    timeout=ESCRITOR_CONFIG['timeout'],
+)
+
+
+def executar_escrita(funcao, *args, **kwargs):
+    """Executa uma função de escrita através do escritor único do processo."""
+    return _escritor.executar(funcao, *args, **kwargs)
+
+
+def metricas_escritor() -> dict:
+    """Métricas do escritor (tamanho da fila, tempos médios, falhas)."""
+    return _escritor.metricas()
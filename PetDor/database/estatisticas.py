@@ -0,0 +1,568 @@
+"""
+Estatísticas pré-agregadas (rollups) do PETDOR
+
+O painel admin e a página da conta não varrem mais avaliacoes/usuarios:
+leem tabelas de resumo mantidas por triggers do SQLite, na mesma
+transação de cada INSERT/UPDATE/DELETE:
+
+- estat_avaliacoes_dia          (dia, espécie) -> total, soma dos percentuais
+- estat_avaliacoes_usuario      usuário -> total, soma, pets distintos
+- estat_avaliacoes_usuario_pet  (usuário, pet) -> total (apoio a "pets distintos")
+- estat_avaliacoes_pet          pet -> total, soma
+- estat_usuarios_dia            dia de cadastro -> total, ativos
+- estat_contadores              contadores globais (ex.: usuários avaliadores)
+
+A espécie de cada avaliação é copiada do pet para avaliacoes.especie no
+INSERT, para que o DELETE (inclusive em cascata, quando o pet já foi
+removido) saiba de qual balde descontar.
+
+Para recalcular tudo a partir das tabelas de fatos (backfill, ou depois
+de mexer no banco com os triggers desligados):
+
+    python -m database.estatisticas --reconstruir
+
+As consultas aceitam um intervalo de dias (ver `intervalo_periodo()`),
+atendido por busca de faixa na chave `dia` dos rollups.
+
+DDL_ROLLUPS e SQL_RECONSTRUIR fazem parte da migração 7; para mudar os
+rollups, crie uma nova migração.
+"""
+
+import argparse
+import logging
+import sys
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from .connection import obter_conexao
+from .escritor import executar_escrita
+
+logger = logging.getLogger(__name__)
+
+_DIA_AVALIACAO = "COALESCE(date({r}.data_avaliacao), '')"
+_DIA_CADASTRO = "COALESCE(date({r}.data_criacao), '')"
+
+
+# ---------------------------------------------------------
+# 🧮 Fragmentos dos triggers
+#     {r} = NEW ou OLD
+# ---------------------------------------------------------
+def _somar_avaliacao(r: str) -> str:
+    dia = _DIA_AVALIACAO.format(r=r)
+    return f"""
+        UPDATE avaliacoes SET especie = (SELECT especie FROM pets WHERE id = {r}.pet_id)
+        WHERE id = {r}.id;
+
+        INSERT INTO estat_avaliacoes_dia (dia, especie, total, soma_percentual)
+        VALUES ({dia}, COALESCE((SELECT especie FROM pets WHERE id = {r}.pet_id), ''), 1, {r}.percentual_dor)
+        ON CONFLICT (dia, especie) DO UPDATE SET
+            total = total + 1,
+            soma_percentual = soma_percentual + excluded.soma_percentual;
+
+        INSERT INTO estat_avaliacoes_usuario_pet (usuario_id, pet_id, total)
+        VALUES ({r}.usuario_id, {r}.pet_id, 1)
+        ON CONFLICT (usuario_id, pet_id) DO UPDATE SET total = total + 1;
+
+        INSERT INTO estat_avaliacoes_usuario (usuario_id, total, soma_percentual, pets_distintos)
+        VALUES ({r}.usuario_id, 1, {r}.percentual_dor, 1)
+        ON CONFLICT (usuario_id) DO UPDATE SET
+            total = total + 1,
+            soma_percentual = soma_percentual + excluded.soma_percentual,
+            pets_distintos = pets_distintos + (
+                SELECT total = 1 FROM estat_avaliacoes_usuario_pet
+                WHERE usuario_id = {r}.usuario_id AND pet_id = {r}.pet_id
+            );
+
+        UPDATE estat_contadores SET valor = valor + 1
+        WHERE nome = 'usuarios_avaliadores'
+          AND (SELECT total FROM estat_avaliacoes_usuario WHERE usuario_id = {r}.usuario_id) = 1;
+
+        INSERT INTO estat_avaliacoes_pet (pet_id, total, soma_percentual)
+        VALUES ({r}.pet_id, 1, {r}.percentual_dor)
+        ON CONFLICT (pet_id) DO UPDATE SET
+            total = total + 1,
+            soma_percentual = soma_percentual + excluded.soma_percentual;
+    """
+
+
+def _subtrair_avaliacao(r: str) -> str:
+    dia = _DIA_AVALIACAO.format(r=r)
+    especie = f"COALESCE({r}.especie, '')"
+    return f"""
+        UPDATE estat_avaliacoes_dia
+        SET total = total - 1, soma_percentual = soma_percentual - {r}.percentual_dor
+        WHERE dia = {dia} AND especie = {especie};
+        DELETE FROM estat_avaliacoes_dia
+        WHERE dia = {dia} AND especie = {especie} AND total <= 0;
+
+        UPDATE estat_avaliacoes_usuario_pet SET total = total - 1
+        WHERE usuario_id = {r}.usuario_id AND pet_id = {r}.pet_id;
+
+        UPDATE estat_avaliacoes_usuario
+        SET total = total - 1,
+            soma_percentual = soma_percentual - {r}.percentual_dor,
+            pets_distintos = pets_distintos - (
+                SELECT total <= 0 FROM estat_avaliacoes_usuario_pet
+                WHERE usuario_id = {r}.usuario_id AND pet_id = {r}.pet_id
+            )
+        WHERE usuario_id = {r}.usuario_id;
+
+        DELETE FROM estat_avaliacoes_usuario_pet
+        WHERE usuario_id = {r}.usuario_id AND pet_id = {r}.pet_id AND total <= 0;
+
+        UPDATE estat_contadores SET valor = valor - 1
+        WHERE nome = 'usuarios_avaliadores'
+          AND (SELECT total FROM estat_avaliacoes_usuario WHERE usuario_id = {r}.usuario_id) <= 0;
+        DELETE FROM estat_avaliacoes_usuario WHERE usuario_id = {r}.usuario_id AND total <= 0;
+
+        UPDATE estat_avaliacoes_pet
+        SET total = total - 1, soma_percentual = soma_percentual - {r}.percentual_dor
+        WHERE pet_id = {r}.pet_id;
+        DELETE FROM estat_avaliacoes_pet WHERE pet_id = {r}.pet_id AND total <= 0;
+    """
+
+
+def _somar_usuario(r: str) -> str:
+    return f"""
+        INSERT INTO estat_usuarios_dia (dia, total, ativos)
+        VALUES ({_DIA_CADASTRO.format(r=r)}, 1, COALESCE({r}.ativo, 0) != 0)
+        ON CONFLICT (dia) DO UPDATE SET
+            total = total + 1,
+            ativos = ativos + excluded.ativos;
+    """
+
+
+def _subtrair_usuario(r: str) -> str:
+    dia = _DIA_CADASTRO.format(r=r)
+    return f"""
+        UPDATE estat_usuarios_dia
+        SET total = total - 1, ativos = ativos - (COALESCE({r}.ativo, 0) != 0)
+        WHERE dia = {dia};
+        DELETE FROM estat_usuarios_dia WHERE dia = {dia} AND total <= 0;
+    """
+
+
+def _trigger(nome: str, evento: str, corpo: str) -> str:
+    return f"CREATE TRIGGER IF NOT EXISTS {nome} {evento} BEGIN {corpo} END"
+
+
+# ---------------------------------------------------------
+# 🏗️ Tabelas e triggers
+# ---------------------------------------------------------
+DDL_ROLLUPS: Tuple[str, ...] = (
+    """
+    CREATE TABLE IF NOT EXISTS estat_avaliacoes_dia (
+        dia TEXT NOT NULL,
+        especie TEXT NOT NULL,
+        total INTEGER NOT NULL DEFAULT 0,
+        soma_percentual REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (dia, especie)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS estat_avaliacoes_usuario (
+        usuario_id INTEGER PRIMARY KEY,
+        total INTEGER NOT NULL DEFAULT 0,
+        soma_percentual REAL NOT NULL DEFAULT 0,
+        pets_distintos INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS estat_avaliacoes_usuario_pet (
+        usuario_id INTEGER NOT NULL,
+        pet_id INTEGER NOT NULL,
+        total INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (usuario_id, pet_id)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS estat_avaliacoes_pet (
+        pet_id INTEGER PRIMARY KEY,
+        total INTEGER NOT NULL DEFAULT 0,
+        soma_percentual REAL NOT NULL DEFAULT 0
+    )
+    """,
+    # Top pets mais avaliados sem ordenar a tabela inteira
+    "CREATE INDEX IF NOT EXISTS idx_estat_pet_total ON estat_avaliacoes_pet (total)",
+    """
+    CREATE TABLE IF NOT EXISTS estat_usuarios_dia (
+        dia TEXT PRIMARY KEY,
+        total INTEGER NOT NULL DEFAULT 0,
+        ativos INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS estat_contadores (
+        nome TEXT PRIMARY KEY,
+        valor INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID
+    """,
+    _trigger("trg_estat_avaliacao_insert", "AFTER INSERT ON avaliacoes",
+             _somar_avaliacao("NEW")),
+    _trigger("trg_estat_avaliacao_delete", "AFTER DELETE ON avaliacoes",
+             _subtrair_avaliacao("OLD")),
+    # avaliacoes.especie fica de fora: é escrita pelos próprios triggers
+    _trigger("trg_estat_avaliacao_update",
+             "AFTER UPDATE OF pet_id, usuario_id, percentual_dor, data_avaliacao ON avaliacoes",
+             _subtrair_avaliacao("OLD") + _somar_avaliacao("NEW")),
+    _trigger("trg_estat_usuario_insert", "AFTER INSERT ON usuarios",
+             _somar_usuario("NEW")),
+    _trigger("trg_estat_usuario_delete", "AFTER DELETE ON usuarios",
+             _subtrair_usuario("OLD")),
+    _trigger("trg_estat_usuario_update", "AFTER UPDATE OF ativo, data_criacao ON usuarios",
+             _subtrair_usuario("OLD") + _somar_usuario("NEW")),
+)
+
+# Recalcula os rollups a partir de avaliacoes/usuarios
+SQL_RECONSTRUIR: Tuple[str, ...] = (
+    "UPDATE avaliacoes SET especie = (SELECT especie FROM pets WHERE pets.id = avaliacoes.pet_id)",
+    "DELETE FROM estat_avaliacoes_dia",
+    "DELETE FROM estat_avaliacoes_usuario",
+    "DELETE FROM estat_avaliacoes_usuario_pet",
+    "DELETE FROM estat_avaliacoes_pet",
+    "DELETE FROM estat_usuarios_dia",
+    "DELETE FROM estat_contadores",
+    f"""
+    INSERT INTO estat_avaliacoes_dia (dia, especie, total, soma_percentual)
+    SELECT {_DIA_AVALIACAO.format(r='a')}, COALESCE(a.especie, ''), COUNT(*), SUM(a.percentual_dor)
+    FROM avaliacoes a
+    GROUP BY 1, 2
+    """,
+    """
+    INSERT INTO estat_avaliacoes_usuario_pet (usuario_id, pet_id, total)
+    SELECT usuario_id, pet_id, COUNT(*) FROM avaliacoes GROUP BY usuario_id, pet_id
+    """,
+    """
+    INSERT INTO estat_avaliacoes_usuario (usuario_id, total, soma_percentual, pets_distintos)
+    SELECT usuario_id, COUNT(*), SUM(percentual_dor), COUNT(DISTINCT pet_id)
+    FROM avaliacoes
+    GROUP BY usuario_id
+    """,
+    """
+    INSERT INTO estat_avaliacoes_pet (pet_id, total, soma_percentual)
+    SELECT pet_id, COUNT(*), SUM(percentual_dor) FROM avaliacoes GROUP BY pet_id
+    """,
+    f"""
+    INSERT INTO estat_usuarios_dia (dia, total, ativos)
+    SELECT {_DIA_CADASTRO.format(r='u')}, COUNT(*), SUM(COALESCE(u.ativo, 0) != 0)
+    FROM usuarios u
+    GROUP BY 1
+    """,
+    """
+    INSERT INTO estat_contadores (nome, valor)
+    SELECT 'usuarios_avaliadores', COUNT(*) FROM estat_avaliacoes_usuario
+    """,
+)
+
+
+def _reconstruir(conn):
+    for sql in SQL_RECONSTRUIR:
+        conn.execute(sql)
+
+
+def reconstruir_estatisticas():
+    """Recalcula todos os rollups numa única transação do escritor."""
+    executar_escrita(_reconstruir)
+    logger.info("✔ Estatísticas reconstruídas.")
+
+
+# ---------------------------------------------------------
+# 📅 Períodos
+#     Datas são gravadas como texto ISO em UTC (CURRENT_TIMESTAMP),
+#     então um intervalo de dias vira uma busca por faixa no índice.
+# ---------------------------------------------------------
+Intervalo = Tuple[date, date]     # (primeiro dia, último dia), inclusive
+
+PERIODOS_DIAS = {
+    "Hoje": 1,
+    "Últimos 7 dias": 7,
+    "Últimos 30 dias": 30,
+    "Todo período": None,
+}
+
+
+def intervalo_periodo(periodo: str, hoje: Optional[date] = None) -> Optional[Intervalo]:
+    """
+    Converte um rótulo de PERIODOS_DIAS em (inicio, fim); None = todo o
+    histórico. Os dias são UTC, como os baldes `dia` dos rollups: a tela
+    do admin exibe os períodos marcados como UTC.
+    """
+    if periodo not in PERIODOS_DIAS:
+        raise ValueError(f"Período desconhecido: {periodo!r}")
+    dias = PERIODOS_DIAS[periodo]
+    if dias is None:
+        return None
+    hoje = hoje or datetime.now(timezone.utc).date()
+    return hoje - timedelta(days=dias - 1), hoje
+
+
+def _limites_dia(intervalo: Intervalo) -> Tuple[str, str]:
+    """Limites para colunas `dia` dos rollups (BETWEEN, inclusive)."""
+    inicio, fim = intervalo
+    return inicio.isoformat(), fim.isoformat()
+
+
+def _limites_timestamp(intervalo: Intervalo) -> Tuple[str, str]:
+    """Limites para data_avaliacao/data_criacao (>= inicio e < dia seguinte ao fim)."""
+    inicio, fim = intervalo
+    return inicio.isoformat(), (fim + timedelta(days=1)).isoformat()
+
+
+def _dias(inicio: date, fim: date) -> List[str]:
+    return [(inicio + timedelta(days=n)).isoformat() for n in range((fim - inicio).days + 1)]
+
+
+def _intervalo_existente(conn, tabela: str) -> Optional[Intervalo]:
+    """Primeiro e último dia com dados num rollup (ignora o balde sem data)."""
+    primeiro, ultimo = conn.execute(
+        f"SELECT MIN(dia), MAX(dia) FROM {tabela} WHERE dia > ''"
+    ).fetchone()
+    if primeiro is None:
+        return None
+    return date.fromisoformat(primeiro), date.fromisoformat(ultimo)
+
+
+# ---------------------------------------------------------
+# 📊 Consultas (leem os rollups; com intervalo, só a faixa de dias)
+# ---------------------------------------------------------
+def get_estatisticas_gerais_usuarios(intervalo: Optional[Intervalo] = None) -> Optional[dict]:
+    """
+    Totais de usuários cadastrados, ativos e desativados.
+    Com `intervalo`, considera só quem se cadastrou nesses dias.
+    """
+    try:
+        with obter_conexao() as conn:
+            if intervalo is None:
+                total, ativos = conn.execute("""
+                    SELECT COALESCE(SUM(total), 0), COALESCE(SUM(ativos), 0)
+                    FROM estat_usuarios_dia
+                """).fetchone()
+            else:
+                total, ativos = conn.execute("""
+                    SELECT COALESCE(SUM(total), 0), COALESCE(SUM(ativos), 0)
+                    FROM estat_usuarios_dia
+                    WHERE dia BETWEEN ? AND ?
+                """, _limites_dia(intervalo)).fetchone()
+
+        desativados = total - ativos
+        return {
+            'total_usuarios': total,
+            'total_ativos': ativos,
+            'total_desativados': desativados,
+            'taxa_desativacao': (desativados / total * 100) if total else 0.0,
+        }
+
+    except Exception as e:
+        logger.error(f"[ERRO] get_estatisticas_gerais_usuarios: {e}")
+        return None
+
+
+def contar_usuarios(ativo: Optional[bool] = None, min_avaliacoes: int = 0) -> Optional[dict]:
+    """
+    {'total', 'ativos', 'inativos'} dos usuários que passam nos filtros da
+    tabela do admin, sem varrer usuarios: sem mínimo de avaliações, soma
+    estat_usuarios_dia; com mínimo, lê a faixa `total >= ?` do rollup.
+    """
+    try:
+        with obter_conexao() as conn:
+            if min_avaliacoes > 0:
+                total, ativos = conn.execute("""
+                    SELECT COUNT(*), COALESCE(SUM(u.ativo != 0), 0)
+                    FROM estat_avaliacoes_usuario e
+                    JOIN usuarios u ON u.id = e.usuario_id
+                    WHERE e.total >= ?
+                """, (min_avaliacoes,)).fetchone()
+            else:
+                total, ativos = conn.execute("""
+                    SELECT COALESCE(SUM(total), 0), COALESCE(SUM(ativos), 0)
+                    FROM estat_usuarios_dia
+                """).fetchone()
+
+        inativos = total - ativos
+        if ativo is True:
+            total, inativos = ativos, 0
+        elif ativo is False:
+            total, ativos = inativos, 0
+        return {'total': total, 'ativos': ativos, 'inativos': inativos}
+
+    except Exception as e:
+        logger.error(f"[ERRO] contar_usuarios: {e}")
+        return None
+
+
+def get_estatisticas_usuario(usuario_id: int) -> dict:
+    """Avaliações feitas pelo usuário, pets distintos avaliados e média de dor."""
+    try:
+        with obter_conexao() as conn:
+            row = conn.execute("""
+                SELECT total, soma_percentual, pets_distintos
+                FROM estat_avaliacoes_usuario
+                WHERE usuario_id = ?
+            """, (usuario_id,)).fetchone()
+
+        if row is None:
+            return {'total_avaliacoes': 0, 'total_pets': 0, 'media_percentual': 0.0}
+        total, soma, pets = row
+        return {
+            'total_avaliacoes': total,
+            'total_pets': pets,
+            'media_percentual': soma / total if total else 0.0,
+        }
+
+    except Exception as e:
+        logger.error(f"[ERRO] get_estatisticas_usuario: {e}")
+        return {}
+
+
+def get_estatisticas_avaliacoes(top_pets: int = 5,
+                                intervalo: Optional[Intervalo] = None) -> Optional[dict]:
+    """
+    Totais de avaliações, média geral, quebra por espécie e pets mais
+    avaliados, de todo o histórico ou só do `intervalo`.
+
+    Totais e espécies vêm de estat_avaliacoes_dia. Usuários distintos e
+    pets mais avaliados não somam entre dias; num intervalo eles são
+    contados pelo índice coberto (data_avaliacao, usuario_id, pet_id).
+    """
+    try:
+        with obter_conexao() as conn:
+            if intervalo is None:
+                por_especie = conn.execute("""
+                    SELECT especie, SUM(total) AS total, SUM(soma_percentual) AS soma
+                    FROM estat_avaliacoes_dia
+                    GROUP BY especie
+                    ORDER BY total DESC
+                """).fetchall()
+
+                row = conn.execute("""
+                    SELECT valor FROM estat_contadores WHERE nome = 'usuarios_avaliadores'
+                """).fetchone()
+                avaliadores = row[0] if row else 0
+
+                mais_avaliados = conn.execute("""
+                    SELECT p.nome, e.total
+                    FROM estat_avaliacoes_pet e
+                    JOIN pets p ON p.id = e.pet_id
+                    ORDER BY e.total DESC
+                    LIMIT ?
+                """, (top_pets,)).fetchall()
+            else:
+                por_especie = conn.execute("""
+                    SELECT especie, SUM(total) AS total, SUM(soma_percentual) AS soma
+                    FROM estat_avaliacoes_dia
+                    WHERE dia BETWEEN ? AND ?
+                    GROUP BY especie
+                    ORDER BY total DESC
+                """, _limites_dia(intervalo)).fetchall()
+
+                inicio, fim = _limites_timestamp(intervalo)
+                avaliadores = conn.execute("""
+                    SELECT COUNT(DISTINCT usuario_id)
+                    FROM avaliacoes INDEXED BY idx_avaliacoes_data_usuario_pet
+                    WHERE data_avaliacao >= ? AND data_avaliacao < ?
+                """, (inicio, fim)).fetchone()[0]
+
+                mais_avaliados = conn.execute("""
+                    SELECT p.nome, t.total
+                    FROM (
+                        SELECT pet_id, COUNT(*) AS total
+                        FROM avaliacoes INDEXED BY idx_avaliacoes_data_usuario_pet
+                        WHERE data_avaliacao >= ? AND data_avaliacao < ?
+                        GROUP BY pet_id
+                        ORDER BY total DESC
+                        LIMIT ?
+                    ) t
+                    JOIN pets p ON p.id = t.pet_id
+                    ORDER BY t.total DESC
+                """, (inicio, fim, top_pets)).fetchall()
+
+        total = sum(row["total"] for row in por_especie)
+        soma = sum(row["soma"] for row in por_especie)
+        return {
+            'total_avaliacoes': total,
+            'usuarios_avaliadores': avaliadores,
+            'media_geral': soma / total if total else 0.0,
+            'por_especie': [
+                (row["especie"] or "Não informada", row["total"], row["soma"] / row["total"])
+                for row in por_especie
+            ],
+            'top_pets': [(row["nome"], row["total"]) for row in mais_avaliados],
+        }
+
+    except Exception as e:
+        logger.error(f"[ERRO] get_estatisticas_avaliacoes: {e}")
+        return None
+
+
+# ---------------------------------------------------------
+# 📈 Séries diárias (um ponto por dia, inclusive os sem dados)
+# ---------------------------------------------------------
+def serie_diaria_avaliacoes(intervalo: Optional[Intervalo] = None) -> List[dict]:
+    """[{'dia', 'total', 'media_dor'}] para cada dia do intervalo (ou de todo o histórico)."""
+    try:
+        with obter_conexao() as conn:
+            intervalo = intervalo or _intervalo_existente(conn, "estat_avaliacoes_dia")
+            if intervalo is None:
+                return []
+            por_dia = {
+                row[0]: (row[1], row[2])
+                for row in conn.execute("""
+                    SELECT dia, SUM(total), SUM(soma_percentual)
+                    FROM estat_avaliacoes_dia
+                    WHERE dia BETWEEN ? AND ?
+                    GROUP BY dia
+                """, _limites_dia(intervalo))
+            }
+
+        serie = []
+        for dia in _dias(*intervalo):
+            total, soma = por_dia.get(dia, (0, 0.0))
+            serie.append({'dia': dia, 'total': total, 'media_dor': soma / total if total else None})
+        return serie
+
+    except Exception as e:
+        logger.error(f"[ERRO] serie_diaria_avaliacoes: {e}")
+        return []
+
+
+def serie_diaria_usuarios(intervalo: Optional[Intervalo] = None) -> List[dict]:
+    """[{'dia', 'cadastros', 'ativos'}] para cada dia do intervalo (ou de todo o histórico)."""
+    try:
+        with obter_conexao() as conn:
+            intervalo = intervalo or _intervalo_existente(conn, "estat_usuarios_dia")
+            if intervalo is None:
+                return []
+            por_dia = {
+                row[0]: (row[1], row[2])
+                for row in conn.execute("""
+                    SELECT dia, total, ativos
+                    FROM estat_usuarios_dia
+                    WHERE dia BETWEEN ? AND ?
+                """, _limites_dia(intervalo))
+            }
+
+        return [
+            {'dia': dia, 'cadastros': por_dia.get(dia, (0, 0))[0], 'ativos': por_dia.get(dia, (0, 0))[1]}
+            for dia in _dias(*intervalo)
+        ]
+
+    except Exception as e:
+        logger.error(f"[ERRO] serie_diaria_usuarios: {e}")
+        return []
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    parser = argparse.ArgumentParser(description="Rollups de estatísticas do PETDOR")
+    parser.add_argument("--reconstruir", action="store_true",
+                        help="recalcula os rollups a partir de avaliacoes/usuarios")
+    args = parser.parse_args()
+
+    if not args.reconstruir:
+        parser.print_help()
+        sys.exit(0)
+
+    from .migration import migrar_banco_completo
+    migrar_banco_completo()
+    reconstruir_estatisticas()
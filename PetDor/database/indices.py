@@ -0,0 +1,377 @@
+"""
+Catálogo de índices e consultas críticas do PETDOR
+
+INDICES declara todos os índices secundários do banco; a migração que
+os cria é montada a partir deste catálogo (ver database/migration.py).
+
+CONSULTAS_CRITICAS registra as consultas dos caminhos quentes.
+`verificar_planos()` roda EXPLAIN QUERY PLAN em cada uma e aponta as
+que fazem varredura completa de tabela. Para rodar a checagem:
+
+    python -m database.indices
+
+O comando termina com código 1 se alguma consulta registrada fizer SCAN.
+"""
+
+import re
+import sys
+import logging
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Indice:
+    nome: str
+    tabela: str
+    colunas: str                 # lista de colunas/expressões, já em SQL
+    onde: Optional[str] = None   # cláusula WHERE de índice parcial
+    unico: bool = False
+    migracao: int = 4            # versão da migração que cria o índice
+    removido: Optional[int] = None  # versão da migração que o removeu, se houver
+
+    def sql(self) -> str:
+        unico = "UNIQUE " if self.unico else ""
+        sql = f"CREATE {unico}INDEX IF NOT EXISTS {self.nome} ON {self.tabela} ({self.colunas})"
+        if self.onde:
+            sql += f" WHERE {self.onde}"
+        return sql
+
+
+# ---------------------------------------------------------
+# 📇 Índices secundários
+# ---------------------------------------------------------
+INDICES: Tuple[Indice, ...] = (
+    # Pets de um tutor (listar_pets, página de avaliação)
+    Indice("idx_pets_tutor", "pets", "tutor_id, nome"),
+
+    # Histórico por usuário e por pet, do mais recente para o mais antigo
+    Indice("idx_avaliacoes_usuario_data", "avaliacoes", "usuario_id, data_avaliacao"),
+    Indice("idx_avaliacoes_pet_data", "avaliacoes", "pet_id, data_avaliacao"),
+
+    # Respostas de uma avaliação
+    Indice("idx_respostas_avaliacao", "avaliacao_respostas", "avaliacao_id"),
+
+    # Notificações não lidas: índice parcial, só entram as pendentes
+    Indice(
+        "idx_notificacoes_nao_lidas", "notificacoes",
+        "usuario_id_destino, nivel_prioridade, data_criacao",
+        onde="lida = 0",
+    ),
+
+    # Vínculos ativos de um pet
+    Indice("idx_vinculos_pet", "vinculos_pets", "pet_id, ativo"),
+    Indice("idx_vinculos_usuario", "vinculos_pets", "usuario_id, ativo"),
+
+    # Busca de email sem diferenciar maiúsculas: LOWER(email) = LOWER(?)
+    Indice("idx_usuarios_email_lower", "usuarios", "LOWER(email)"),
+    # Nenhuma consulta usa COLLATE NOCASE: só custava escrita (removido na 12)
+    Indice("idx_usuarios_email_nocase", "usuarios", "email COLLATE NOCASE", removido=12),
+
+    # Tokens de confirmação de email
+    Indice(
+        "idx_usuarios_token_confirmacao", "usuarios", "token_confirmacao",
+        onde="token_confirmacao IS NOT NULL",
+    ),
+
+    # tokens_reset.token já é UNIQUE (índice automático do SQLite)
+
+    # Ordenação das listagens paginadas (database/paginacao.py)
+    Indice("idx_usuarios_data_criacao", "usuarios", "data_criacao", migracao=6),
+    Indice("idx_pets_nome", "pets", "nome", migracao=6),
+    Indice("idx_avaliacoes_data", "avaliacoes", "data_avaliacao", migracao=6),
+    Indice("idx_notificacoes_usuario_data", "notificacoes", "usuario_id_destino, data_criacao", migracao=6),
+
+    # Filtro de período do admin: usuários distintos e pets mais avaliados
+    # num intervalo de datas, lendo só o índice (cobre as três colunas)
+    Indice("idx_avaliacoes_data_usuario_pet", "avaliacoes", "data_avaliacao, usuario_id, pet_id", migracao=8),
+
+    # Tabela de usuários do admin: ordem por nome e por total de avaliações
+    Indice("idx_usuarios_nome", "usuarios", "nome", migracao=9),
+    Indice("idx_estat_usuario_total", "estat_avaliacoes_usuario", "total", migracao=9),
+
+    # Outbox de emails: próximos a enviar e reservas vencidas (database/outbox.py)
+    Indice("idx_outbox_status", "email_outbox", "status, proxima_tentativa", migracao=10),
+
+    # Alertas de dor esperando o próximo digest (utils/digest.py)
+    Indice(
+        "idx_notificacoes_digest", "notificacoes",
+        "usuario_id_destino, data_criacao",
+        onde="email_pendente = 1",
+        migracao=11,
+    ),
+)
+
+
+def indices_da_migracao(versao: int) -> Tuple[str, ...]:
+    """SQL dos índices criados pela migração `versao`."""
+    return tuple(i.sql() for i in INDICES if i.migracao == versao)
+
+
+def remocoes_da_migracao(versao: int) -> Tuple[str, ...]:
+    """DROP dos índices removidos pela migração `versao`.
+
+    Índices removidos continuam no catálogo: a migração que os criou não
+    pode mudar (checksum).
+    """
+    return tuple(f"DROP INDEX IF EXISTS {i.nome}" for i in INDICES if i.removido == versao)
+
+
+# ---------------------------------------------------------
+# 🔥 Consultas dos caminhos quentes
+#     nome -> (sql, parâmetros de exemplo)
+# ---------------------------------------------------------
+CONSULTAS_CRITICAS = {
+    "pets_do_tutor": (
+        "SELECT id, nome, especie FROM pets WHERE tutor_id = ? ORDER BY nome",
+        (1,),
+    ),
+    "avaliacoes_do_usuario": (
+        "SELECT * FROM avaliacoes WHERE usuario_id = ? ORDER BY data_avaliacao DESC",
+        (1,),
+    ),
+    "historico_usuario_pagina": (
+        """
+        SELECT a.id, a.percentual_dor, a.data_avaliacao, p.nome, p.especie
+        FROM avaliacoes a
+        JOIN pets p ON p.id = a.pet_id
+        WHERE a.usuario_id = ? AND a.data_avaliacao IS NOT NULL
+          AND (a.data_avaliacao, a.id) < (?, ?)
+        ORDER BY a.data_avaliacao DESC, a.id DESC
+        LIMIT ?
+        """,
+        (1, "2024-01-01 00:00:00", 10, 21),
+    ),
+    # Trecho final da paginação: avaliações sem data (database/paginacao.py)
+    "historico_usuario_sem_data": (
+        """
+        SELECT a.id, a.percentual_dor, a.data_avaliacao, p.nome, p.especie
+        FROM avaliacoes a
+        JOIN pets p ON p.id = a.pet_id
+        WHERE a.usuario_id = ? AND a.data_avaliacao IS NULL AND (a.id) < (?)
+        ORDER BY a.data_avaliacao DESC, a.id DESC
+        LIMIT ?
+        """,
+        (1, 10, 21),
+    ),
+    "avaliacoes_do_pet": (
+        "SELECT * FROM avaliacoes WHERE pet_id = ? ORDER BY data_avaliacao DESC",
+        (1,),
+    ),
+    "respostas_da_avaliacao": (
+        "SELECT pergunta_id, resposta FROM avaliacao_respostas WHERE avaliacao_id = ?",
+        (1,),
+    ),
+    "notificacoes_nao_lidas": (
+        """
+        SELECT n.id, n.mensagem, p.nome
+        FROM notificacoes n
+        LEFT JOIN pets p ON n.pet_id = p.id
+        WHERE n.usuario_id_destino = ? AND n.lida = 0
+        ORDER BY n.nivel_prioridade ASC, n.data_criacao DESC
+        LIMIT ?
+        """,
+        (1, 10),
+    ),
+    "contar_notificacoes_nao_lidas": (
+        "SELECT COUNT(*) FROM notificacoes WHERE usuario_id_destino = ? AND lida = 0",
+        (1,),
+    ),
+    "vinculos_ativos_do_pet": (
+        """
+        SELECT u.id, u.email
+        FROM vinculos_pets vp
+        JOIN usuarios u ON vp.usuario_id = u.id
+        WHERE vp.pet_id = ? AND vp.ativo = 1
+        """,
+        (1,),
+    ),
+    "token_reset": (
+        "SELECT usuario_id, expiracao, usado FROM tokens_reset WHERE token = ?",
+        ("x",),
+    ),
+    "usuario_por_email_lower": (
+        "SELECT id FROM usuarios WHERE LOWER(email) = LOWER(?)",
+        ("a@b.c",),
+    ),
+    "usuario_por_email": (
+        "SELECT id, nome, senha_hash, ativo FROM usuarios WHERE email = ?",
+        ("a@b.c",),
+    ),
+    "pagina_usuarios": (
+        "SELECT id, nome FROM usuarios WHERE (data_criacao, id) < (?, ?) "
+        "ORDER BY data_criacao DESC, id DESC LIMIT ?",
+        ("2024-01-01 00:00:00", 10, 51),
+    ),
+    "pagina_pets": (
+        "SELECT id, nome FROM pets WHERE (nome, id) > (?, ?) ORDER BY nome ASC, id ASC LIMIT ?",
+        ("Rex", 10, 51),
+    ),
+    "pagina_avaliacoes": (
+        """
+        SELECT a.id, p.nome FROM avaliacoes a JOIN pets p ON p.id = a.pet_id
+        WHERE (a.data_avaliacao, a.id) < (?, ?)
+        ORDER BY a.data_avaliacao DESC, a.id DESC LIMIT ?
+        """,
+        ("2024-01-01 00:00:00", 10, 51),
+    ),
+    "pagina_avaliacoes_pet": (
+        """
+        SELECT a.id, p.nome FROM avaliacoes a JOIN pets p ON p.id = a.pet_id
+        WHERE a.pet_id = ? AND (a.data_avaliacao, a.id) > (?, ?)
+        ORDER BY a.data_avaliacao ASC, a.id ASC LIMIT ?
+        """,
+        (1, "2024-01-01 00:00:00", 10, 101),
+    ),
+    "pagina_notificacoes": (
+        """
+        SELECT n.id, n.mensagem FROM notificacoes n
+        WHERE n.usuario_id_destino = ? AND (n.data_criacao, n.id) < (?, ?)
+        ORDER BY n.data_criacao DESC, n.id DESC LIMIT ?
+        """,
+        (1, "2024-01-01 00:00:00", 10, 51),
+    ),
+    "avaliacoes_periodo_por_especie": (
+        """
+        SELECT especie, SUM(total), SUM(soma_percentual)
+        FROM estat_avaliacoes_dia
+        WHERE dia BETWEEN ? AND ?
+        GROUP BY especie
+        """,
+        ("2024-01-01", "2024-01-31"),
+    ),
+    "serie_diaria_avaliacoes": (
+        """
+        SELECT dia, SUM(total), SUM(soma_percentual)
+        FROM estat_avaliacoes_dia
+        WHERE dia BETWEEN ? AND ?
+        GROUP BY dia
+        """,
+        ("2024-01-01", "2024-01-31"),
+    ),
+    "usuarios_periodo": (
+        "SELECT dia, total, ativos FROM estat_usuarios_dia WHERE dia BETWEEN ? AND ?",
+        ("2024-01-01", "2024-01-31"),
+    ),
+    "avaliadores_periodo": (
+        """
+        SELECT COUNT(DISTINCT usuario_id)
+        FROM avaliacoes INDEXED BY idx_avaliacoes_data_usuario_pet
+        WHERE data_avaliacao >= ? AND data_avaliacao < ?
+        """,
+        ("2024-01-01", "2024-02-01"),
+    ),
+    "top_pets_periodo": (
+        """
+        SELECT pet_id, COUNT(*) AS total
+        FROM avaliacoes INDEXED BY idx_avaliacoes_data_usuario_pet
+        WHERE data_avaliacao >= ? AND data_avaliacao < ?
+        GROUP BY pet_id ORDER BY total DESC LIMIT ?
+        """,
+        ("2024-01-01", "2024-02-01", 5),
+    ),
+    "admin_usuarios_por_nome": (
+        """
+        SELECT u.id, u.nome, COALESCE(e.total, 0)
+        FROM usuarios u
+        LEFT JOIN estat_avaliacoes_usuario e ON e.usuario_id = u.id
+        WHERE u.ativo = ? AND (u.nome, u.id) > (?, ?)
+        ORDER BY u.nome ASC, u.id ASC LIMIT ?
+        """,
+        (1, "Ana", 10, 51),
+    ),
+    "admin_usuarios_por_avaliacoes": (
+        """
+        SELECT u.id, u.nome, COALESCE(e.total, 0)
+        FROM usuarios u
+        LEFT JOIN estat_avaliacoes_usuario e ON e.usuario_id = u.id
+        WHERE e.total >= ? AND (e.total, e.usuario_id) < (?, ?)
+        ORDER BY e.total DESC, e.usuario_id DESC LIMIT ?
+        """,
+        (1, 20, 10, 51),
+    ),
+    "admin_usuarios_sem_avaliacoes": (
+        """
+        SELECT u.id, u.nome
+        FROM usuarios u
+        LEFT JOIN estat_avaliacoes_usuario e ON e.usuario_id = u.id
+        WHERE COALESCE(e.total, 0) < ? AND (u.id) < (?)
+        ORDER BY u.id DESC LIMIT ?
+        """,
+        (1, 10, 51),
+    ),
+    "admin_contagem_min_avaliacoes": (
+        """
+        SELECT COUNT(*), COALESCE(SUM(u.ativo != 0), 0)
+        FROM estat_avaliacoes_usuario e
+        JOIN usuarios u ON u.id = e.usuario_id
+        WHERE e.total >= ?
+        """,
+        (5,),
+    ),
+    "outbox_proximos": (
+        """
+        SELECT id FROM email_outbox
+        WHERE status = 'pendente' AND proxima_tentativa <= CURRENT_TIMESTAMP
+        ORDER BY proxima_tentativa, id
+        LIMIT ?
+        """,
+        (20,),
+    ),
+    "digest_alertas_destinatario": (
+        """
+        SELECT id, pet_id, nivel_prioridade, percentual_dor, data_criacao
+        FROM notificacoes
+        WHERE email_pendente = 1 AND usuario_id_destino IN (?, ?)
+        """,
+        (1, 2),
+    ),
+    "usuario_por_token_confirmacao": (
+        "SELECT id FROM usuarios WHERE token_confirmacao = ?",
+        ("x",),
+    ),
+}
+
+# "SCAN pets" / "SCAN TABLE pets" indicam varredura completa; "SCAN ... USING
+# (COVERING) INDEX" percorre um índice inteiro e também não é aceitável aqui.
+_RE_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)")
+
+
+def planos_com_varredura(conn) -> dict:
+    """
+    Roda EXPLAIN QUERY PLAN em cada consulta crítica.
+
+    Retorna {nome_consulta: [linhas do plano com SCAN]} apenas para as
+    consultas que fazem varredura de tabela.
+    """
+    problemas = {}
+    for nome, (sql, params) in CONSULTAS_CRITICAS.items():
+        plano = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+        scans = [row[3] for row in plano if _RE_SCAN.match(row[3])]
+        if scans:
+            problemas[nome] = scans
+    return problemas
+
+
+def verificar_planos() -> bool:
+    """Loga e retorna False se alguma consulta crítica varre uma tabela."""
+    from .connection import obter_conexao
+    from .migration import migrar_banco_completo
+
+    migrar_banco_completo()
+    with obter_conexao() as conn:
+        problemas = planos_com_varredura(conn)
+
+    for nome, scans in problemas.items():
+        logger.error(f"Consulta crítica '{nome}' faz varredura: {'; '.join(scans)}")
+    return not problemas
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    ok = verificar_planos()
+    print("✔ Nenhuma consulta crítica faz varredura de tabela." if ok
+          else "❌ Há consultas críticas fazendo varredura de tabela.")
+    sys.exit(0 if ok else 1)
@@ -1,27 +1,103 @@
 """
 Criação e migração de tabelas do PETDOR
+
+As migrações são numeradas e aplicadas em ordem. Cada versão aplicada
+fica registrada na tabela `schema_version` junto com o checksum dos
+seus passos, então na inicialização basta uma consulta para saber se
+há algo pendente. Migrações pendentes são aplicadas todas numa única
+transação.
+
+Para evoluir o banco, acrescente uma nova `Migracao` ao final de
+MIGRACOES. Nunca edite uma migração já aplicada: o checksum muda e
+`migrar_banco_completo()` recusa continuar.
 """
 
+import hashlib
 import logging
-from .connection import conectar_db
+import threading
+from dataclasses import dataclass
+from typing import Callable, Tuple, Union
+
+from .avaliacoes import DDL_ESQUEMAS, converter_respostas_formato1
+from .connection import obter_conexao
+from .escritor import executar_escrita
+from .estatisticas import DDL_ROLLUPS, SQL_RECONSTRUIR
+from .indices import indices_da_migracao, remocoes_da_migracao
+from .outbox import DDL_OUTBOX
 
 logger = logging.getLogger(__name__)
 
 
-def criar_tabelas():
-    """Cria todas as tabelas necessárias do sistema PETDOR."""
-    conn = conectar_db()
-    cursor = conn.cursor()
-
-    # ----------------------------------------
-    # 🔧 Ativa suporte a FOREIGN KEY no SQLite
-    # ----------------------------------------
-    cursor.execute("PRAGMA foreign_keys = ON;")
-
-    # ----------------------------------------
-    # 👤 Tabela: Usuários
-    # ----------------------------------------
-    cursor.execute("""
+class ErroMigracao(RuntimeError):
+    """Histórico de migrações do banco não confere com o código."""
+
+
+@dataclass(frozen=True)
+class AdicionarColuna:
+    """Passo que adiciona uma coluna apenas se ela ainda não existir."""
+    tabela: str
+    coluna: str
+    definicao: str
+
+    def sql(self) -> str:
+        return f"ALTER TABLE {self.tabela} ADD COLUMN {self.coluna} {self.definicao}"
+
+    def aplicar(self, conn):
+        colunas = {row[1] for row in conn.execute(f"PRAGMA table_info({self.tabela})")}
+        if self.coluna not in colunas:
+            conn.execute(self.sql())
+
+
+@dataclass(frozen=True)
+class ConverterDados:
+    """
+    Passo em Python (conversão de dados que SQL puro não resolve). O
+    checksum usa só a descrição: a função pode ser corrigida sem mudar
+    o histórico.
+    """
+    descricao: str
+    funcao: Callable
+
+    def sql(self) -> str:
+        return f"-- {self.descricao}"
+
+    def aplicar(self, conn):
+        self.funcao(conn)
+
+
+Passo = Union[str, AdicionarColuna, ConverterDados]
+
+
+@dataclass(frozen=True)
+class Migracao:
+    versao: int
+    nome: str
+    passos: Tuple[Passo, ...]
+
+    @property
+    def checksum(self) -> str:
+        # Espaços são normalizados para que reindentar o SQL não mude o checksum
+        texto = "\n".join(
+            " ".join((p if isinstance(p, str) else p.sql()).split())
+            for p in self.passos
+        )
+        return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+    def aplicar(self, conn):
+        for passo in self.passos:
+            if isinstance(passo, str):
+                conn.execute(passo)
+            else:
+                passo.aplicar(conn)
+
+
+# ---------------------------------------------------------
+# 📜 Migrações (em ordem; nunca edite uma já publicada)
+# ---------------------------------------------------------
+MIGRACOES: Tuple[Migracao, ...] = (
+    Migracao(1, "tabelas_iniciais", (
+        # 👤 Usuários
+        """
         CREATE TABLE IF NOT EXISTS usuarios (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             nome TEXT NOT NULL,
@@ -29,13 +105,10 @@ def criar_tabelas():
             senha_hash TEXT NOT NULL,
             data_criacao TEXT DEFAULT CURRENT_TIMESTAMP,
             ativo INTEGER DEFAULT 1
-        );
-    """)
-
-    # ----------------------------------------
-    # 🐾 Tabela: Pets
-    # ----------------------------------------
-    cursor.execute("""
+        )
+        """,
+        # 🐾 Pets
+        """
         CREATE TABLE IF NOT EXISTS pets (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             tutor_id INTEGER NOT NULL,
@@ -45,13 +118,10 @@ def criar_tabelas():
             peso REAL,
             data_cadastro TEXT DEFAULT CURRENT_TIMESTAMP,
             FOREIGN KEY (tutor_id) REFERENCES usuarios(id) ON DELETE CASCADE
-        );
-    """)
-
-    # ----------------------------------------
-    # 📋 Tabela: Avaliações de dor
-    # ----------------------------------------
-    cursor.execute("""
+        )
+        """,
+        # 📋 Avaliações de dor
+        """
         CREATE TABLE IF NOT EXISTS avaliacoes (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             pet_id INTEGER NOT NULL,
@@ -61,13 +131,10 @@ def criar_tabelas():
             data_avaliacao TEXT DEFAULT CURRENT_TIMESTAMP,
             FOREIGN KEY (pet_id) REFERENCES pets(id) ON DELETE CASCADE,
             FOREIGN KEY (usuario_id) REFERENCES usuarios(id) ON DELETE CASCADE
-        );
-    """)
-
-    # ----------------------------------------
-    # 🔑 Reset de senha
-    # ----------------------------------------
-    cursor.execute("""
+        )
+        """,
+        # 🔑 Reset de senha
+        """
         CREATE TABLE IF NOT EXISTS password_resets (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             usuario_id INTEGER NOT NULL,
@@ -76,20 +143,221 @@ def criar_tabelas():
             used INTEGER DEFAULT 0,
             created_at TEXT DEFAULT CURRENT_TIMESTAMP,
             FOREIGN KEY (usuario_id) REFERENCES usuarios(id) ON DELETE CASCADE
-        );
-    """)
+        )
+        """,
+    )),
 
-    conn.commit()
-    conn.close()
+    # Tabelas que o código já consulta, mas que nunca eram criadas
+    Migracao(2, "tabelas_respostas_notificacoes_vinculos_tokens", (
+        # 📝 Respostas de cada pergunta da avaliação
+        """
+        CREATE TABLE IF NOT EXISTS avaliacao_respostas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            avaliacao_id INTEGER NOT NULL,
+            pergunta_id TEXT NOT NULL,
+            resposta TEXT,
+            FOREIGN KEY (avaliacao_id) REFERENCES avaliacoes(id) ON DELETE CASCADE
+        )
+        """,
+        # 🔔 Notificações
+        """
+        CREATE TABLE IF NOT EXISTS notificacoes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            pet_id INTEGER,
+            usuario_id_destino INTEGER NOT NULL,
+            tipo_notificacao TEXT NOT NULL,
+            nivel_prioridade INTEGER DEFAULT 3,
+            mensagem TEXT NOT NULL,
+            lida INTEGER DEFAULT 0,
+            data_criacao TEXT DEFAULT CURRENT_TIMESTAMP,
+            data_lida TEXT,
+            FOREIGN KEY (pet_id) REFERENCES pets(id) ON DELETE CASCADE,
+            FOREIGN KEY (usuario_id_destino) REFERENCES usuarios(id) ON DELETE CASCADE
+        )
+        """,
+        # 🔗 Vínculos entre pets e clínicas/veterinários
+        """
+        CREATE TABLE IF NOT EXISTS vinculos_pets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            pet_id INTEGER NOT NULL,
+            usuario_id INTEGER NOT NULL,
+            tipo_vinculo TEXT,
+            ativo INTEGER DEFAULT 1,
+            data_criacao TEXT DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (pet_id, usuario_id),
+            FOREIGN KEY (pet_id) REFERENCES pets(id) ON DELETE CASCADE,
+            FOREIGN KEY (usuario_id) REFERENCES usuarios(id) ON DELETE CASCADE
+        )
+        """,
+        # 🔑 Tokens de reset usados por auth/password_reset.py
+        """
+        CREATE TABLE IF NOT EXISTS tokens_reset (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            usuario_id INTEGER NOT NULL,
+            token TEXT UNIQUE NOT NULL,
+            expiracao TEXT NOT NULL,
+            usado INTEGER DEFAULT 0,
+            data_criacao TEXT DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (usuario_id) REFERENCES usuarios(id) ON DELETE CASCADE
+        )
+        """,
+    )),
+
+    # Colunas que o código já lê/grava, mas que nunca eram criadas
+    Migracao(3, "colunas_usuarios_e_pets", (
+        AdicionarColuna("usuarios", "tipo_usuario", "TEXT DEFAULT 'tutor'"),
+        AdicionarColuna("usuarios", "email_confirmado", "INTEGER DEFAULT 0"),
+        AdicionarColuna("usuarios", "token_confirmacao", "TEXT"),
+        AdicionarColuna("usuarios", "data_expiracao_token", "TEXT"),
+        AdicionarColuna("pets", "idade", "INTEGER"),
+        AdicionarColuna("pets", "data_nascimento", "TEXT"),
+        AdicionarColuna("pets", "sexo", "TEXT"),
+    )),
+
+    # Índices do catálogo em database/indices.py marcados com migracao=4
+    Migracao(4, "indices_caminhos_quentes", indices_da_migracao(4)),
+
+    # Respostas compactadas na própria avaliação (ver database/avaliacoes.py)
+    Migracao(5, "avaliacoes_respostas_compactas", (
+        AdicionarColuna("avaliacoes", "especie_chave", "TEXT"),
+        AdicionarColuna("avaliacoes", "respostas_compactas", "BLOB"),
+    )),
+
+    # Índices das listagens paginadas (database/paginacao.py)
+    Migracao(6, "indices_paginacao", indices_da_migracao(6)),
+
+    # Rollups de estatísticas mantidos por triggers (ver database/estatisticas.py)
+    Migracao(7, "estatisticas_rollup", (
+        AdicionarColuna("avaliacoes", "especie", "TEXT"),
+        *DDL_ROLLUPS,
+        *SQL_RECONSTRUIR,
+    )),
+
+    # Índice coberto para o filtro de período do admin
+    Migracao(8, "indices_periodo", indices_da_migracao(8)),
+    Migracao(9, "indices_usuarios_admin", indices_da_migracao(9)),
+
+    # Outbox de emails enviados em segundo plano (ver database/outbox.py)
+    Migracao(10, "email_outbox", (*DDL_OUTBOX, *indices_da_migracao(10))),
+
+    # Alertas de dor agrupados em digests por email (ver utils/digest.py)
+    Migracao(11, "notificacoes_digest", (
+        AdicionarColuna("notificacoes", "percentual_dor", "REAL"),
+        AdicionarColuna("notificacoes", "email_pendente", "INTEGER DEFAULT 0"),
+        *indices_da_migracao(11),
+    )),
+
+    # Índice NOCASE de email sem uso (LOWER(email) cobre a busca)
+    Migracao(12, "remove_indice_email_nocase", remocoes_da_migracao(12)),
+
+    # Respostas compactas passam a apontar para uma cópia do esquema
+    # (ver database/avaliacoes.py); as do formato 1 viram linhas
+    Migracao(13, "esquemas_respostas", (
+        *DDL_ESQUEMAS,
+        ConverterDados("respostas compactas formato 1 -> avaliacao_respostas",
+                       converter_respostas_formato1),
+    )),
+)
+
+VERSAO_MAIS_RECENTE = MIGRACOES[-1].versao
+
+_SQL_SCHEMA_VERSION = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        versao INTEGER PRIMARY KEY,
+        nome TEXT NOT NULL,
+        checksum TEXT NOT NULL,
+        aplicada_em TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+# Evita repetir a verificação a cada rerun do Streamlit no mesmo processo
+_banco_atualizado = False
+_lock = threading.Lock()
 
-    logger.info("✔ Todas as tabelas foram criadas/migradas com sucesso.")
+
+def _versoes_aplicadas(conn) -> dict:
+    """Retorna {versao: checksum} do que já foi aplicado (vazio se nada)."""
+    existe = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'"
+    ).fetchone()
+    if not existe:
+        return {}
+    return {row[0]: row[1] for row in conn.execute("SELECT versao, checksum FROM schema_version")}
+
+
+def _validar_checksums(aplicadas: dict):
+    por_versao = {m.versao: m for m in MIGRACOES}
+    for versao, checksum in aplicadas.items():
+        migracao = por_versao.get(versao)
+        if migracao is None:
+            raise ErroMigracao(
+                f"Banco está na versão {versao}, desconhecida por este código "
+                f"(mais recente: {VERSAO_MAIS_RECENTE})"
+            )
+        if migracao.checksum != checksum:
+            raise ErroMigracao(
+                f"Migração {versao} ({migracao.nome}) foi alterada depois de aplicada"
+            )
+
+
+def _aplicar_pendentes(conn) -> list:
+    """Roda dentro de uma única transação do escritor."""
+    conn.execute(_SQL_SCHEMA_VERSION)
+
+    # Relê dentro da transação: outro processo pode ter migrado antes
+    aplicadas = _versoes_aplicadas(conn)
+    _validar_checksums(aplicadas)
+
+    novas = []
+    for migracao in MIGRACOES:
+        if migracao.versao in aplicadas:
+            continue
+        migracao.aplicar(conn)
+        conn.execute(
+            "INSERT INTO schema_version (versao, nome, checksum) VALUES (?, ?, ?)",
+            (migracao.versao, migracao.nome, migracao.checksum),
+        )
+        novas.append(migracao.versao)
+    return novas
+
+
+def versao_atual() -> int:
+    """Maior versão de schema aplicada no banco (0 se nenhuma)."""
+    with obter_conexao() as conn:
+        aplicadas = _versoes_aplicadas(conn)
+    return max(aplicadas, default=0)
 
 
 def migrar_banco_completo():
     """
     Executa todas as migrações necessárias no banco.
-    Pode crescer com novas versões.
+
+    Se o banco já está na versão mais recente, custa uma leitura da
+    tabela schema_version; depois disso, nada é feito de novo neste
+    processo.
     """
-    logger.info("🔄 Iniciando migração completa do banco...")
-    criar_tabelas()
-    logger.info("🏁 Migração finalizada.")
+    global _banco_atualizado
+    if _banco_atualizado:
+        return
+
+    with _lock:
+        if _banco_atualizado:
+            return
+
+        with obter_conexao() as conn:
+            aplicadas = _versoes_aplicadas(conn)
+        _validar_checksums(aplicadas)
+
+        if len(aplicadas) < len(MIGRACOES):
+            logger.info("🔄 Aplicando migrações pendentes do banco...")
+            novas = executar_escrita(_aplicar_pendentes)
+            if novas:
+                logger.info(f"✔ Migrações aplicadas: {novas}")
+
+        logger.info(f"🏁 Banco na versão {VERSAO_MAIS_RECENTE}.")
+        _banco_atualizado = True
+
+
+def criar_tabelas():
+    """Cria todas as tabelas necessárias do sistema PETDOR."""
+    migrar_banco_completo()
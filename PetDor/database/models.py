@@ -3,7 +3,13 @@ Funções de consulta de dados do PETDOR
 """
 
 import logging
-from .connection import conectar_db
+from typing import List, Optional, Tuple
+
+from .connection import obter_conexao
+from .escritor import executar_escrita
+from .estatisticas import get_estatisticas_gerais_usuarios, get_estatisticas_usuario
+from .paginacao import Listagem, iterar_usuarios, listar_usuarios_pagina
+from .avaliacoes import avisar_exclusao, decodificar_coluna, buscar_respostas_avaliacao
 
 logger = logging.getLogger(__name__)
 
@@ -13,74 +19,235 @@ logger = logging.getLogger(__name__)
 # ---------------------------------------------------------
 def buscar_usuario_por_id(usuario_id: int):
     try:
-        conn = conectar_db()
-        cursor = conn.cursor()
+        with obter_conexao() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute("""
-            SELECT id, nome, email, data_criacao, ativo
-            FROM usuarios
-            WHERE id = ?
-        """, (usuario_id,))
+            cursor.execute("""
+                SELECT id, nome, email, data_criacao, ativo
+                FROM usuarios
+                WHERE id = ?
+            """, (usuario_id,))
 
-        row = cursor.fetchone()
-        return dict(row) if row else None
+            row = cursor.fetchone()
+            return dict(row) if row else None
 
     except Exception as e:
         logger.error(f"[ERRO] buscar_usuario_por_id: {e}")
         return None
 
-    finally:
-        if conn:
-            conn.close()
-
 
 # ---------------------------------------------------------
 # 🔎 Buscar usuário por email
 # ---------------------------------------------------------
 def buscar_usuario_por_email(email: str):
     try:
-        conn = conectar_db()
-        cursor = conn.cursor()
+        with obter_conexao() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute("""
-            SELECT id, nome, email, data_criacao, ativo
-            FROM usuarios
-            WHERE LOWER(email) = LOWER(?)
-        """, (email.strip(),))
+            cursor.execute("""
+                SELECT id, nome, email, data_criacao, ativo
+                FROM usuarios
+                WHERE LOWER(email) = LOWER(?)
+            """, (email.strip(),))
 
-        row = cursor.fetchone()
-        return dict(row) if row else None
+            row = cursor.fetchone()
+            return dict(row) if row else None
 
     except Exception as e:
         logger.error(f"[ERRO] buscar_usuario_por_email: {e}")
         return None
 
-    finally:
-        if conn:
-            conn.close()
-
 
 # ---------------------------------------------------------
 # 📜 Listar todos os usuários (para admin)
 # ---------------------------------------------------------
-def listar_usuarios():
+def listar_usuarios(limite: Optional[int] = None, apos=None):
+    """
+    Usuários do mais recente para o mais antigo.
+
+    Sem `limite`, percorre a tabela em lotes (iterar_usuarios) e devolve
+    a lista completa; para telas, prefira listar_usuarios_pagina().
+    """
+    try:
+        if limite is None:
+            return list(iterar_usuarios())
+        return listar_usuarios_pagina(limite, apos).itens
+
+    except Exception as e:
+        logger.error(f"[ERRO] listar_usuarios: {e}")
+        return []
+
+
+# ---------------------------------------------------------
+# 📝 Respostas de várias avaliações de uma vez
+# ---------------------------------------------------------
+# Limite seguro de parâmetros por consulta em builds antigos do SQLite
+_LOTE_PARAMETROS = 900
+
+
+def buscar_respostas_agrupadas(avaliacao_ids):
+    """
+    Retorna {avaliacao_id: {pergunta_id: resposta}} para as avaliações
+    informadas, usando poucas consultas IN (...) em vez de uma por
+    avaliação. Útil para recalcular percentuais em lote com
+    EspecieConfig.calcular_percentuais_lote. Respostas compactadas
+    (ver database/avaliacoes.py) também são incluídas.
+    """
+    ids = list(dict.fromkeys(avaliacao_ids))
+    agrupadas = {avaliacao_id: {} for avaliacao_id in ids}
+    try:
+        with obter_conexao() as conn:
+            for inicio in range(0, len(ids), _LOTE_PARAMETROS):
+                lote = ids[inicio:inicio + _LOTE_PARAMETROS]
+                marcadores = ", ".join("?" * len(lote))
+
+                cursor = conn.execute(f"""
+                    SELECT id, especie_chave, respostas_compactas
+                    FROM avaliacoes
+                    WHERE id IN ({marcadores}) AND respostas_compactas IS NOT NULL
+                """, lote)
+                for avaliacao_id, especie_chave, dados in cursor:
+                    agrupadas[avaliacao_id].update(decodificar_coluna(especie_chave, dados) or {})
+
+                cursor = conn.execute(f"""
+                    SELECT avaliacao_id, pergunta_id, resposta
+                    FROM avaliacao_respostas
+                    WHERE avaliacao_id IN ({marcadores})
+                """, lote)
+                for avaliacao_id, pergunta_id, resposta in cursor:
+                    agrupadas[avaliacao_id][pergunta_id] = resposta
+        return agrupadas
+
+    except Exception as e:
+        logger.error(f"[ERRO] buscar_respostas_agrupadas: {e}")
+        return {}
+
+
+def buscar_pet_por_id(pet_id: int):
+    """Dados do pet, ou None."""
     try:
-        conn = conectar_db()
-        cursor = conn.cursor()
+        with obter_conexao() as conn:
+            row = conn.execute("""
+                SELECT id, tutor_id, nome, especie, raca, peso, idade, sexo,
+                       data_nascimento, data_cadastro
+                FROM pets
+                WHERE id = ?
+            """, (pet_id,)).fetchone()
+        return dict(row) if row else None
+
+    except Exception as e:
+        logger.error(f"[ERRO] buscar_pet_por_id: {e}")
+        return None
 
-        cursor.execute("""
-            SELECT id, nome, email, data_criacao, ativo
-            FROM usuarios
-            ORDER BY data_criacao DESC
-        """)
 
-        rows = cursor.fetchall()
+def buscar_pets_vinculados(usuario_id: int) -> List[dict]:
+    """Pets com vínculo ativo a uma clínica/veterinário, por nome."""
+    try:
+        with obter_conexao() as conn:
+            rows = conn.execute("""
+                SELECT p.id, p.nome, p.especie
+                FROM vinculos_pets vp
+                JOIN pets p ON p.id = vp.pet_id
+                WHERE vp.usuario_id = ? AND vp.ativo = 1
+                ORDER BY p.nome, p.id
+            """, (usuario_id,)).fetchall()
         return [dict(row) for row in rows]
 
     except Exception as e:
-        logger.error(f"[ERRO] listar_usuarios: {e}")
+        logger.error(f"[ERRO] buscar_pets_vinculados: {e}")
         return []
 
-    finally:
-        if conn:
-            conn.close()
+
+# ---------------------------------------------------------
+# 📊 Histórico de avaliações (cabeçalho + dados do pet)
+# ---------------------------------------------------------
+# Cursor da paginação por chave: (data_avaliacao, id) do último item da página
+# (data_avaliacao None = já nas avaliações sem data)
+CursorHistorico = Tuple[Optional[str], int]
+
+_SQL_AVALIACAO_COM_PET = """
+    SELECT
+        a.id AS avaliacao_id,
+        a.pet_id,
+        a.usuario_id,
+        a.percentual_dor,
+        a.observacoes,
+        a.data_avaliacao,
+        p.nome AS pet_nome,
+        p.especie AS pet_especie,
+        p.raca AS pet_raca,
+        p.data_nascimento AS pet_data_nascimento,
+        p.sexo AS pet_sexo,
+        p.peso AS pet_peso
+    FROM avaliacoes a
+    JOIN pets p ON p.id = a.pet_id
+"""
+
+
+# Mesma paginação das demais listagens (inclui avaliações sem data, no fim)
+_HISTORICO_USUARIO = Listagem(
+    "historico_usuario",
+    _SQL_AVALIACAO_COM_PET,
+    ordem=(("a.data_avaliacao", "data_avaliacao"), ("a.id", "avaliacao_id")),
+)
+
+
+def buscar_historico_usuario(usuario_id: int, limite: Optional[int] = 20,
+                             apos: Optional[CursorHistorico] = None):
+    """
+    Uma página do histórico do usuário, da avaliação mais recente para a
+    mais antiga, já com os dados do pet (uma única consulta).
+
+    `apos` é o cursor devolvido pela página anterior. Retorna
+    (avaliacoes, proximo_cursor); proximo_cursor é None na última página.
+    Com limite=None, retorna tudo de uma vez.
+    As respostas não vêm junto: carregue só as que forem exibidas com
+    buscar_respostas_agrupadas().
+    """
+    # Percorre o índice (usuario_id, data_avaliacao)
+    filtros = [("a.usuario_id = ?", usuario_id)]
+    try:
+        if limite is None:
+            return list(_HISTORICO_USUARIO.iterar(filtros)), None
+        pagina = _HISTORICO_USUARIO.pagina(limite, apos, filtros)
+        return pagina.itens, pagina.proximo_cursor
+
+    except Exception as e:
+        logger.error(f"[ERRO] buscar_historico_usuario: {e}")
+        return [], None
+
+
+def buscar_avaliacoes_usuario(usuario_id: int) -> List[dict]:
+    """Todas as avaliações do usuário com dados do pet (mais recentes primeiro)."""
+    avaliacoes, _ = buscar_historico_usuario(usuario_id, limite=None)
+    return avaliacoes
+
+
+def buscar_avaliacao_por_id(avaliacao_id: int):
+    try:
+        with obter_conexao() as conn:
+            row = conn.execute(f"""
+                {_SQL_AVALIACAO_COM_PET}
+                WHERE a.id = ?
+            """, (avaliacao_id,)).fetchone()
+            return dict(row) if row else None
+
+    except Exception as e:
+        logger.error(f"[ERRO] buscar_avaliacao_por_id: {e}")
+        return None
+
+
+def deletar_avaliacao(avaliacao_id: int) -> bool:
+    """Remove a avaliação (as respostas saem junto, por ON DELETE CASCADE)."""
+    try:
+        removidas = executar_escrita(
+            lambda conn: conn.execute("DELETE FROM avaliacoes WHERE id = ?", (avaliacao_id,)).rowcount
+        )
+        # Ex.: relatórios PDF em cache desta avaliação (utils/cache_pdf.py)
+        if removidas:
+            avisar_exclusao(avaliacao_id)
+        return removidas > 0
+
+    except Exception as e:
+        logger.error(f"[ERRO] deletar_avaliacao: {e}")
+        return False
@@ -0,0 +1,249 @@
+"""
+Caixa de saída (outbox) de emails do PETDOR
+
+Páginas e funções de negócio não falam com o SMTP: só gravam o email
+em `email_outbox` e seguem em frente. Um trabalhador em segundo plano
+(utils/email_worker.py) reserva os pendentes, envia e registra o
+resultado.
+
+Como a fila é uma tabela, enfileirar pode acontecer na mesma transação
+do dado que originou o email (ex.: a notificação de dor): ou os dois
+são gravados, ou nenhum.
+
+Ciclo de vida de uma mensagem:
+
+    pendente --reservar--> enviando --ok--> enviado
+                              |
+                              +--falha--> pendente (nova tentativa com
+                              |           espera exponencial: base * 2^n)
+                              +--servidor fora/login recusado--> pendente
+                              |           (adiada, sem gastar tentativa)
+                              +--falha definitiva ou tentativas
+                                 esgotadas--> morto (dead letter)
+
+Só falhas da mensagem gastam tentativas: com o servidor SMTP fora do ar
+ou a senha errada, os emails são adiados (adiar) até o problema ser
+resolvido, por mais que demore.
+
+Mensagens "enviando" há mais de OUTBOX_RESERVA_EXPIRA segundos (o
+processo morreu no meio do envio) voltam para "pendente"; isso conta
+como uma tentativa, para que um email que derruba o processo acabe
+em "morto" em vez de voltar para sempre.
+
+Configuração: OUTBOX_MAX_TENTATIVAS (padrão 6), OUTBOX_BACKOFF_BASE
+(segundos, padrão 30), OUTBOX_BACKOFF_MAX (padrão 3600),
+OUTBOX_RESERVA_EXPIRA (padrão 600).
+"""
+
+import logging
+import os
+import random
+from typing import List, Optional, Tuple
+
+from .connection import obter_conexao
+from .escritor import executar_escrita
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_CONFIG = {
+    'max_tentativas': int(os.getenv("OUTBOX_MAX_TENTATIVAS", "6")),
+    'backoff_base': float(os.getenv("OUTBOX_BACKOFF_BASE", "30")),
+    'backoff_max': float(os.getenv("OUTBOX_BACKOFF_MAX", "3600")),
+    'reserva_expira': int(os.getenv("OUTBOX_RESERVA_EXPIRA", "600")),
+}
+
+PENDENTE = "pendente"
+ENVIANDO = "enviando"
+ENVIADO = "enviado"
+MORTO = "morto"
+
+DDL_OUTBOX: Tuple[str, ...] = (
+    """
+    CREATE TABLE IF NOT EXISTS email_outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        destinatario TEXT NOT NULL,
+        assunto TEXT NOT NULL,
+        corpo_texto TEXT,
+        corpo_html TEXT,
+        tipo TEXT,
+        status TEXT NOT NULL DEFAULT 'pendente',
+        tentativas INTEGER NOT NULL DEFAULT 0,
+        proxima_tentativa TEXT DEFAULT CURRENT_TIMESTAMP,
+        reservado_em TEXT,
+        ultimo_erro TEXT,
+        data_criacao TEXT DEFAULT CURRENT_TIMESTAMP,
+        data_envio TEXT
+    )
+    """,
+)
+
+_COLUNAS = """
+    id, destinatario, assunto, corpo_texto, corpo_html, tipo, tentativas
+"""
+
+
+# ---------------------------------------------------------
+# 📮 Enfileirar
+# ---------------------------------------------------------
+def _inserir(conn, destinatario, assunto, corpo_texto, corpo_html, tipo) -> int:
+    return conn.execute("""
+        INSERT INTO email_outbox (destinatario, assunto, corpo_texto, corpo_html, tipo)
+        VALUES (?, ?, ?, ?, ?)
+    """, (destinatario, assunto, corpo_texto, corpo_html, tipo)).lastrowid
+
+
+def enfileirar_email(destinatario: str, assunto: str, corpo_texto: Optional[str] = None,
+                     corpo_html: Optional[str] = None, tipo: Optional[str] = None,
+                     conn=None) -> int:
+    """
+    Grava o email na outbox e retorna o id.
+
+    Com `conn` (a conexão de uma escrita em andamento, ver
+    executar_escrita), o email entra na mesma transação do chamador.
+    """
+    if not corpo_texto and not corpo_html:
+        raise ValueError("Email sem corpo")
+    if conn is not None:
+        return _inserir(conn, destinatario, assunto, corpo_texto, corpo_html, tipo)
+    return executar_escrita(_inserir, destinatario, assunto, corpo_texto, corpo_html, tipo)
+
+
+# ---------------------------------------------------------
+# 📤 Reservar e registrar resultado (usado pelo trabalhador)
+# ---------------------------------------------------------
+def _reservar(conn, limite: int, reserva_expira: int) -> List[dict]:
+    # Reservas abandonadas (processo morreu no meio do envio) voltam à
+    # fila, gastando uma tentativa
+    conn.execute("""
+        UPDATE email_outbox
+        SET status = CASE WHEN tentativas + 1 >= ? THEN 'morto' ELSE 'pendente' END,
+            tentativas = tentativas + 1, reservado_em = NULL,
+            ultimo_erro = 'Reserva expirada (envio interrompido)'
+        WHERE status = 'enviando'
+          AND reservado_em < datetime('now', '-' || ? || ' seconds')
+    """, (OUTBOX_CONFIG['max_tentativas'], reserva_expira))
+
+    rows = conn.execute(f"""
+        UPDATE email_outbox
+        SET status = 'enviando', reservado_em = CURRENT_TIMESTAMP
+        WHERE id IN (
+            SELECT id FROM email_outbox
+            WHERE status = 'pendente' AND proxima_tentativa <= CURRENT_TIMESTAMP
+            ORDER BY proxima_tentativa, id
+            LIMIT ?
+        )
+        RETURNING {_COLUNAS}
+    """, (limite,)).fetchall()
+    return sorted((dict(row) for row in rows), key=lambda r: r["id"])
+
+
+def reservar_lote(limite: int = 20) -> List[dict]:
+    """Marca até `limite` emails vencidos como "enviando" e os retorna."""
+    return executar_escrita(_reservar, limite, OUTBOX_CONFIG['reserva_expira'])
+
+
+def marcar_enviados(ids: List[int]):
+    if not ids:
+        return
+    marcadores = ", ".join("?" * len(ids))
+    executar_escrita(lambda conn: conn.execute(f"""
+        UPDATE email_outbox
+        SET status = 'enviado', data_envio = CURRENT_TIMESTAMP,
+            reservado_em = NULL, ultimo_erro = NULL
+        WHERE id IN ({marcadores})
+    """, ids))
+
+
+def espera_backoff(tentativas: int) -> float:
+    """Segundos até a próxima tentativa: base * 2^(n-1), com limite e ±20% de jitter."""
+    espera = min(
+        OUTBOX_CONFIG['backoff_base'] * (2 ** max(tentativas - 1, 0)),
+        OUTBOX_CONFIG['backoff_max'],
+    )
+    return espera * random.uniform(0.8, 1.2)
+
+
+def _registrar_falha(conn, email_id: int, erro: str, definitiva: bool) -> str:
+    tentativas = conn.execute(
+        "SELECT tentativas FROM email_outbox WHERE id = ?", (email_id,)
+    ).fetchone()[0] + 1
+
+    if definitiva or tentativas >= OUTBOX_CONFIG['max_tentativas']:
+        conn.execute("""
+            UPDATE email_outbox
+            SET status = 'morto', tentativas = ?, ultimo_erro = ?, reservado_em = NULL
+            WHERE id = ?
+        """, (tentativas, erro, email_id))
+        return MORTO
+
+    conn.execute("""
+        UPDATE email_outbox
+        SET status = 'pendente', tentativas = ?, ultimo_erro = ?, reservado_em = NULL,
+            proxima_tentativa = datetime('now', '+' || ? || ' seconds')
+        WHERE id = ?
+    """, (tentativas, erro, int(espera_backoff(tentativas)), email_id))
+    return PENDENTE
+
+
+def registrar_falha(email_id: int, erro: str, definitiva: bool = False) -> str:
+    """
+    Conta a tentativa e reagenda com espera exponencial, ou manda para
+    "morto" se a falha for definitiva ou as tentativas acabaram.
+    Retorna o novo status.
+    """
+    status = executar_escrita(_registrar_falha, email_id, erro[:500], definitiva)
+    if status == MORTO:
+        logger.error(f"Email {email_id} movido para a dead letter: {erro}")
+    return status
+
+
+def adiar(ids: List[int], erro: str, espera: float):
+    """
+    Devolve os emails para a fila daqui a `espera` segundos sem contar
+    tentativa (a falha foi do servidor SMTP, não das mensagens).
+    """
+    if not ids:
+        return
+    marcadores = ", ".join("?" * len(ids))
+    executar_escrita(lambda conn: conn.execute(f"""
+        UPDATE email_outbox
+        SET status = 'pendente', ultimo_erro = ?, reservado_em = NULL,
+            proxima_tentativa = datetime('now', '+' || ? || ' seconds')
+        WHERE id IN ({marcadores})
+    """, (erro[:500], int(espera), *ids)))
+
+
+# ---------------------------------------------------------
+# 🔧 Operação
+# ---------------------------------------------------------
+def reenviar_mortos(ids: Optional[List[int]] = None) -> int:
+    """Devolve emails "morto" para a fila (todos, ou só os `ids`)."""
+    filtro, params = "", []
+    if ids:
+        filtro = f"AND id IN ({', '.join('?' * len(ids))})"
+        params = list(ids)
+    return executar_escrita(lambda conn: conn.execute(f"""
+        UPDATE email_outbox
+        SET status = 'pendente', tentativas = 0, proxima_tentativa = CURRENT_TIMESTAMP
+        WHERE status = 'morto' {filtro}
+    """, params).rowcount)
+
+
+def metricas_outbox() -> dict:
+    """Quantidade de emails por status e idade do pendente mais antigo."""
+    try:
+        with obter_conexao() as conn:
+            por_status = dict(conn.execute("""
+                SELECT status, COUNT(*) FROM email_outbox GROUP BY status
+            """).fetchall())
+            mais_antigo = conn.execute("""
+                SELECT MIN(data_criacao) FROM email_outbox WHERE status = 'pendente'
+            """).fetchone()[0]
+        return {
+            **{s: por_status.get(s, 0) for s in (PENDENTE, ENVIANDO, ENVIADO, MORTO)},
+            'pendente_mais_antigo': mais_antigo,
+        }
+
+    except Exception as e:
+        logger.error(f"[ERRO] metricas_outbox: {e}")
+        return {}
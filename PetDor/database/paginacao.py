@@ -0,0 +1,347 @@
+"""
+Listagens paginadas por chave (keyset) do PETDOR
+
+Em vez de OFFSET (que relê todas as linhas anteriores) ou de um
+fetchall() da tabela inteira, cada página continua a partir da chave de
+ordenação do último item da página anterior:
+
+    pagina = listar_usuarios_pagina(limite=50)
+    ...
+    pagina = listar_usuarios_pagina(limite=50, apos=pagina.proximo_cursor)
+
+A ordenação sempre termina no `id`, então é estável mesmo com valores
+repetidos na primeira coluna. Linhas com a primeira coluna NULL (que a
+comparação `(k, id) > (?, ?)` nunca alcançaria) são lidas num trecho à
+parte, onde o SQLite as ordena: no começo em ordem crescente, no fim em
+decrescente; o cursor delas tem None na primeira posição. O custo de cada página não depende de
+quantas já foram lidas, e os índices de database/indices.py atendem a
+ordenação sem ordenar a tabela.
+
+Para processar tudo sem carregar tudo, use os iteradores `iterar_*`:
+eles buscam uma página por vez e não seguram conexão entre páginas.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Iterator, List, Optional, Sequence, Tuple
+
+from .connection import obter_conexao
+
+logger = logging.getLogger(__name__)
+
+# Cursor = valores das colunas de ordenação do último item entregue
+Cursor = Tuple[Any, ...]
+Filtro = Tuple[str, Any]     # (condição SQL com um "?", valor)
+
+TAMANHO_PAGINA_PADRAO = 50
+TAMANHO_LOTE_ITERACAO = 500
+
+
+@dataclass(frozen=True)
+class Pagina:
+    itens: List[dict]
+    proximo_cursor: Optional[Cursor] = None
+
+    @property
+    def tem_proxima(self) -> bool:
+        return self.proximo_cursor is not None
+
+
+@dataclass(frozen=True)
+class Listagem:
+    """Consulta base + chave de ordenação usada na paginação."""
+    nome: str
+    sql: str                              # SELECT ... FROM ... (sem WHERE/ORDER BY)
+    ordem: Tuple[Tuple[str, str], ...]    # (expressão SQL, chave no resultado)
+    descendente: bool = True
+
+    def _montar(self, filtros: Sequence[Filtro], apos: Optional[Cursor],
+                nulos: Optional[bool] = None):
+        """
+        SQL de um trecho. `nulos`: None = sem trecho (ordem só pelo id),
+        True/False = só as linhas com a primeira coluna NULL/não NULL.
+        """
+        condicoes: List[str] = []
+        params: List[Any] = []
+        for condicao, valor in filtros:
+            condicoes.append(condicao)
+            params.append(valor)
+
+        expressoes = [expr for expr, _ in self.ordem]
+        if nulos is not None:
+            condicoes.append(f"{expressoes[0]} IS {'' if nulos else 'NOT '}NULL")
+        if apos is not None:
+            if len(apos) != len(expressoes):
+                raise ValueError(f"Cursor inválido para a listagem '{self.nome}'")
+            # No trecho NULL a primeira coluna é constante: compara o resto
+            chave, valores = (expressoes[1:], apos[1:]) if nulos else (expressoes, apos)
+            comparador = "<" if self.descendente else ">"
+            marcadores = ", ".join("?" * len(chave))
+            condicoes.append(f"({', '.join(chave)}) {comparador} ({marcadores})")
+            params.extend(valores)
+
+        direcao = "DESC" if self.descendente else "ASC"
+        where = f"WHERE {' AND '.join(condicoes)}" if condicoes else ""
+        ordem = ", ".join(f"{expr} {direcao}" for expr in expressoes)
+        return f"{self.sql} {where} ORDER BY {ordem} LIMIT ?", params
+
+    def _trechos(self, apos: Optional[Cursor]) -> List[Optional[bool]]:
+        """Trechos (ver _montar) na ordem de leitura, a partir do cursor."""
+        if len(self.ordem) < 2:
+            return [None]
+        # SQLite ordena NULL antes de qualquer valor
+        trechos = [False, True] if self.descendente else [True, False]
+        if apos is not None:
+            trechos = trechos[trechos.index(apos[0] is None):]
+        return trechos
+
+    def pagina(self, limite: int = TAMANHO_PAGINA_PADRAO, apos: Optional[Cursor] = None,
+               filtros: Sequence[Filtro] = ()) -> Pagina:
+        if limite < 1:
+            raise ValueError("O tamanho da página precisa ser positivo")
+
+        rows = []
+        with obter_conexao() as conn:
+            for i, nulos in enumerate(self._trechos(apos)):
+                # O cursor só vale no trecho onde a página anterior parou
+                sql, params = self._montar(filtros, apos if i == 0 else None, nulos)
+                # Um item a mais indica se existe próxima página
+                rows += conn.execute(sql, [*params, limite + 1 - len(rows)]).fetchall()
+                if len(rows) > limite:
+                    break
+
+        itens = [dict(row) for row in rows[:limite]]
+        proximo = None
+        if len(rows) > limite:
+            ultimo = itens[-1]
+            proximo = tuple(ultimo[chave] for _, chave in self.ordem)
+        return Pagina(itens, proximo)
+
+    def iterar(self, filtros: Sequence[Filtro] = (),
+               tamanho_lote: int = TAMANHO_LOTE_ITERACAO) -> Iterator[dict]:
+        apos = None
+        while True:
+            pagina = self.pagina(tamanho_lote, apos, filtros)
+            yield from pagina.itens
+            if not pagina.tem_proxima:
+                return
+            apos = pagina.proximo_cursor
+
+
+# ---------------------------------------------------------
+# 📋 Listagens de cada entidade
+# ---------------------------------------------------------
+USUARIOS = Listagem(
+    "usuarios",
+    """
+    SELECT id, nome, email, data_criacao, ativo, tipo_usuario
+    FROM usuarios
+    """,
+    ordem=(("data_criacao", "data_criacao"), ("id", "id")),
+)
+
+PETS = Listagem(
+    "pets",
+    """
+    SELECT id, tutor_id, nome, especie, raca, peso, idade, sexo, data_nascimento, data_cadastro
+    FROM pets
+    """,
+    ordem=(("nome", "nome"), ("id", "id")),
+    descendente=False,
+)
+
+_SQL_AVALIACOES = """
+    SELECT a.id, a.pet_id, a.usuario_id, a.percentual_dor, a.observacoes,
+           a.data_avaliacao, p.nome AS pet_nome, p.especie AS pet_especie
+    FROM avaliacoes a
+    JOIN pets p ON p.id = a.pet_id
+"""
+
+AVALIACOES = Listagem(
+    "avaliacoes",
+    _SQL_AVALIACOES,
+    ordem=(("a.data_avaliacao", "data_avaliacao"), ("a.id", "id")),
+)
+
+# Histórico de um pet em ordem cronológica (relatório longitudinal)
+AVALIACOES_CRONOLOGICAS = Listagem(
+    "avaliacoes_cronologicas",
+    _SQL_AVALIACOES,
+    ordem=(("a.data_avaliacao", "data_avaliacao"), ("a.id", "id")),
+    descendente=False,
+)
+
+# Tabela de usuários do admin: usuário + totais do rollup de avaliações
+_SQL_USUARIOS_ADMIN = """
+    SELECT u.id, u.nome, u.email, u.data_criacao, u.ativo, u.tipo_usuario,
+           COALESCE(e.total, 0) AS total_avaliacoes,
+           CASE WHEN e.total > 0 THEN e.soma_percentual / e.total END AS media_dor
+    FROM usuarios u
+    LEFT JOIN estat_avaliacoes_usuario e ON e.usuario_id = u.id
+"""
+
+USUARIOS_ADMIN_POR_DATA = Listagem(
+    "usuarios_admin_data",
+    _SQL_USUARIOS_ADMIN,
+    ordem=(("u.data_criacao", "data_criacao"), ("u.id", "id")),
+)
+
+USUARIOS_ADMIN_POR_NOME = Listagem(
+    "usuarios_admin_nome",
+    _SQL_USUARIOS_ADMIN,
+    ordem=(("u.nome", "nome"), ("u.id", "id")),
+    descendente=False,
+)
+
+# Ordem por avaliações em dois trechos: quem tem avaliações, pelo índice
+# de estat_avaliacoes_usuario(total), e depois quem não tem (fora do rollup)
+USUARIOS_ADMIN_COM_AVALIACOES = Listagem(
+    "usuarios_admin_com_avaliacoes",
+    _SQL_USUARIOS_ADMIN,
+    ordem=(("e.total", "total_avaliacoes"), ("e.usuario_id", "id")),
+)
+
+USUARIOS_ADMIN_SEM_AVALIACOES = Listagem(
+    "usuarios_admin_sem_avaliacoes",
+    _SQL_USUARIOS_ADMIN,
+    ordem=(("u.id", "id"),),
+)
+
+ORDENS_USUARIOS_ADMIN = ("data_criacao", "nome", "avaliacoes")
+
+NOTIFICACOES = Listagem(
+    "notificacoes",
+    """
+    SELECT n.id, n.pet_id, n.usuario_id_destino, n.tipo_notificacao,
+           n.nivel_prioridade, n.mensagem, n.lida, n.data_criacao, n.data_lida,
+           p.nome AS pet_nome
+    FROM notificacoes n
+    LEFT JOIN pets p ON p.id = n.pet_id
+    """,
+    ordem=(("n.data_criacao", "data_criacao"), ("n.id", "id")),
+)
+
+
+def _filtros_usuarios(ativo: Optional[bool]) -> List[Filtro]:
+    return [] if ativo is None else [("ativo = ?", 1 if ativo else 0)]
+
+
+def _filtros_usuarios_admin(ativo: Optional[bool], min_avaliacoes: int) -> List[Filtro]:
+    filtros = [] if ativo is None else [("u.ativo = ?", 1 if ativo else 0)]
+    if min_avaliacoes > 0:
+        filtros.append(("e.total >= ?", min_avaliacoes))
+    return filtros
+
+
+def _filtros_pets(tutor_id: Optional[int]) -> List[Filtro]:
+    return [] if tutor_id is None else [("tutor_id = ?", tutor_id)]
+
+
+def _filtros_avaliacoes(usuario_id: Optional[int], pet_id: Optional[int]) -> List[Filtro]:
+    filtros = []
+    if usuario_id is not None:
+        filtros.append(("a.usuario_id = ?", usuario_id))
+    if pet_id is not None:
+        filtros.append(("a.pet_id = ?", pet_id))
+    return filtros
+
+
+def _filtros_notificacoes(usuario_id: int, apenas_nao_lidas: bool) -> List[Filtro]:
+    filtros = [("n.usuario_id_destino = ?", usuario_id)]
+    if apenas_nao_lidas:
+        filtros.append(("n.lida = ?", 0))
+    return filtros
+
+
+# 👤 Usuários (mais recentes primeiro)
+def listar_usuarios_pagina(limite: int = TAMANHO_PAGINA_PADRAO, apos: Optional[Cursor] = None,
+                           ativo: Optional[bool] = None) -> Pagina:
+    return USUARIOS.pagina(limite, apos, _filtros_usuarios(ativo))
+
+
+def iterar_usuarios(ativo: Optional[bool] = None,
+                    tamanho_lote: int = TAMANHO_LOTE_ITERACAO) -> Iterator[dict]:
+    return USUARIOS.iterar(_filtros_usuarios(ativo), tamanho_lote)
+
+
+# 🔐 Tabela de usuários do admin (filtro e ordem no SQL, uma página por vez)
+def listar_usuarios_admin_pagina(limite: int = TAMANHO_PAGINA_PADRAO, apos: Optional[Cursor] = None,
+                                 ativo: Optional[bool] = None, min_avaliacoes: int = 0,
+                                 ordem: str = "data_criacao") -> Pagina:
+    """
+    Usuários com total e média de avaliações (do rollup), filtrados por
+    status e mínimo de avaliações e ordenados por `ordem`:
+    "data_criacao" (recentes primeiro), "nome" ou "avaliacoes" (mais primeiro).
+
+    O cursor só vale para a mesma combinação de filtros e ordem.
+    """
+    filtros = _filtros_usuarios_admin(ativo, min_avaliacoes)
+    if ordem == "data_criacao":
+        return USUARIOS_ADMIN_POR_DATA.pagina(limite, apos, filtros)
+    if ordem == "nome":
+        return USUARIOS_ADMIN_POR_NOME.pagina(limite, apos, filtros)
+    if ordem != "avaliacoes":
+        raise ValueError(f"Ordem inválida: {ordem!r} (use {ORDENS_USUARIOS_ADMIN})")
+
+    # Cursor (total, id); total 0 = já no trecho de quem não tem avaliações
+    itens: List[dict] = []
+    if apos is None or apos[0] > 0:
+        com = USUARIOS_ADMIN_COM_AVALIACOES.pagina(
+            limite, apos, [*filtros, ("e.total >= ?", max(min_avaliacoes, 1))]
+        )
+        if com.tem_proxima or min_avaliacoes > 0:
+            return com
+        itens, apos = com.itens, None
+
+    sem_filtros = [*_filtros_usuarios_admin(ativo, 0), ("COALESCE(e.total, 0) < ?", 1)]
+    sem_apos = (apos[1],) if apos is not None and apos[1] is not None else None
+    restante = limite - len(itens)
+    if restante == 0:
+        # Página cheia no fim do primeiro trecho: há próxima se o segundo tiver alguém
+        seguinte = USUARIOS_ADMIN_SEM_AVALIACOES.pagina(1, None, sem_filtros)
+        return Pagina(itens, (0, None) if seguinte.itens else None)
+
+    sem = USUARIOS_ADMIN_SEM_AVALIACOES.pagina(restante, sem_apos, sem_filtros)
+    proximo = (0, sem.proximo_cursor[0]) if sem.tem_proxima else None
+    return Pagina(itens + sem.itens, proximo)
+
+
+# 🐾 Pets (por nome)
+def listar_pets_pagina(limite: int = TAMANHO_PAGINA_PADRAO, apos: Optional[Cursor] = None,
+                       tutor_id: Optional[int] = None) -> Pagina:
+    return PETS.pagina(limite, apos, _filtros_pets(tutor_id))
+
+
+def iterar_pets(tutor_id: Optional[int] = None,
+                tamanho_lote: int = TAMANHO_LOTE_ITERACAO) -> Iterator[dict]:
+    return PETS.iterar(_filtros_pets(tutor_id), tamanho_lote)
+
+
+# 📋 Avaliações (mais recentes primeiro)
+def listar_avaliacoes_pagina(limite: int = TAMANHO_PAGINA_PADRAO, apos: Optional[Cursor] = None,
+                             usuario_id: Optional[int] = None,
+                             pet_id: Optional[int] = None) -> Pagina:
+    return AVALIACOES.pagina(limite, apos, _filtros_avaliacoes(usuario_id, pet_id))
+
+
+def iterar_avaliacoes(usuario_id: Optional[int] = None, pet_id: Optional[int] = None,
+                      tamanho_lote: int = TAMANHO_LOTE_ITERACAO) -> Iterator[dict]:
+    return AVALIACOES.iterar(_filtros_avaliacoes(usuario_id, pet_id), tamanho_lote)
+
+
+def iterar_avaliacoes_pet(pet_id: int,
+                          tamanho_lote: int = TAMANHO_LOTE_ITERACAO) -> Iterator[dict]:
+    """Avaliações do pet da mais antiga para a mais recente."""
+    return AVALIACOES_CRONOLOGICAS.iterar(_filtros_avaliacoes(None, pet_id), tamanho_lote)
+
+
+# 🔔 Notificações de um usuário (mais recentes primeiro)
+def listar_notificacoes_pagina(usuario_id: int, limite: int = TAMANHO_PAGINA_PADRAO,
+                               apos: Optional[Cursor] = None,
+                               apenas_nao_lidas: bool = False) -> Pagina:
+    return NOTIFICACOES.pagina(limite, apos, _filtros_notificacoes(usuario_id, apenas_nao_lidas))
+
+
+def iterar_notificacoes(usuario_id: int, apenas_nao_lidas: bool = False,
+                        tamanho_lote: int = TAMANHO_LOTE_ITERACAO) -> Iterator[dict]:
+    return NOTIFICACOES.iterar(_filtros_notificacoes(usuario_id, apenas_nao_lidas), tamanho_lote)
@@ -5,8 +5,17 @@ Contém perguntas específicas para avaliação de dor por espécie:
 - base: classes base para perguntas e configurações
 - Cão: perguntas para cães
 - Gato: perguntas para gatos
+
+Os submódulos só são importados quando usados; para encontrar a
+configuração de uma espécie, use especies.loader.buscar_especie().
 """
 
-from . import base, cao, gato
+import importlib
 
 __all__ = ["base", "cao", "gato"]
+
+
+def __getattr__(nome):
+    if nome in __all__:
+        return importlib.import_module(f"{__name__}.{nome}")
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
@@ -3,9 +3,39 @@ Módulo base para configuração de espécies e perguntas de avaliação de dor.
 Define as classes EspecieConfig e Pergunta.
 """
 
-from typing import List, Dict, Any, Optional
+import threading
+from types import MappingProxyType
+from typing import List, Dict, Any, Optional, Sequence, Mapping, Tuple
 from dataclasses import dataclass, field
 
+import numpy as np
+
+# Tabela usada para gerar o ID padrão de uma pergunta a partir do texto
+_TABELA_ID = str.maketrans({
+    " ": "_", "?": None,
+    "á": "a", "é": "e", "í": "i", "ó": "o", "ú": "u",
+    "ç": "c", "ã": "a", "õ": "o",
+})
+
+
+# Geração das perguntas: muda sempre que o id, a inversão ou o peso de
+# qualquer Pergunta (ou as perguntas/escala de uma espécie) é alterado
+# depois de criado, invalidando os pontuadores compilados
+_geracao_perguntas = 0
+_lock_geracao = threading.Lock()
+
+
+def _avancar_geracao():
+    global _geracao_perguntas
+    with _lock_geracao:
+        _geracao_perguntas += 1
+
+
+def _texto_opcao(rotulo: str) -> str:
+    """Remove o prefixo numérico "X - " de um rótulo da escala."""
+    return rotulo.split(' - ', 1)[-1]
+
+
 @dataclass
 class Pergunta:
     """Representa uma pergunta de avaliação de dor."""
@@ -13,11 +43,167 @@ class Pergunta:
     id: Optional[str] = None # ID único para a pergunta
     invertida: bool = False # Se True, uma resposta alta indica MENOS dor (ex: "Meu cão foi brincalhão")
     peso: float = 1.0       # Peso da pergunta no cálculo da pontuação total
+    # Construção concluída: só alterações depois disso mudam a geração
+    _pronta: bool = field(default=False, init=False, repr=False, compare=False)
 
     def __post_init__(self):
         if self.id is None:
             # Gera um ID padrão a partir do texto, se não for fornecido
-            self.id = self.texto.lower().replace(" ", "_").replace("?", "").replace("á", "a").replace("é", "e").replace("í", "i").replace("ó", "o").replace("ú", "u").replace("ç", "c").replace("ã", "a").replace("õ", "o")
+            self.id = self.texto.lower().translate(_TABELA_ID)
+        self._pronta = True
+
+    def __setattr__(self, nome, valor):
+        # Grava antes de avançar a geração: quem compilar com a geração
+        # nova já enxerga o valor novo
+        object.__setattr__(self, nome, valor)
+        if nome in ("id", "invertida", "peso") and self._pronta:
+            _avancar_geracao()
+
+
+@dataclass(frozen=True)
+class PontuadorCompilado:
+    """
+    Forma "compilada" e imutável de uma EspecieConfig para pontuação.
+
+    Tudo o que depende só da configuração é calculado uma vez: o valor
+    de cada rótulo de resposta, a posição de cada pergunta, os vetores
+    de peso e inversão e a pontuação máxima. Obtenha sempre via
+    `EspecieConfig.compilar()`.
+    """
+    opcoes: Tuple[str, ...]
+    ids: Tuple[str, ...]
+    valor_por_rotulo: Mapping[str, int]    # rótulo completo ou texto limpo -> valor
+    indice_por_rotulo: Mapping[str, int]   # rótulo exato -> posição em opcoes
+    indice_pergunta: Mapping[str, int]     # pergunta_id -> coluna
+    pesos: np.ndarray
+    invertidas: np.ndarray
+    max_valor: int
+    pontuacao_maxima: float                # com todas as perguntas respondidas
+    _perguntas: Tuple[Tuple[str, float, bool, float], ...] = field(repr=False)
+
+    @classmethod
+    def de_config(cls, config: "EspecieConfig") -> "PontuadorCompilado":
+        opcoes = tuple(config.opcoes_escala)
+        max_valor = len(opcoes) - 1
+
+        # Texto limpo -> primeira posição (mesma regra da antiga busca linear)
+        indice_por_texto: Dict[str, int] = {}
+        indice_por_rotulo: Dict[str, int] = {}
+        for i, rotulo in enumerate(opcoes):
+            indice_por_texto.setdefault(_texto_opcao(rotulo), i)
+            indice_por_rotulo.setdefault(rotulo, i)
+
+        valor_por_rotulo = {
+            chave: indice_por_texto.get(_texto_opcao(chave), 0)
+            for chave in (*opcoes, *indice_por_texto)
+        }
+
+        # (id, peso, invertida, pontuação máxima da pergunta)
+        perguntas = tuple(
+            (p.id, p.peso, bool(p.invertida), max_valor * p.peso)
+            for p in config.perguntas
+        )
+        pontuacao_maxima = 0.0
+        for *_, maximo in perguntas:
+            pontuacao_maxima += maximo
+
+        pesos = np.array([p[1] for p in perguntas], dtype=np.float64)
+        invertidas = np.array([p[2] for p in perguntas], dtype=bool)
+        pesos.flags.writeable = False
+        invertidas.flags.writeable = False
+
+        ids = tuple(p[0] for p in perguntas)
+        indice_pergunta: Dict[str, int] = {}
+        for coluna, pergunta_id in enumerate(ids):
+            indice_pergunta.setdefault(pergunta_id, coluna)
+
+        return cls(
+            opcoes=opcoes,
+            ids=ids,
+            valor_por_rotulo=MappingProxyType(valor_por_rotulo),
+            indice_por_rotulo=MappingProxyType(indice_por_rotulo),
+            indice_pergunta=MappingProxyType(indice_pergunta),
+            pesos=pesos,
+            invertidas=invertidas,
+            max_valor=max_valor,
+            pontuacao_maxima=pontuacao_maxima,
+            _perguntas=perguntas,
+        )
+
+    def valor(self, resposta_texto: str) -> int:
+        """Valor numérico de uma resposta (0 se não for reconhecida)."""
+        valor = self.valor_por_rotulo.get(resposta_texto)
+        if valor is None:
+            # Rótulo fora da escala, ex.: "9 - Frequentemente"
+            valor = self.valor_por_rotulo.get(_texto_opcao(resposta_texto), 0)
+        return valor
+
+    def indice_opcao(self, rotulo: str, padrao: int = 0) -> int:
+        """Posição de um rótulo exato na escala (ex.: índice de um st.radio)."""
+        return self.indice_por_rotulo.get(rotulo, padrao)
+
+    def calcular_percentual(self, respostas: Dict[str, str]) -> int:
+        """Percentual de dor de uma avaliação {pergunta_id: resposta_texto}."""
+        pontuacao_obtida = 0.0
+        pontuacao_total_possivel = 0.0
+        max_valor = self.max_valor
+
+        for pergunta_id, peso, invertida, maximo in self._perguntas:
+            resposta_texto = respostas.get(pergunta_id)
+            if resposta_texto is None:
+                continue
+
+            valor = self.valor(resposta_texto)
+
+            # Aplica a lógica de inversão
+            if invertida:
+                pontuacao_obtida += (max_valor - valor) * peso
+            else:
+                pontuacao_obtida += valor * peso
+            pontuacao_total_possivel += maximo
+
+        if pontuacao_total_possivel == 0:
+            return 0
+
+        percentual = (pontuacao_obtida / pontuacao_total_possivel) * 100
+        return int(round(percentual))
+
+    def calcular_percentuais_lote(self, lista_respostas: Sequence[Dict[str, str]]) -> np.ndarray:
+        """Versão vetorizada de calcular_percentual (mesmo resultado)."""
+        n = len(lista_respostas)
+        if n == 0 or not self.ids:
+            return np.zeros(n, dtype=np.int64)
+
+        # Cada texto de resposta distinto só é convertido uma vez; -1 = sem resposta
+        valor_por_resposta: Dict[Optional[str], int] = {None: -1}
+        valor_por_resposta.update(self.valor_por_rotulo)
+        ids = self.ids
+
+        # Linhas montadas em listas e convertidas de uma vez: atribuir
+        # célula a célula num ndarray custa mais que o próprio cálculo
+        linhas = []
+        for respostas in lista_respostas:
+            obter = respostas.get
+            linha = []
+            for pergunta_id in ids:
+                resposta_texto = obter(pergunta_id)
+                valor = valor_por_resposta.get(resposta_texto)
+                if valor is None:
+                    valor = valor_por_resposta[resposta_texto] = self.valor(resposta_texto)
+                linha.append(valor)
+            linhas.append(linha)
+        valores = np.array(linhas, dtype=np.int16)
+
+        respondidas = valores >= 0
+        ajustados = np.where(self.invertidas, self.max_valor - valores, valores) * self.pesos
+        pontuacao_obtida = np.where(respondidas, ajustados, 0.0).sum(axis=1)
+        pontuacao_total_possivel = (respondidas * (self.max_valor * self.pesos)).sum(axis=1)
+
+        percentual = np.zeros(n, dtype=np.float64)
+        np.divide(pontuacao_obtida, pontuacao_total_possivel, out=percentual,
+                  where=pontuacao_total_possivel > 0)
+        # np.rint arredonda metades para o par, igual ao round() do Python
+        return np.rint(percentual * 100).astype(np.int64)
 
 
 @dataclass
@@ -25,22 +211,49 @@ class EspecieConfig:
     """Configuração completa para uma espécie, incluindo perguntas e escala."""
     nome: str
     descricao: str
-    perguntas: List[Pergunta] = field(default_factory=list)
+    # Perguntas e escala são guardadas como tuplas (ver __setattr__)
+    perguntas: Sequence[Pergunta] = field(default_factory=tuple)
     # A escala é definida pelas opções de texto. O valor numérico será o índice.
-    opcoes_escala: List[str] = field(default_factory=lambda: ["0 - Nunca", "1 - Raramente", "2 - Às vezes", "3 - Frequentemente", "4 - Sempre"]) 
+    opcoes_escala: Sequence[str] = field(default_factory=lambda: ("0 - Nunca", "1 - Raramente", "2 - Às vezes", "3 - Frequentemente", "4 - Sempre"))
+
+    # (pontuador compilado, geração das perguntas lida antes de compilar)
+    _compilado: Optional[Tuple[PontuadorCompilado, int]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _pronta: bool = field(default=False, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self._pronta = True
+
+    def __setattr__(self, nome, valor):
+        alterou = nome in ("perguntas", "opcoes_escala")
+        if alterou:
+            # Tupla: a lista não pode ser alterada por fora sem passar por aqui
+            valor = tuple(valor)
+        object.__setattr__(self, nome, valor)
+        if alterou and self._pronta:
+            _avancar_geracao()
+
+    def compilar(self) -> PontuadorCompilado:
+        """
+        Retorna o pontuador compilado desta configuração.
+
+        O resultado fica em cache. Atribuir novas perguntas ou escala, ou
+        alterar id, peso ou inversão de uma Pergunta, descarta o cache; a
+        checagem aqui é só uma comparação de inteiros.
+        """
+        # Geração lida antes de compilar: se algo mudar durante a
+        # compilação, o resultado já nasce desatualizado e é refeito
+        geracao = _geracao_perguntas
+        compilado = self._compilado
+        if compilado is None or compilado[1] != geracao:
+            compilado = (PontuadorCompilado.de_config(self), geracao)
+            self._compilado = compilado
+        return compilado[0]
 
     def get_valor_numerico_resposta(self, resposta_texto: str) -> int:
         """Mapeia uma resposta em texto para seu valor numérico na escala (índice)."""
-        try:
-            # Remove o prefixo numérico "X - " se existir, para encontrar o índice correto
-            clean_resposta_texto = resposta_texto.split(' - ', 1)[-1]
-            # Find the index of the clean text in the options
-            for i, option in enumerate(self.opcoes_escala):
-                if option.split(' - ', 1)[-1] == clean_resposta_texto:
-                    return i
-            return 0 # Fallback
-        except ValueError:
-            return 0 # Retorna 0 se a resposta não for encontrada (segurança)
+        return self.compilar().valor(resposta_texto)
 
     def get_pontuacao_maxima_por_pergunta(self) -> int:
         """Retorna a pontuação máxima que uma única pergunta pode atingir (N-1)."""
@@ -51,31 +264,15 @@ class EspecieConfig:
         Calcula o percentual de dor baseado nas respostas das perguntas,
         considerando a configuração da espécie e perguntas invertidas.
         """
-        pontuacao_obtida = 0.0
-        pontuacao_total_possivel = 0.0
+        return self.compilar().calcular_percentual(respostas)
 
-        max_valor_escala = self.get_pontuacao_maxima_por_pergunta()
-
-        for pergunta_obj in self.perguntas:
-            pergunta_id = pergunta_obj.id
-            resposta_texto = respostas.get(pergunta_id)
-
-            if resposta_texto is None:
-                continue
-
-            valor_resposta_numerico = self.get_valor_numerico_resposta(resposta_texto)
-
-            # Aplica a lógica de inversão
-            if pergunta_obj.invertida:
-                valor_resposta_ponderado = (max_valor_escala - valor_resposta_numerico) * pergunta_obj.peso
-            else:
-                valor_resposta_ponderado = valor_resposta_numerico * pergunta_obj.peso
-
-            pontuacao_obtida += valor_resposta_ponderado
-            pontuacao_total_possivel += max_valor_escala * pergunta_obj.peso # Sempre soma o máximo possível para cada pergunta
-
-        if pontuacao_total_possivel == 0:
-            return 0
+    def calcular_percentuais_lote(self, lista_respostas: Sequence[Dict[str, str]]) -> np.ndarray:
+        """
+        Versão vetorizada de calcular_percentual_dor para muitas avaliações.
 
-        percentual = (pontuacao_obtida / pontuacao_total_possivel) * 100
-        return int(round(percentual))
+        Recebe uma sequência de dicionários {pergunta_id: resposta_texto}
+        (por exemplo, respostas agrupadas de avaliacao_respostas) e
+        devolve um array de inteiros com o percentual de cada uma, na
+        mesma ordem. O resultado é idêntico ao da versão escalar.
+        """
+        return self.compilar().calcular_percentuais_lote(lista_respostas)
@@ -0,0 +1,56 @@
+"""
+Benchmark do cálculo de percentual de dor: versão escalar x lote (NumPy)
+
+Uso:
+    python -m especies.benchmark [quantidade_de_avaliacoes]
+
+Gera avaliações aleatórias para cada espécie configurada, confere que as
+duas versões dão o mesmo resultado e mostra o tempo de cada uma.
+"""
+import random
+import sys
+import time
+
+from especies.loader import REGISTRO
+
+
+def gerar_respostas(config, quantidade, seed=42):
+    """Respostas aleatórias; ~5% das perguntas ficam sem resposta."""
+    rnd = random.Random(seed)
+    lista = []
+    for _ in range(quantidade):
+        respostas = {}
+        for pergunta in config.perguntas:
+            if rnd.random() < 0.05:
+                continue
+            respostas[pergunta.id] = rnd.choice(config.opcoes_escala)
+        lista.append(respostas)
+    return lista
+
+
+def comparar(config, quantidade):
+    lista = gerar_respostas(config, quantidade)
+
+    inicio = time.perf_counter()
+    escalar = [config.calcular_percentual_dor(r) for r in lista]
+    tempo_escalar = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    lote = config.calcular_percentuais_lote(lista)
+    tempo_lote = time.perf_counter() - inicio
+
+    if list(lote) != escalar:
+        raise AssertionError(f"{config.nome}: resultados divergentes entre escalar e lote")
+
+    print(
+        f"{config.nome:<10} {quantidade:>8} avaliações | "
+        f"escalar {tempo_escalar * 1000:8.1f} ms | "
+        f"lote {tempo_lote * 1000:8.1f} ms | "
+        f"{tempo_escalar / tempo_lote if tempo_lote else float('inf'):5.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    for config in REGISTRO.todas():
+        comparar(config, quantidade)
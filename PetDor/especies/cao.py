@@ -4,6 +4,9 @@ Escala: 0 a 7 (baseada em CBPI e Glasgow Composite Pain Scale)
 """
 from especies.base import EspecieConfig, Pergunta
 
+# Nomes pelos quais a espécie é encontrada no registro (especies/loader.py)
+ALIASES = ("Cão", "Cachorro", "Cães", "Cachorros", "Canino")
+
 CONFIG_CAES = EspecieConfig(
     nome="Cachorro",
     descricao="Avaliação de dor em cães - Escala de 0 (nunca) a 7 (sempre)",
@@ -4,6 +4,9 @@ Escala: 0 a 7 (baseada em Feline Grimace Scale e Glasgow Composite Pain Scale)
 """
 from especies.base import EspecieConfig, Pergunta
 
+# Nomes pelos quais a espécie é encontrada no registro (especies/loader.py)
+ALIASES = ("Gato", "Gatos", "Felino")
+
 CONFIG_GATOS = EspecieConfig(
     nome="Gato",
     descricao="Avaliação de dor em gatos - Escala de 0 (nunca) a 7 (sempre)",
@@ -1,34 +1,142 @@
 """
 Carregador dinâmico de configurações de espécies
 Sistema modular - fácil adicionar novas espécies
+
+Cada módulo deste pacote (exceto base, loader e benchmark) descreve uma
+espécie: um `CONFIG_*` do tipo EspecieConfig e uma tupla `ALIASES` com os
+nomes pelos quais ela pode aparecer (ex.: "Cão" e "Cachorro").
+
+Os módulos são descobertos sem importar nada; cada um só é importado
+quando alguém procura pela espécie. Nomes são normalizados (minúsculas,
+sem acento), então "Cão", "cao" e "CÃO" caem na mesma entrada.
+
+Para adicionar nova espécie, basta:
+1. Criar especies/nova_especie.py com CONFIG_NOVA_ESPECIE e ALIASES
+2. Nada mais: o registro encontra o módulo sozinho
 """
-from typing import Dict, List
-from especies.base import EspecieConfig
-from especies.caes import CONFIG_CAES
-from especies.gatos import CONFIG_GATOS
+import importlib
+import logging
+import pkgutil
+import threading
+import unicodedata
+from typing import Dict, List, Optional
+
+from especies.base import EspecieConfig, PontuadorCompilado
+
+logger = logging.getLogger(__name__)
+
+# Módulos do pacote que não são espécies
+_MODULOS_IGNORADOS = {"base", "loader", "benchmark"}
+
+
+def normalizar_nome(nome: str) -> str:
+    """'Cão ' -> 'cao': minúsculas, sem acentos e sem espaços nas pontas."""
+    decomposto = unicodedata.normalize("NFKD", nome.strip().lower())
+    return "".join(c for c in decomposto if not unicodedata.combining(c))
+
+
+class RegistroEspecies:
+    """Registro preguiçoso: alias normalizado -> EspecieConfig."""
+
+    def __init__(self, pacote: str = "especies"):
+        self._pacote = pacote
+        self._lock = threading.RLock()
+        self._pendentes: Optional[List[str]] = None   # módulos ainda não importados
+        self._por_alias: Dict[str, EspecieConfig] = {}
+        self._configs: List[EspecieConfig] = []
+
+    def _descobrir(self) -> List[str]:
+        if self._pendentes is None:
+            pacote = importlib.import_module(self._pacote)
+            self._pendentes = sorted(
+                info.name for info in pkgutil.iter_modules(pacote.__path__)
+                if info.name not in _MODULOS_IGNORADOS and not info.name.startswith("_")
+            )
+        return self._pendentes
+
+    def _carregar(self, nome_modulo: str):
+        self._pendentes.remove(nome_modulo)
+        modulo = importlib.import_module(f"{self._pacote}.{nome_modulo}")
+
+        config = next(
+            (valor for nome, valor in vars(modulo).items()
+             if nome.startswith("CONFIG_") and isinstance(valor, EspecieConfig)),
+            None,
+        )
+        if config is None:
+            logger.warning(f"Módulo de espécie '{nome_modulo}' não define um CONFIG_*")
+            return
+
+        self._configs.append(config)
+        for alias in (nome_modulo, config.nome, *getattr(modulo, "ALIASES", ())):
+            chave = normalizar_nome(alias)
+            existente = self._por_alias.setdefault(chave, config)
+            if existente is not config:
+                logger.warning(f"Alias '{alias}' já pertence à espécie '{existente.nome}'")
+
+    def buscar(self, nome: str) -> Optional[EspecieConfig]:
+        """Configuração da espécie pelo nome ou alias; None se não existir."""
+        if not nome:
+            return None
+        chave = normalizar_nome(nome)
+
+        config = self._por_alias.get(chave)
+        if config is not None:
+            return config
+
+        with self._lock:
+            pendentes = self._descobrir()
+            # Caso comum: o nome normalizado é o próprio módulo ("Cão" -> cao.py)
+            if chave in pendentes:
+                self._carregar(chave)
+            # Senão, importa os módulos restantes até achar o alias
+            while chave not in self._por_alias and pendentes:
+                self._carregar(pendentes[0])
+            return self._por_alias.get(chave)
+
+    def obter(self, nome: str) -> EspecieConfig:
+        config = self.buscar(nome)
+        if config is None:
+            raise KeyError(f"Espécie '{nome}' não encontrada. Disponíveis: {self.nomes()}")
+        return config
+
+    def pontuador(self, nome: str) -> PontuadorCompilado:
+        """Pontuador compilado (em cache na própria EspecieConfig)."""
+        return self.obter(nome).compilar()
+
+    def todas(self) -> List[EspecieConfig]:
+        """Importa todas as espécies e as retorna."""
+        with self._lock:
+            pendentes = self._descobrir()
+            while pendentes:
+                self._carregar(pendentes[0])
+            return list(self._configs)
+
+    def nomes(self) -> List[str]:
+        return [config.nome for config in self.todas()]
+
 
 # Registro central de todas as espécies disponíveis
-ESPECIES_DISPONIVEIS: Dict[str, EspecieConfig] = {
-    "Cachorro": CONFIG_CAES,
-    "Gato": CONFIG_GATOS,
-    # Para adicionar nova espécie, basta:
-    # 1. Criar especies/nova_especie.py
-    # 2. Adicionar aqui: "Nova Espécie": CONFIG_NOVA_ESP
-}
+REGISTRO = RegistroEspecies()
+
+
+def buscar_especie(nome: str) -> Optional[EspecieConfig]:
+    """Configuração da espécie de um pet (ex.: pets.especie); None se não houver."""
+    return REGISTRO.buscar(nome)
+
 
 def get_especies_nomes() -> List[str]:
     """Retorna lista de nomes de espécies disponíveis"""
-    return(ESPECIES_DISPONIVEIS.keys())
+    return REGISTRO.nomes()
+
 
 def get_especie_config(nome: str) -> EspecieConfig:
     """
     Retorna configuração de uma espécie
-    Raises KeyError se espécie existir
+    Raises KeyError se a espécie não existir
     """
-    if nome not in ESPECIES_DISPONIVEIS:
-        raise KeyError(f"Espécie '{nome}' não encontrada. Disponíveis: {get_especies_nomes()}")
+    return REGISTRO.obter(nome)
 
-    return ESPECIES_DISPONIVEIS[nome]
 
 def get_escala_labels(escala_min: int, escala_max: int) -> Dict[int, str]:
     """
@@ -38,7 +146,7 @@ def get_escala_labels(escala_min: int, escala_max: int) -> Dict[int, str]:
         return {
             0: "0 - Nunca",
             1: "1 - Raramente",
-            2: "2 - Às vezes", 
+            2: "2 - Às vezes",
             3: "3 - Frequentemente",
             4: "4 - Sempre"
         }
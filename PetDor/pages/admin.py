@@ -17,12 +17,30 @@ from database.models import (
     buscar_avaliacoes_usuario,
     get_estatisticas_usuario
 )
+from database.estatisticas import (
+    PERIODOS_DIAS,
+    contar_usuarios,
+    get_estatisticas_avaliacoes,
+    intervalo_periodo,
+    serie_diaria_avaliacoes,
+    serie_diaria_usuarios,
+)
 from database.models import buscar_usuario_por_email, buscar_usuario_por_id
 from auth.user import buscar_usuario_por_id
+from database.paginacao import listar_usuarios_admin_pagina
+from utils.exportacao import ENTIDADES as ENTIDADES_EXPORTACAO, exportar_para_arquivo
+from utils.graficos import grafico_barras, grafico_barras_horizontais, grafico_pizza
 import logging
+import tempfile
 
 logger = logging.getLogger(__name__)
 
+# Usuários por página na seção "Usuários Detalhados"
+USUARIOS_POR_PAGINA = 50
+
+FILTROS_STATUS = {"Todos": None, "Ativos": True, "Inativos": False}
+ORDENACOES_USUARIOS = {"Data de Criação": "data_criacao", "Nome": "nome", "Avaliações": "avaliacoes"}
+
 def render_admin_page(usuario):
     """Renderiza página de administração"""
 
@@ -44,12 +62,15 @@ def render_admin_page(usuario):
     # Sidebar com filtros
     st.sidebar.title("📊 Filtros")
 
-    # Período
+    # Período (dias em UTC, como os rollups; ver database/estatisticas.py)
     periodo = st.sidebar.selectbox(
         "Período",
-        ["Hoje", "Últimos 7 dias", "Últimos 30 dias", "Todo período"],
-        index=2
+        list(PERIODOS_DIAS),
+        index=2,
+        format_func=_rotulo_periodo,
+        help=_AJUDA_UTC,
     )
+    intervalo = intervalo_periodo(periodo)
 
     # Tipo de estatística
     secao = st.sidebar.radio(
@@ -64,9 +85,9 @@ def render_admin_page(usuario):
 
     # Conteúdo principal baseado na seção
     if secao == "📈 Usuários":
-        render_secao_usuarios(periodo)
+        render_secao_usuarios(periodo, intervalo)
     elif secao == "📊 Avaliações":
-        render_secao_avaliacoes(periodo)
+        render_secao_avaliacoes(periodo, intervalo)
     elif secao == "📋 Usuários Detalhados":
         render_secao_usuarios_detalhados()
 
@@ -79,18 +100,41 @@ def render_admin_page(usuario):
     """, unsafe_allow_html=True)
 
 
-def render_secao_usuarios(periodo):
-    """Renderiza estatísticas de usuários"""
+_AJUDA_UTC = (
+    "Os dias são contados em UTC: no horário de Brasília (UTC-3), "
+    "\"Hoje\" começa às 21h do dia anterior."
+)
+
+
+def _rotulo_periodo(periodo):
+    return periodo if PERIODOS_DIAS[periodo] is None else f"{periodo} (UTC)"
+
+
+def _caption_periodo(periodo, intervalo):
+    if intervalo is None:
+        st.caption(f"📅 {periodo}")
+    else:
+        inicio, fim = intervalo
+        st.caption(f"📅 {periodo}: {inicio:%d/%m/%Y} a {fim:%d/%m/%Y} (UTC)")
+
+
+def render_secao_usuarios(periodo, intervalo=None):
+    """Renderiza estatísticas de usuários (cadastrados no período)"""
     st.markdown("""
     <div class="wellness-card">
         <h3 style="color: #2d3748; margin-bottom: 1.5rem;">👥 Estatísticas de Usuários</h3>
     </div>
     """, unsafe_allow_html=True)
 
+    _caption_periodo(periodo, intervalo)
+
     # Estatísticas gerais
-    stats = get_estatisticas_gerais_usuarios()
+    stats = get_estatisticas_gerais_usuarios(intervalo)
+
+    if stats and stats['total_usuarios'] == 0:
+        st.info("ℹ️ Nenhum usuário cadastrado no período selecionado.")
 
-    if stats:
+    elif stats:
         col1, col2, col3, col4 = st.columns(4)
 
         with col1:
@@ -125,21 +169,21 @@ def render_secao_usuarios(periodo):
         # Gráfico de distribuição
         st.subheader("📊 Distribuição de Status")
 
-        import matplotlib.pyplot as plt
-        import numpy as np
-
-        labels = ['Ativos', 'Desativados']
-        sizes = [stats['total_ativos'], stats['total_desativados']]
-        colors = ['#28a745', '#dc3545']
-        explode = (0, 0.1)  # explode 1st slice
-
-        fig1, ax1 = plt.subplots(figsize=(8, 6))
-        ax1.pie(sizes, explode=explode, labels=labels, colors=colors,
-                autopct='%1.1f%%', shadow=True, startangle=90)
-        ax1.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle.
-        ax1.set_title('Distribuição de Usuários por Status', fontsize=14, fontweight='bold')
-
-        st.pyplot(fig1)
+        st.image(grafico_pizza(
+            ['Ativos', 'Desativados'],
+            [stats['total_ativos'], stats['total_desativados']],
+            cores=['#28a745', '#dc3545'],
+            titulo='Distribuição de Usuários por Status',
+            destaque=[0, 0.1],
+            periodo=periodo,
+        ))
+
+        # Evolução diária
+        serie = serie_diaria_usuarios(intervalo)
+        if serie:
+            st.subheader("📈 Cadastros por Dia (UTC)")
+            df_serie = pd.DataFrame(serie).set_index('dia')
+            st.line_chart(df_serie[['cadastros', 'ativos']])
 
         # Tabela de resumo
         st.subheader("📋 Resumo Detalhado")
@@ -190,8 +234,8 @@ def render_secao_usuarios(periodo):
         st.error("❌ Erro ao carregar estatísticas de usuários")
 
 
-def render_secao_avaliacoes(periodo):
-    """Renderiza estatísticas de avaliações"""
+def render_secao_avaliacoes(periodo, intervalo=None):
+    """Renderiza estatísticas de avaliações do período"""
     st.markdown("""
     <div class="wellness-card">
         <h3 style="color: #2d3748; margin-bottom: 1.5rem;">📊 Estatísticas de Avaliações</h3>
@@ -199,41 +243,19 @@ def render_secao_avaliacoes(periodo):
     """, unsafe_allow_html=True)
 
     try:
-        with get_db() as conn:
-            cur = conn.cursor()
+        _caption_periodo(periodo, intervalo)
 
-            # Total de avaliações
-            cur.execute("SELECT COUNT(*) FROM avaliacoes")
-            total_avaliacoes = cur.fetchone()[0] or 0
+        # Lê os rollups (database/estatisticas.py) só na faixa de dias do período
+        stats = get_estatisticas_avaliacoes(intervalo=intervalo)
+        if stats is None:
+            st.error("❌ Erro ao carregar estatísticas de avaliações")
+            return
 
-            # Usuários que fizeram avaliações
-            cur.execute("""
-                SELECT COUNT(DISTINCT usuario_id) FROM avaliacoes
-            """)
-            usuarios_avaliadores = cur.fetchone()[0] or 0
-
-            # Média geral de dor
-            cur.execute("SELECT AVG(percentual) FROM avaliacoes")
-            media_geral = cur.fetchone()[0] or 0
-
-            # Avaliações por espécie
-            cur.execute("""
-                SELECT especie, COUNT(*) as total, AVG(percentual) as media
-                FROM avaliacoes 
-                GROUP BY especie
-                ORDER BY total DESC
-            """)
-            avaliacoes_especie = cur.fetchall()
-
-            # Top 5 pets mais avaliados
-            cur.execute("""
-                SELECT pet_nome, COUNT(*) as total
-                FROM avaliacoes 
-                GROUP BY pet_nome
-                ORDER BY total DESC
-                LIMIT 5
-            """)
-            top_pets = cur.fetchall()
+        total_avaliacoes = stats['total_avaliacoes']
+        usuarios_avaliadores = stats['usuarios_avaliadores']
+        media_geral = stats['media_geral']
+        avaliacoes_especie = stats['por_especie']
+        top_pets = stats['top_pets']
 
         # Métricas principais
         col1, col2, col3 = st.columns(3)
@@ -247,6 +269,19 @@ def render_secao_avaliacoes(periodo):
         with col3:
             st.metric("📈 Média de Dor", f"{media_geral:.1f}%")
 
+        # Evolução diária
+        serie = serie_diaria_avaliacoes(intervalo)
+        if serie:
+            st.subheader("📈 Evolução Diária (UTC)")
+            df_serie = pd.DataFrame(serie).set_index('dia')
+            col1, col2 = st.columns(2)
+            with col1:
+                st.caption("Avaliações por dia")
+                st.line_chart(df_serie['total'])
+            with col2:
+                st.caption("Média de dor (%)")
+                st.line_chart(df_serie['media_dor'])
+
         # Avaliações por espécie
         if avaliacoes_especie:
             st.subheader("🐾 Avaliações por Espécie")
@@ -259,22 +294,15 @@ def render_secao_avaliacoes(periodo):
             st.dataframe(df_especies, use_container_width=True)
 
             # Gráfico de barras
-            fig, ax = plt.subplots(figsize=(10, 6))
             especies = [row[0] for row in avaliacoes_especie]
-            totais = [row[1] for row in avaliacoes_especie]
-
-            bars = ax.bar(especies, totais, color=['#28a745' if i == 0 else '#ffc107' for i in range(len(especies))])
-            ax.set_ylabel('Número de Avaliações')
-            ax.set_title('Avaliações por Espécie', fontsize=14, fontweight='bold')
-            ax.tick_params(axis='x', rotation=45)
-
-            # Adiciona valores nas barras
-            for bar in bars:
-                height = bar.get_height()
-                ax.text(bar.get_x() + bar.get_width()/2., height,
-                       f'{int(height)}', ha='center', va='bottom')
-
-            st.pyplot(fig)
+            st.image(grafico_barras(
+                especies,
+                [row[1] for row in avaliacoes_especie],
+                cores=['#28a745' if i == 0 else '#ffc107' for i in range(len(especies))],
+                titulo='Avaliações por Espécie',
+                eixo='Número de Avaliações',
+                periodo=periodo,
+            ))
 
         # Top pets
         if top_pets:
@@ -289,23 +317,14 @@ def render_secao_avaliacoes(periodo):
             st.dataframe(df_top, use_container_width=True)
 
             # Gráfico horizontal
-            fig, ax = plt.subplots(figsize=(10, 6))
-            pets = [row[0] for row in top_pets]
-            counts = [row[1] for row in top_pets]
-
-            y_pos = np.arange(len(pets))
-            bars = ax.barh(y_pos, counts, color='#17a2b8')
-            ax.set_yticks(y_pos)
-            ax.set_yticklabels(pets)
-            ax.invert_yaxis()  # labels read top-to-bottom
-            ax.set_xlabel('Número de Avaliações')
-            ax.set_title('Top 5 Pets Mais Avaliados', fontsize=14, fontweight='bold')
-
-            # Adiciona valores nas barras
-            for i, v in enumerate(counts):
-                ax.text(v + 0.5, i, str(v), va='center')
-
-            st.pyplot(fig)
+            st.image(grafico_barras_horizontais(
+                [row[0] for row in top_pets],
+                [row[1] for row in top_pets],
+                cores='#17a2b8',
+                titulo='Top 5 Pets Mais Avaliados',
+                eixo='Número de Avaliações',
+                periodo=periodo,
+            ))
 
     except Exception as e:
         st.error(f"❌ Erro ao carregar estatísticas de avaliações: {e}")
@@ -319,73 +338,53 @@ def render_secao_usuarios_detalhados():
     </div>
     """, unsafe_allow_html=True)
 
-    try:
-        with get_db() as conn:
-            cur = conn.cursor()
-
-            # Busca todos os usuários com suas estatísticas
-            cur.execute("""
-                SELECT 
-                    u.id, u.nome, u.email, u.data_criacao, u.ativo,
-                    COUNT(a.id) as total_avaliacoes,
-                    AVG(a.percentual) as media_dor
-                FROM usuarios u
-                LEFT JOIN avaliacoes a ON u.id = a.usuario_id
-                GROUP BY u.id, u.nome, u.email, u.data_criacao, u.ativo
-                ORDER BY u.data_criacao DESC
-            """)
+    # Filtros (aplicados no SQL, sobre colunas indexadas e o rollup de avaliações)
+    st.subheader("🔍 Filtros de Usuários")
+    col1, col2, col3 = st.columns(3)
 
-            usuarios_data = cur.fetchall()
-
-        if usuarios_data:
-            # Prepara dados para DataFrame
-            dados = []
-            for row in usuarios_data:
-                usuario = {
-                    'ID': row[0],
-                    'Nome': row[1],
-                    'Email': row[2],
-                    'Criado em': row[3],
-                    'Status': '✅ Ativo' if row[4] else '❌ Inativo',
-                    'Avaliações': row[5] or 0,
-                    'Média Dor': f"{row[6]:.1f}%" if row[6] else "N/A"
-                }
-                dados.append(usuario)
+    with col1:
+        status_filtro = st.selectbox("Status", list(FILTROS_STATUS))
 
-            df_usuarios = pd.DataFrame(dados)
+    with col2:
+        min_avaliacoes = st.slider("Mínimo de Avaliações", 0, 50, 0)
 
-            # Filtros
-            st.subheader("🔍 Filtros de Usuários")
-            col1, col2, col3 = st.columns(3)
+    with col3:
+        ordenar_por = st.selectbox("Ordenar por", list(ORDENACOES_USUARIOS))
 
-            with col1:
-                status_filtro = st.selectbox("Status", ["Todos", "Ativos", "Inativos"])
+    ativo = FILTROS_STATUS[status_filtro]
+    ordem = ORDENACOES_USUARIOS[ordenar_por]
 
-            with col2:
-                min_avaliacoes = st.slider("Mínimo de Avaliações", 0, 50, 0)
+    # Paginação por chave: pilha com o cursor de início de cada página visitada.
+    # Cursores só valem para os mesmos filtros; mudou o filtro, volta à página 1.
+    filtros = (ativo, min_avaliacoes, ordem)
+    if st.session_state.get('admin_usuarios_filtros') != filtros:
+        st.session_state['admin_usuarios_filtros'] = filtros
+        st.session_state['admin_usuarios_cursores'] = [None]
+    cursores = st.session_state['admin_usuarios_cursores']
 
-            with col3:
-                ordenar_por = st.selectbox("Ordenar por", ["Data de Criação", "Nome", "Avaliações"])
-
-            # Aplica filtros
-            df_filtrado = df_usuarios.copy()
-
-            if status_filtro == "Ativos":
-                df_filtrado = df_filtrado[df_filtrado['Status'] == '✅ Ativo']
-            elif status_filtro == "Inativos":
-                df_filtrado = df_filtrado[df_filtrado['Status'] == '❌ Inativo']
-
-            df_filtrado = df_filtrado[df_filtrado['Avaliações'] >= min_avaliacoes]
-
-            if ordenar_por == "Nome":
-                df_filtrado = df_filtrado.sort_values('Nome')
-            elif ordenar_por == "Avaliações":
-                df_filtrado = df_filtrado.sort_values('Avaliações', ascending=False)
-            else:
-                df_filtrado = df_filtrado.sort_values('Criado em', ascending=False)
+    try:
+        pagina = listar_usuarios_admin_pagina(
+            limite=USUARIOS_POR_PAGINA, apos=cursores[-1],
+            ativo=ativo, min_avaliacoes=min_avaliacoes, ordem=ordem,
+        )
+        contagem = contar_usuarios(ativo, min_avaliacoes) or {}
+
+        if pagina.itens:
+            df_filtrado = pd.DataFrame([
+                {
+                    'ID': row['id'],
+                    'Nome': row['nome'],
+                    'Email': row['email'],
+                    'Criado em': row['data_criacao'],
+                    'Status': '✅ Ativo' if row['ativo'] else '❌ Inativo',
+                    'Avaliações': row['total_avaliacoes'],
+                    'Média Dor': row['media_dor'],
+                }
+                for row in pagina.itens
+            ])
 
             # Exibe tabela
-            st.subheader(f"📋 Lista de Usuários ({len(df_filtrado)} encontrados)")
+            st.subheader(f"📋 Lista de Usuários ({contagem.get('total', len(df_filtrado)):,} encontrados)")
 
             # Configuração da tabela
             st.dataframe(
@@ -409,39 +408,77 @@ def render_secao_usuarios_detalhados():
                 hide_index=True
             )
 
-            # Estatísticas da tabela filtrada
-            if len(df_filtrado) > 0:
+            # Totais de todos os usuários filtrados (não só desta página)
+            if contagem:
                 st.markdown("---")
                 col1, col2, col3 = st.columns(3)
 
                 with col1:
-                    st.metric("👥 Total Filtrado", len(df_filtrado))
+                    st.metric("👥 Total Filtrado", contagem['total'])
 
                 with col2:
-                    ativos_filtrados = len(df_filtrado[df_filtrado['Status'] == '✅ Ativo'])
-                    st.metric("✅ Ativos", ativos_filtrados)
+                    st.metric("✅ Ativos", contagem['ativos'])
 
                 with col3:
-                    inativos_filtrados = len(df_filtrado[df_filtrado['Status'] == '❌ Inativo'])
-                    st.metric("❌ Inativos", inativos_filtrados)
-
-                # Botão exportar
-                csv = df_filtrado.to_csv(index=False)
-                st.download_button(
-                    label="📥 Exportar CSV",
-                    data=csv,
-                    file_name=f"usuarios_petdor_{datetime.now().strftime('%Y%m%d_%H%M')}.csv",
-                    mime="text/csv"
-                )
+                    st.metric("❌ Inativos", contagem['inativos'])
+
+            # Navegação entre páginas
+            col_anterior, col_pagina, col_proxima = st.columns(3)
+            with col_anterior:
+                if len(cursores) > 1 and st.button("⬅️ Anteriores", use_container_width=True):
+                    cursores.pop()
+                    st.rerun()
+            with col_pagina:
+                st.caption(f"Página {len(cursores)}")
+            with col_proxima:
+                if pagina.tem_proxima and st.button("Próximos ➡️", use_container_width=True):
+                    cursores.append(pagina.proximo_cursor)
+                    st.rerun()
+
+            render_exportacao()
 
         else:
-            st.info("ℹ️ Nenhum usuário encontrado no sistema")
+            st.info("ℹ️ Nenhum usuário encontrado com esses filtros")
 
     except Exception as e:
         st.error(f"❌ Erro ao carregar usuários detalhados: {e}")
         logger.error(f"Erro na seção de usuários detalhados: {e}")
 
 
+def render_exportacao():
+    """Exportação completa do banco, gravada em lotes (utils/exportacao.py)"""
+    st.markdown("---")
+    st.subheader("📥 Exportar Dados")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        entidade = st.selectbox("Dados", list(ENTIDADES_EXPORTACAO), key="admin_exportar_entidade")
+    with col2:
+        formato = st.selectbox("Formato", ["csv", "parquet"], key="admin_exportar_formato")
+    with col3:
+        preparar = st.button("⚙️ Preparar exportação", use_container_width=True)
+
+    if not preparar:
+        return
+
+    # Lido do banco em lotes; arquivos grandes vão para o disco, não para a memória
+    with st.spinner("Exportando..."), tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as arquivo:
+        try:
+            exportar_para_arquivo(entidade, formato, arquivo)
+        except Exception as e:
+            st.error(f"❌ Erro ao exportar {entidade}: {e}")
+            logger.error(f"Erro na exportação de {entidade}: {e}")
+            return
+
+        arquivo.seek(0)
+        st.download_button(
+            label=f"📥 Baixar {formato.upper()}",
+            data=arquivo.read(),
+            file_name=f"{entidade}_petdor_{datetime.now().strftime('%Y%m%d_%H%M')}.{formato}",
+            mime="text/csv" if formato == "csv" else "application/vnd.apache.parquet",
+        )
+
+
 # Configuração da página
 if __name__ == "__main__":
     # Simula um usuário admin para teste (remover em produção)
@@ -20,13 +20,13 @@ if str(root_path) not in sys.path:
 import streamlit as st
 from auth.user import buscar_usuario_por_id
 from database.models import buscar_usuario_por_id
-from database.connection import conectar_db
+from database.connection import obter_conexao
+from database.avaliacoes import salvar_avaliacao_completa
 from config import APP_CONFIG
 
-# Importa as classes base e as configurações de espécie
+# Importa as classes base e o registro de espécies (carregadas sob demanda)
 from especies.base import EspecieConfig, Pergunta
-from especies.cao import CONFIG_CAES
-from especies.gato import CONFIG_GATOS
+from especies.loader import buscar_especie
 
 # Configuração da página
 st.set_page_config(
@@ -38,17 +38,16 @@ st.set_page_config(
 
 def listar_pets_do_tutor(usuario_id):
     """Lista pets cadastrados pelo tutor (usuario_id)."""
-    conn = conectar_db()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT id, nome, especie
-        FROM pets
-        WHERE tutor_id = ?
-        ORDER BY nome
-    """, (usuario_id,))
-    rows = cursor.fetchall()
-    conn.close()
+    with obter_conexao() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute("""
+            SELECT id, nome, especie
+            FROM pets
+            WHERE tutor_id = ?
+            ORDER BY nome
+        """, (usuario_id,))
+        rows = cursor.fetchall()
 
     pets = []
     for row in rows:
@@ -60,29 +59,14 @@ def listar_pets_do_tutor(usuario_id):
     return pets
 
 
-def salvar_avaliacao(pet_id, usuario_id, percentual_dor, respostas_perguntas: Dict[str, str], observacoes):
-    """Salva avaliação no banco com respostas das perguntas."""
+def salvar_avaliacao(pet_id, usuario_id, percentual_dor, respostas_perguntas: Dict[str, str], observacoes,
+                     especie_config: Optional[EspecieConfig] = None):
+    """Salva avaliação no banco com respostas das perguntas (numa única transação)."""
     try:
-        conn = conectar_db()
-        cursor = conn.cursor()
-
-        # Salva a avaliação principal
-        cursor.execute("""
-            INSERT INTO avaliacoes (pet_id, usuario_id, percentual_dor, observacoes)
-            VALUES (?, ?, ?, ?)
-        """, (pet_id, usuario_id, percentual_dor, observacoes))
-
-        avaliacao_id = cursor.lastrowid
-
-        # Salva respostas das perguntas na nova tabela
-        for pergunta_id, resposta_valor in respostas_perguntas.items():
-            cursor.execute("""
-                INSERT INTO avaliacao_respostas (avaliacao_id, pergunta_id, resposta)
-                VALUES (?, ?, ?)
-            """, (avaliacao_id, pergunta_id, resposta_valor))
-
-        conn.commit()
-        conn.close()
+        salvar_avaliacao_completa(
+            pet_id, usuario_id, percentual_dor, respostas_perguntas, observacoes,
+            especie_config=especie_config,
+        )
         return True, "Avaliação salva com sucesso!"
     except Exception as e:
         return False, f"Erro ao salvar avaliação: {e}"
@@ -156,12 +140,9 @@ def main():
     st.write(f"Você está avaliando: **{pet_escolhido['nome']}** (Espécie: {pet_escolhido['especie']})")
 
     # 4. Carrega a configuração de perguntas para a espécie selecionada
-    especie_config: Optional[EspecieConfig] = None
-    if pet_escolhido['especie'] == "Cão":
-        especie_config = CONFIG_CAES
-    elif pet_escolhido['especie'] == "Gato":
-        especie_config = CONFIG_GATOS
-    else:
+    # Aceita qualquer alias da espécie ("Cão", "Cachorro", ...)
+    especie_config: Optional[EspecieConfig] = buscar_especie(pet_escolhido['especie'])
+    if especie_config is None:
         # Fallback para espécies não configuradas
         st.warning(f"Não há perguntas objetivas configuradas para a espécie '{pet_escolhido['especie']}'. Usando avaliação manual.")
         # Cria uma configuração genérica para evitar erros
@@ -185,19 +166,18 @@ def main():
 
     if especie_config.perguntas:
         st.markdown(f"**{especie_config.descricao}**")
+        # Tabelas de pontuação compiladas uma vez por configuração
+        pontuador = especie_config.compilar()
         with st.form("perguntas_objetivas_form"):
             for i, pergunta in enumerate(especie_config.perguntas):
                 # Usa o ID da pergunta para o dicionário de respostas
                 pergunta_id = pergunta.id 
 
                 # Define o valor padrão do radio button a partir da sessão, se existir
-                default_index = 0
-                if pergunta_id in st.session_state['respostas_perguntas']:
-                    try:
-                        # Encontra o índice da resposta salva na lista de opções
-                        default_index = especie_config.opcoes_escala.index(st.session_state['respostas_perguntas'][pergunta_id])
-                    except ValueError:
-                        default_index = 0 # Fallback se a resposta salva não estiver nas opções
+                # (0 se a resposta salva não estiver nas opções)
+                default_index = pontuador.indice_opcao(
+                    st.session_state['respostas_perguntas'].get(pergunta_id)
+                )
 
                 resposta = st.radio(
                     f"**{i+1}. {pergunta.texto}**", # Texto da pergunta no label do radio
@@ -216,7 +196,7 @@ def main():
 
             if submitted_perguntas:
                 # O percentual é calculado diretamente do st.session_state['respostas_perguntas']
-                st.session_state['percentual_calculado'] = especie_config.calcular_percentual_dor(st.session_state['respostas_perguntas'])
+                st.session_state['percentual_calculado'] = pontuador.calcular_percentual(st.session_state['respostas_perguntas'])
                 st.rerun() # Recarrega para exibir o percentual calculado
 
     # Exibe o percentual calculado e permite ajuste manual
@@ -247,7 +227,8 @@ def main():
             usuario_id=usuario_id,
             percentual_dor=percentual_final,
             respostas_perguntas=respostas_para_salvar,
-            observacoes=observacoes
+            observacoes=observacoes,
+            especie_config=especie_config
         )
 
         if sucesso:
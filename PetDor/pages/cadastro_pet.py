@@ -11,7 +11,7 @@ if str(root_path) not in sys.path:
 
 import streamlit as st
 from auth.user import buscar_usuario_por_id
-from database.connection import conectar_db
+from database.escritor import executar_escrita
 from config import APP_CONFIG
 
 st.set_page_config(
@@ -26,16 +26,11 @@ def cadastrar_pet_db(tutor_id, nome, especie, raca, idade, peso):
     Função para cadastrar um novo pet no banco de dados.
     """
     try:
-        conn = conectar_db()
-        cursor = conn.cursor()
-
-        cursor.execute("""
+        executar_escrita(lambda conn: conn.execute("""
             INSERT INTO pets (tutor_id, nome, especie, raca, idade, peso)
             VALUES (?, ?, ?, ?, ?, ?)
-        """, (tutor_id, nome, especie, raca, idade, peso))
+        """, (tutor_id, nome, especie, raca, idade, peso)))
 
-        conn.commit()
-        conn.close()
         return True, "Pet cadastrado com sucesso!"
     except Exception as e:
         return False, f"Erro ao cadastrar pet: {e}"
@@ -5,11 +5,16 @@ Responsável por:
 - Exibir o histórico de avaliações de dor de todos os pets do tutor logado.
 - Permitir exibição detalhada de cada avaliação.
 - Permitir exclusão de avaliações.
+- Gerar o relatório PDF com o histórico completo de um pet.
+
+Cada rerun faz uma consulta para a página atual (avaliações + pets) e,
+no máximo, uma para as respostas das avaliações com "Mostrar respostas"
+marcado.
 """
 
 import sys
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 # Ajusta o path raiz do projeto
 root_path = Path(__file__).parent.parent
@@ -19,11 +24,12 @@ if str(root_path) not in sys.path:
 import streamlit as st
 from auth.user import buscar_usuario_por_id
 from database.models import (
-    buscar_avaliacoes_usuario,
+    buscar_historico_usuario,
+    buscar_respostas_agrupadas,
     deletar_avaliacao,
-    buscar_avaliacao_por_id,
-    buscar_respostas_avaliacao
 )
+from database.paginacao import iterar_pets
+from utils.relatorio_pet import gerar_relatorio_pet
 from config import APP_CONFIG
 
 
@@ -34,20 +40,22 @@ st.set_page_config(
     layout="centered"
 )
 
+# Avaliações por página do histórico
+ITENS_POR_PAGINA = 20
+
 
 # ---------------------------------------------------------
 # Função para exibir os detalhes da avaliação
 # ---------------------------------------------------------
-def exibir_detalhes_avaliacao(avaliacao_id: int):
-    """Exibe os detalhes de uma avaliação específica."""
-    avaliacao = buscar_avaliacao_por_id(avaliacao_id)
-
-    if not avaliacao:
-        st.error("Avaliação não encontrada.")
-        return
+def exibir_detalhes_avaliacao(avaliacao: Dict[str, Any], respostas: Dict[str, str] = None):
+    """
+    Exibe os detalhes de uma avaliação já carregada pelo histórico.
+    `respostas` é None enquanto o usuário não pedir para vê-las.
+    """
+    avaliacao_id = avaliacao["avaliacao_id"]
 
     # Trata data no formato ISO
-    data_raw = avaliacao.get("data_avaliacao", "")
+    data_raw = avaliacao.get("data_avaliacao") or ""
     data_formatada = data_raw.replace("T", " ")[:16] if "T" in data_raw else data_raw
 
     st.subheader(
@@ -73,17 +81,17 @@ def exibir_detalhes_avaliacao(avaliacao_id: int):
     else:
         st.info("Nenhuma observação registrada.")
 
-    # Exibir respostas das perguntas
-    respostas = buscar_respostas_avaliacao(avaliacao_id)
-    if respostas:
-        st.markdown("---")
-        st.markdown("#### Respostas Detalhadas")
-        for r in respostas:
-            pergunta = r.get("pergunta_id", "").replace("_", " ").capitalize()
-            resposta = r.get("resposta", "Não informado")
-            st.write(f"- **{pergunta}:** {resposta}")
-    else:
-        st.info("Nenhuma resposta detalhada encontrada.")
+    # Respostas das perguntas: só são buscadas para quem marcar a opção
+    st.toggle("Mostrar respostas detalhadas", key=f"resp_{avaliacao_id}")
+    if respostas is not None:
+        if respostas:
+            st.markdown("---")
+            st.markdown("#### Respostas Detalhadas")
+            for pergunta_id, resposta in respostas.items():
+                pergunta = pergunta_id.replace("_", " ").capitalize()
+                st.write(f"- **{pergunta}:** {resposta or 'Não informado'}")
+        else:
+            st.info("Nenhuma resposta detalhada encontrada.")
 
     # Botão deletar
     st.markdown("---")
@@ -99,6 +107,36 @@ def exibir_detalhes_avaliacao(avaliacao_id: int):
             st.error("Erro ao deletar avaliação.")
 
 
+def _respostas_expandidas(avaliacoes: List[Dict[str, Any]]) -> Dict[int, Dict[str, str]]:
+    """Carrega, numa só ida ao banco, as respostas das avaliações abertas."""
+    ids = [a["avaliacao_id"] for a in avaliacoes if st.session_state.get(f"resp_{a['avaliacao_id']}")]
+    return buscar_respostas_agrupadas(ids) if ids else {}
+
+
+def exibir_relatorio_pet(usuario_id: int):
+    """Relatório PDF com todas as avaliações de um pet do tutor."""
+    pets = list(iterar_pets(tutor_id=usuario_id))
+    if not pets:
+        return
+
+    with st.expander("📄 Relatório completo de um pet (PDF)"):
+        nomes = {p["id"]: p["nome"] for p in pets}
+        pet_id = st.selectbox("Pet", list(nomes), format_func=nomes.get, key="relatorio_pet_id")
+
+        if st.button("Gerar relatório do histórico", key="gerar_relatorio_pet"):
+            with st.spinner("Gerando relatório..."):
+                pdf = gerar_relatorio_pet(pet_id)
+            if pdf is None:
+                st.info("Este pet ainda não tem avaliações para o relatório.")
+            else:
+                st.download_button(
+                    "📥 Baixar PDF",
+                    pdf,
+                    file_name=f"historico_{nomes[pet_id]}.pdf",
+                    mime="application/pdf",
+                )
+
+
 # ---------------------------------------------------------
 # Página principal
 # ---------------------------------------------------------
@@ -136,8 +174,18 @@ def main():
 
     st.markdown("---")
 
-    # Busca avaliações
-    avaliacoes = buscar_avaliacoes_usuario(usuario_id)
+    # Paginação por chave: pilha com o cursor de início de cada página visitada
+    cursores = st.session_state.setdefault('historico_cursores', [None])
+
+    # Busca a página atual (avaliações + dados dos pets numa consulta)
+    avaliacoes, proximo_cursor = buscar_historico_usuario(
+        usuario_id, limite=ITENS_POR_PAGINA, apos=cursores[-1]
+    )
+
+    if not avaliacoes and len(cursores) > 1:
+        # A página ficou vazia (ex.: última avaliação dela foi deletada)
+        cursores.pop()
+        st.rerun()
 
     if not avaliacoes:
         st.info("Você ainda não possui avaliações registradas.")
@@ -154,18 +202,37 @@ def main():
         """, unsafe_allow_html=True)
         st.stop()
 
+    exibir_relatorio_pet(usuario_id)
+
     # Lista de avaliações
     st.markdown("### Suas Últimas Avaliações")
 
+    respostas_por_avaliacao = _respostas_expandidas(avaliacoes)
+
     for avaliacao in avaliacoes:
-        data_raw = avaliacao["data_avaliacao"]
+        data_raw = avaliacao["data_avaliacao"] or ""
         data_fmt = data_raw.split("T")[0] if "T" in data_raw else data_raw
 
         with st.expander(
             f"**{avaliacao['pet_nome']}** ({avaliacao['pet_especie']}) - "
             f"{data_fmt} - Dor: **{avaliacao['percentual_dor']}%**"
         ):
-            exibir_detalhes_avaliacao(avaliacao["avaliacao_id"])
+            exibir_detalhes_avaliacao(
+                avaliacao, respostas_por_avaliacao.get(avaliacao["avaliacao_id"])
+            )
+
+    # Navegação entre páginas
+    col_anterior, col_pagina, col_proxima = st.columns([1, 1, 1])
+    with col_anterior:
+        if len(cursores) > 1 and st.button("⬅️ Mais recentes", use_container_width=True):
+            cursores.pop()
+            st.rerun()
+    with col_pagina:
+        st.caption(f"Página {len(cursores)}")
+    with col_proxima:
+        if proximo_cursor is not None and st.button("Mais antigas ➡️", use_container_width=True):
+            cursores.append(proximo_cursor)
+            st.rerun()
 
 
 # ---------------------------------------------------------
@@ -3,13 +3,23 @@ Módulo de utilitários do PETDor.
 
 Responsável por:
 - validação de dados,
-- envio de emails,
+- envio de emails (outbox + trabalhador),
 - geração de PDFs,
+- gráficos com cache,
 - funções auxiliares.
 """
 
 __all__ = [
     "validators",
     "email_sender",
+    "email_templates",
+    "email_worker",
+    "digest",
+    "smtp_pool",
     "pdf_generator",
+    "graficos",
+    "cache_pdf",
+    "exportacao",
+    "relatorio_pet",
+    "relatorios_lote",
 ]
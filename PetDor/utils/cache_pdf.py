@@ -0,0 +1,273 @@
+"""
+Cache de relatórios PDF do PETDOR
+
+Gerar o mesmo relatório de novo (o usuário clicando "Gerar PDF" várias
+vezes) devolve os bytes já prontos. A chave é um sha256 dos dados do
+relatório + a versão do template, então:
+
+- dados diferentes geram chave diferente: não há risco de servir um PDF
+  desatualizado depois de uma edição;
+- mudar o layout de um relatório = subir a versão do template
+  (VERSAO_TEMPLATE em utils/pdf_generator.py), e as entradas antigas
+  deixam de ser usadas e saem por LRU.
+
+Camadas:
+- memória: LRU limitado em bytes (PDF_CACHE_MAX_MB, padrão 32);
+- disco (opcional): PDF_CACHE_DIR=/caminho guarda uma cópia de cada PDF,
+  que sobrevive a reinícios e é promovida para a memória quando lida.
+  O diretório é limitado por PDF_CACHE_DISCO_MAX_MB (padrão 512),
+  removendo os arquivos acessados há mais tempo. O total em disco é
+  mantido em memória, e o diretório só é varrido quando ele passa do
+  limite.
+
+Relatórios ligados a uma avaliação levam o id dela; `invalidar_avaliacao()`
+remove todos eles. Ela é registrada em database.avaliacoes
+(ao_excluir_avaliacao) e roda quando a avaliação é excluída.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Optional, Set
+
+from database.avaliacoes import ao_excluir_avaliacao
+
+logger = logging.getLogger(__name__)
+
+PDF_CACHE_CONFIG = {
+    'max_bytes': int(os.getenv("PDF_CACHE_MAX_MB", "32")) * 1024 * 1024,
+    'diretorio': os.getenv("PDF_CACHE_DIR", ""),
+    'disco_max_bytes': int(os.getenv("PDF_CACHE_DISCO_MAX_MB", "512")) * 1024 * 1024,
+}
+
+# Poda do disco vai até esta fração do limite
+_FOLGA_PODA_DISCO = 0.9
+
+
+def chave_relatorio(tipo: str, versao: int, dados: dict) -> str:
+    """sha256 de (tipo de relatório, versão do template, dados)."""
+    conteudo = json.dumps(
+        {'tipo': tipo, 'versao': versao, 'dados': dados},
+        sort_keys=True, ensure_ascii=False, default=str,
+    )
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+
+class CacheRelatorios:
+    """LRU em memória limitado por bytes, com cópia opcional em disco."""
+
+    def __init__(self, max_bytes: int, diretorio: Optional[str] = None,
+                 disco_max_bytes: int = 0):
+        self.max_bytes = max_bytes
+        self.diretorio = Path(diretorio) if diretorio else None
+        self.disco_max_bytes = disco_max_bytes
+        self._itens: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        self._por_avaliacao: Dict[int, Set[str]] = {}
+        self._avaliacao_da_chave: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._metricas = {'acertos_memoria': 0, 'acertos_disco': 0, 'falhas': 0, 'invalidados': 0}
+
+        # Total em disco mantido à mão: a varredura só roda quando passa do limite
+        self._bytes_disco = 0
+        if self.diretorio is not None:
+            self.diretorio.mkdir(parents=True, exist_ok=True)
+            self._bytes_disco = sum(tamanho for _, tamanho, _ in self._arquivos_disco())
+
+    # ---------------------------------------------------------
+    # 🧠 Memória
+    # ---------------------------------------------------------
+    def _guardar_memoria(self, chave: str, pdf: bytes, avaliacao_id: Optional[int]):
+        if len(pdf) > self.max_bytes:
+            return
+        antigo = self._itens.pop(chave, None)
+        if antigo is not None:
+            self._bytes -= len(antigo)
+        self._itens[chave] = pdf
+        self._bytes += len(pdf)
+        if avaliacao_id is not None:
+            self._por_avaliacao.setdefault(avaliacao_id, set()).add(chave)
+            self._avaliacao_da_chave[chave] = avaliacao_id
+        while self._bytes > self.max_bytes:
+            removida, pdf_removido = self._itens.popitem(last=False)
+            self._bytes -= len(pdf_removido)
+            self._esquecer_avaliacao(removida)
+
+    def _esquecer_avaliacao(self, chave: str):
+        """Tira a chave (que saiu da memória) do índice por avaliação."""
+        avaliacao_id = self._avaliacao_da_chave.pop(chave, None)
+        if avaliacao_id is None:
+            return
+        chaves = self._por_avaliacao.get(avaliacao_id)
+        if chaves is not None:
+            chaves.discard(chave)
+            if not chaves:
+                del self._por_avaliacao[avaliacao_id]
+
+    # ---------------------------------------------------------
+    # 💽 Disco
+    # ---------------------------------------------------------
+    def _arquivo(self, chave: str, avaliacao_id: Optional[int]) -> Path:
+        # O id no nome permite invalidar por avaliação sem índice em disco
+        prefixo = f"a{avaliacao_id}_" if avaliacao_id is not None else ""
+        return self.diretorio / f"{prefixo}{chave}.pdf"
+
+    def _ler_disco(self, chave: str, avaliacao_id: Optional[int]) -> Optional[bytes]:
+        if self.diretorio is None:
+            return None
+        arquivo = self._arquivo(chave, avaliacao_id)
+        try:
+            pdf = arquivo.read_bytes()
+            os.utime(arquivo)  # Marca o acesso para a limpeza por LRU
+            return pdf
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"Cache de PDF: falha ao ler {arquivo}: {e}")
+            return None
+
+    def _arquivos_disco(self):
+        """(mtime, tamanho, caminho) de cada PDF do diretório."""
+        arquivos = []
+        for arquivo in self.diretorio.glob("*.pdf"):
+            try:
+                info = arquivo.stat()
+            except FileNotFoundError:
+                continue
+            arquivos.append((info.st_mtime, info.st_size, arquivo))
+        return arquivos
+
+    def _somar_disco(self, delta: int):
+        with self._lock:
+            self._bytes_disco += delta
+            return self._bytes_disco
+
+    def _remover_disco(self, arquivo: Path) -> bool:
+        try:
+            tamanho = arquivo.stat().st_size
+            arquivo.unlink()
+        except FileNotFoundError:
+            return False
+        self._somar_disco(-tamanho)
+        return True
+
+    def _gravar_disco(self, chave: str, avaliacao_id: Optional[int], pdf: bytes):
+        if self.diretorio is None:
+            return
+        arquivo = self._arquivo(chave, avaliacao_id)
+        temporario = arquivo.with_suffix(f".{threading.get_ident()}.tmp")
+        try:
+            try:
+                anterior = arquivo.stat().st_size   # Mesma chave gravada por outra sessão
+            except FileNotFoundError:
+                anterior = 0
+            temporario.write_bytes(pdf)
+            os.replace(temporario, arquivo)   # Leitores nunca veem arquivo pela metade
+        except OSError as e:
+            logger.warning(f"Cache de PDF: falha ao gravar {arquivo}: {e}")
+            temporario.unlink(missing_ok=True)
+            return
+        if self._somar_disco(len(pdf) - anterior) > self.disco_max_bytes:
+            self._podar_disco()
+
+    def _podar_disco(self):
+        """
+        Remove os arquivos acessados há mais tempo até 90% do limite: a
+        folga evita uma nova varredura a cada gravação com o disco cheio.
+        """
+        alvo = self.disco_max_bytes * _FOLGA_PODA_DISCO
+        arquivos = self._arquivos_disco()
+        total = sum(tamanho for _, tamanho, _ in arquivos)
+        for _, tamanho, arquivo in sorted(arquivos):
+            if total <= alvo:
+                break
+            arquivo.unlink(missing_ok=True)
+            total -= tamanho
+        # A varredura também corrige desvios (arquivos apagados por fora)
+        with self._lock:
+            self._bytes_disco = total
+
+    # ---------------------------------------------------------
+    # 🔑 API
+    # ---------------------------------------------------------
+    def obter_ou_gerar(self, chave: str, gerar: Callable[[], bytes],
+                       avaliacao_id: Optional[int] = None) -> bytes:
+        """PDF da chave; chama `gerar()` só se não estiver em nenhuma camada."""
+        with self._lock:
+            pdf = self._itens.get(chave)
+            if pdf is not None:
+                self._itens.move_to_end(chave)
+                self._metricas['acertos_memoria'] += 1
+                return pdf
+
+        pdf = self._ler_disco(chave, avaliacao_id)
+        if pdf is not None:
+            origem = 'acertos_disco'
+        else:
+            # Gera fora do lock: renderizar um PDF não bloqueia outras sessões
+            pdf = gerar()
+            self._gravar_disco(chave, avaliacao_id, pdf)
+            origem = 'falhas'
+
+        with self._lock:
+            self._metricas[origem] += 1
+            self._guardar_memoria(chave, pdf, avaliacao_id)
+        return pdf
+
+    def invalidar_avaliacao(self, avaliacao_id: int) -> int:
+        """Remove todos os relatórios da avaliação; retorna quantos saíram."""
+        removidos = 0
+        with self._lock:
+            for chave in self._por_avaliacao.pop(avaliacao_id, set()):
+                self._avaliacao_da_chave.pop(chave, None)
+                pdf = self._itens.pop(chave, None)
+                if pdf is not None:
+                    self._bytes -= len(pdf)
+                    removidos += 1
+
+        if self.diretorio is not None:
+            for arquivo in self.diretorio.glob(f"a{avaliacao_id}_*.pdf"):
+                if self._remover_disco(arquivo):
+                    removidos += 1
+
+        with self._lock:
+            self._metricas['invalidados'] += removidos
+        return removidos
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self._por_avaliacao.clear()
+            self._avaliacao_da_chave.clear()
+            self._bytes = 0
+        if self.diretorio is not None:
+            for arquivo in self.diretorio.glob("*.pdf"):
+                self._remover_disco(arquivo)
+
+    def metricas(self) -> dict:
+        with self._lock:
+            return {**self._metricas, 'itens_em_memoria': len(self._itens),
+                    'bytes_em_memoria': self._bytes,
+                    'bytes_em_disco': self._bytes_disco,
+                    'avaliacoes_indexadas': len(self._por_avaliacao)}
+
+
+# Cache único do processo
+CACHE_PDF = CacheRelatorios(
+    PDF_CACHE_CONFIG['max_bytes'],
+    PDF_CACHE_CONFIG['diretorio'] or None,
+    PDF_CACHE_CONFIG['disco_max_bytes'],
+)
+
+
+@ao_excluir_avaliacao
+def invalidar_avaliacao(avaliacao_id: int) -> int:
+    return CACHE_PDF.invalidar_avaliacao(avaliacao_id)
+
+
+def metricas_cache_pdf() -> dict:
+    return CACHE_PDF.metricas()
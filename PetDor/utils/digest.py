@@ -0,0 +1,152 @@
+"""
+Digest de alertas de dor do PETDOR
+
+Clínicas e veterinários com muitos pacientes recebiam um email por
+avaliação. Agora só alertas de prioridade 1 (dor alta) geram email na
+hora; os de prioridade 2 e 3 ficam marcados em `notificacoes`
+(email_pendente = 1) e são agrupados num único email por destinatário:
+
+- o primeiro alerta pendente de um destinatário abre a janela; quando
+  ele completa DIGEST_INTERVALO_MIN minutos, todos os alertas pendentes
+  daquele destinatário viram um digest, com uma linha por pet (dor
+  máxima, quantidade de alertas, horário do último);
+- marcar os alertas e enfileirar o digest na outbox acontecem na mesma
+  transação: cada alerta entra em exatamente um digest, mesmo com mais
+  de um processo rodando o agendador.
+
+O agendador não guarda estado próprio (a janela vem de data_criacao),
+então reiniciar o app não atrasa nem duplica digests. Ele roda a cada
+ciclo do trabalhador de emails (utils/email_worker.py).
+
+Configuração: DIGEST_INTERVALO_MIN (padrão 60).
+"""
+import sys
+from pathlib import Path
+
+# Adiciona a raiz do projeto ao path
+root_path = Path(__file__).parent.parent
+if str(root_path) not in sys.path:
+    sys.path.insert(0, str(root_path))
+
+import logging
+import os
+from collections import defaultdict
+from typing import Dict, List
+
+from database.escritor import executar_escrita
+from utils.email_sender import enviar_email_renderizado
+from utils.email_templates import renderizar_digest
+
+logger = logging.getLogger(__name__)
+
+DIGEST_CONFIG = {
+    'intervalo_min': int(os.getenv("DIGEST_INTERVALO_MIN", "60")),
+}
+
+_NIVEIS = {1: ("🚨", "ALTA"), 2: ("⚠️", "MÉDIA"), 3: ("ℹ️", "BAIXA")}
+
+
+def _hora(valor: str) -> str:
+    """'2026-01-31 10:00:00' (já em horário local) -> '31/01 10:00'."""
+    return f"{valor[8:10]}/{valor[5:7]} {valor[11:16]}" if valor and len(valor) >= 16 else (valor or "-")
+
+
+def _placeholders(valores) -> str:
+    return ", ".join("?" * len(valores))
+
+
+def _itens(alertas: List[dict], pets: Dict[int, str]) -> List[dict]:
+    """Uma linha por pet: maior dor, quantidade e horário do último alerta."""
+    por_pet: Dict[int, List[dict]] = defaultdict(list)
+    for a in alertas:
+        por_pet[a["pet_id"]].append(a)
+
+    itens = []
+    for pet_id, lista in por_pet.items():
+        prioridade = min(a["nivel_prioridade"] or 3 for a in lista)
+        emoji, nivel = _NIVEIS.get(prioridade, _NIVEIS[3])
+        maximo = max((a["percentual_dor"] or 0.0) for a in lista)
+        itens.append({
+            'pet_nome': pets.get(pet_id, "Pet"),
+            'link': f"https://petdor.app/historico?pet={pet_id}",
+            'emoji': emoji,
+            'nivel': nivel,
+            'maximo': f"{maximo:.0f}",
+            'alertas': len(lista),
+            'ultimo': _hora(max(a["data_criacao"] for a in lista)),
+            '_prioridade': prioridade,
+            '_maximo': maximo,
+        })
+    # Mais graves primeiro
+    itens.sort(key=lambda i: (i['_prioridade'], -i['_maximo']))
+    return itens
+
+
+def _gerar_digests(conn, intervalo_min: int) -> dict:
+    destinos = [row[0] for row in conn.execute("""
+        SELECT usuario_id_destino
+        FROM notificacoes
+        WHERE email_pendente = 1
+        GROUP BY usuario_id_destino
+        HAVING MIN(data_criacao) <= datetime('now', ?)
+    """, (f"-{intervalo_min} minutes",))]
+    if not destinos:
+        return {'digests': 0, 'alertas': 0}
+
+    marcadores = _placeholders(destinos)
+    # data_criacao é gravada em UTC; o email mostra o horário local, como
+    # o alerta imediato (utils/notifications.py)
+    alertas = [dict(row) for row in conn.execute(f"""
+        UPDATE notificacoes
+        SET email_pendente = 0
+        WHERE email_pendente = 1 AND usuario_id_destino IN ({marcadores})
+        RETURNING id, usuario_id_destino, pet_id, nivel_prioridade, percentual_dor,
+                  datetime(data_criacao, 'localtime') AS data_criacao
+    """, destinos)]
+
+    usuarios = {row[0]: (row[1], row[2]) for row in conn.execute(
+        f"SELECT id, nome, email FROM usuarios WHERE id IN ({marcadores}) AND ativo = 1",
+        destinos,
+    )}
+    pet_ids = sorted({a["pet_id"] for a in alertas})
+    pets = dict(conn.execute(
+        f"SELECT id, nome FROM pets WHERE id IN ({_placeholders(pet_ids)})", pet_ids
+    ).fetchall()) if pet_ids else {}
+
+    por_destino: Dict[int, List[dict]] = defaultdict(list)
+    for a in alertas:
+        por_destino[a["usuario_id_destino"]].append(a)
+
+    digests = 0
+    for destino_id, lista in por_destino.items():
+        usuario = usuarios.get(destino_id)
+        if usuario is None or not usuario[1]:
+            continue  # Usuário desativado: alertas seguem só no app
+        nome, email = usuario
+        periodo = f"desde {_hora(min(a['data_criacao'] for a in lista))}"
+        enviar_email_renderizado(
+            email, renderizar_digest(nome, periodo, _itens(lista, pets)), "digest", conn=conn
+        )
+        digests += 1
+
+    return {'digests': digests, 'alertas': len(alertas)}
+
+
+def gerar_digests(intervalo_min: int = None) -> dict:
+    """
+    Enfileira um digest para cada destinatário cuja janela venceu.
+
+    Retorna {'digests': emails enfileirados, 'alertas': alertas agrupados}.
+    """
+    intervalo_min = DIGEST_CONFIG['intervalo_min'] if intervalo_min is None else intervalo_min
+    try:
+        resultado = executar_escrita(_gerar_digests, intervalo_min)
+        if resultado['digests']:
+            logger.info(
+                f"Digest: {resultado['alertas']} alertas agrupados em {resultado['digests']} emails"
+            )
+        return resultado
+
+    except Exception as e:
+        logger.error(f"[ERRO] gerar_digests: {e}")
+        return {'digests': 0, 'alertas': 0}
@@ -1,5 +1,14 @@
 """
-Envio de emails para recuperação de senha
+Envio de emails do PETDOR
+
+As páginas não falam com o SMTP: `enviar_email_reset()` e
+`enviar_email_notificacao()` só gravam a mensagem na outbox
+(database/outbox.py) e retornam. O envio de verdade, com novas
+tentativas, é feito pelo trabalhador de utils/email_worker.py, que usa
+`montar_mensagem()` e `enviar_mensagem()` daqui.
+
+Sem SENHA_EMAIL configurada o sistema fica em modo demo: nada é
+enfileirado e o conteúdo relevante (ex.: o link de reset) vai para o log.
 """
 import sys
 from pathlib import Path
@@ -9,19 +18,156 @@ root_path = Path(__file__).parent.parent
 if str(root_path) not in sys.path:
     sys.path.insert(0, str(root_path))
 
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from typing import List, Optional
 import logging
 import os
-import ssl
+
+from database.outbox import enfileirar_email
+from utils.email_templates import renderizar_email
+from utils.smtp_pool import obter_pool
 
 logger = logging.getLogger(__name__)
 
+URL_APP = "https://petdor.streamlit.app"
+
+
+# ---------------------------------------------------------
+# ✉️ Transporte SMTP (usado pelo trabalhador da outbox)
+# ---------------------------------------------------------
+def config_smtp() -> dict:
+    """Configuração SMTP (secrets do Streamlit ou variáveis de ambiente)."""
+    try:
+        import streamlit as st
+        return {
+            'servidor': st.secrets.get('SMTP_SERVER', 'smtpout.secureserver.net'),
+            'porta': int(st.secrets.get('SMTP_PORT', '465')),
+            'remetente': st.secrets.get('EMAIL_REMETENTE', 'relatorio@petdor.app'),
+            'senha': st.secrets.get('SENHA_EMAIL'),
+        }
+    except:
+        # Fallback para variáveis de ambiente
+        return {
+            'servidor': os.getenv('SMTP_SERVER', 'smtpout.secureserver.net'),
+            'porta': int(os.getenv('SMTP_PORT', '465')),
+            'remetente': os.getenv('EMAIL_REMETENTE', 'relatorio@petdor.app'),
+            'senha': os.getenv('SENHA_EMAIL'),
+        }
+
+
+def montar_mensagem(destinatario: str, assunto: str, corpo_texto: Optional[str] = None,
+                    corpo_html: Optional[str] = None, remetente: Optional[str] = None):
+    """Mensagem MIME com as versões texto e/ou HTML do corpo."""
+    remetente = remetente or config_smtp()['remetente']
+
+    msg = MIMEMultipart('alternative')
+    msg['From'] = f"PETDor <{remetente}>"
+    msg['To'] = destinatario
+    msg['Subject'] = assunto
+
+    # Texto primeiro: clientes de email mostram a última parte que entendem
+    if corpo_texto:
+        msg.attach(MIMEText(corpo_texto, 'plain', 'utf-8'))
+    if corpo_html:
+        msg.attach(MIMEText(corpo_html, 'html', 'utf-8'))
+    return msg
+
+
+def enviar_mensagens(mensagens: list, config: Optional[dict] = None) -> List[Optional[Exception]]:
+    """
+    Envia um lote de mensagens pelas sessões reutilizáveis do pool SMTP
+    (utils/smtp_pool.py). Retorna, para cada mensagem, None ou a exceção
+    do envio: quem decide se tenta de novo é o trabalhador da outbox.
+    """
+    return obter_pool(config or config_smtp()).enviar_lote(mensagens)
+
+
+def enviar_mensagem(msg, config: Optional[dict] = None):
+    """Envia uma mensagem; exceções do smtplib/rede são repassadas."""
+    erro = enviar_mensagens([msg], config)[0]
+    if erro is not None:
+        raise erro
+
+
+# ---------------------------------------------------------
+# 📮 Envio via outbox (usado pelas páginas)
+# ---------------------------------------------------------
+def _enfileirar(destinatario, assunto, corpo_texto=None, corpo_html=None,
+                tipo=None, conn=None) -> int:
+    email_id = enfileirar_email(destinatario, assunto, corpo_texto, corpo_html, tipo, conn=conn)
+    if conn is None:
+        # Import tardio: o trabalhador importa este módulo
+        from utils.email_worker import acordar_trabalhador
+        acordar_trabalhador()
+    return email_id
+
+
+def enviar_email_notificacao(destinatario, assunto, corpo, html=True, conn=None):
+    """
+    Enfileira um email de notificação.
+
+    Com `conn` (dentro de executar_escrita), o email é gravado na mesma
+    transação do chamador; quem chama acorda o trabalhador depois do
+    commit (acordar_trabalhador).
+
+    Returns:
+        Tupla (sucesso, mensagem)
+    """
+    if not config_smtp()['senha']:
+        logger.info(f"[DEMO] Notificação para {destinatario}: {assunto}")
+        return True, "Notificação registrada (modo demo - configure SENHA_EMAIL para envio real)"
+
+    if html:
+        _enfileirar(destinatario, assunto, corpo_html=corpo, tipo="notificacao", conn=conn)
+    else:
+        _enfileirar(destinatario, assunto, corpo_texto=corpo, tipo="notificacao", conn=conn)
+    return True, "Notificação enfileirada para envio"
+
+
+def enviar_email_renderizado(destinatario, email, tipo, conn=None):
+    """
+    Enfileira um email já renderizado (EmailRenderizado de
+    utils/email_templates.py). `conn` como em enviar_email_notificacao.
+
+    Returns:
+        Tupla (sucesso, mensagem)
+    """
+    if not config_smtp()['senha']:
+        logger.info(f"[DEMO] Email '{tipo}' para {destinatario}: {email.assunto}")
+        return True, "Email registrado (modo demo - configure SENHA_EMAIL para envio real)"
+
+    _enfileirar(destinatario, *email, tipo=tipo, conn=conn)
+    return True, "Email enfileirado para envio"
+
+
+def enviar_email_modelo(destinatario, modelo, conn=None, **campos):
+    """Renderiza o modelo `modelo` com os campos e enfileira (ver enviar_email_renderizado)."""
+    return enviar_email_renderizado(
+        destinatario, renderizar_email(modelo, **campos), modelo, conn=conn
+    )
+
+
+def enviar_email_confirmacao(email_destino, nome, token):
+    """
+    Enfileira o email de confirmação de cadastro
+
+    Returns:
+        Tupla (sucesso, mensagem)
+    """
+    try:
+        return enviar_email_modelo(
+            email_destino, "confirmacao",
+            nome=nome, link=f"{URL_APP}/confirmar_email?token={token}",
+        )
+    except Exception as e:
+        logger.error(f"Erro inesperado ao enfileirar confirmação: {e}")
+        return False, "Erro ao enviar email. Tente novamente mais tarde."
+
 
 def enviar_email_reset(email_destino, token):
     """
-    Envia email de reset de senha via GoDaddy
+    Enfileira o email de reset de senha (enviado pelo trabalhador da outbox)
 
     Args:
         email_destino: Email do destinatário
@@ -31,158 +177,18 @@ def enviar_email_reset(email_destino, token):
         Tupla (sucesso, mensagem)
     """
     try:
-        # Configurações de email (via secrets do Streamlit ou variáveis de ambiente)
-        try:
-            import streamlit as st
-            smtp_server = st.secrets.get('SMTP_SERVER', 'smtpout.secureserver.net')
-            smtp_port = int(st.secrets.get('SMTP_PORT', '465'))
-            email_remetente = st.secrets.get('EMAIL_REMETENTE', 'relatorio@petdor.app')
-            senha_email = st.secrets.get('SENHA_EMAIL')
-        except:
-            # Fallback para variáveis de ambiente
-            smtp_server = os.getenv('SMTP_SERVER', 'smtpout.secureserver.net')
-            smtp_port = int(os.getenv('SMTP_PORT', '465'))
-            email_remetente = os.getenv('EMAIL_REMETENTE', 'relatorio@petdor.app')
-            senha_email = os.getenv('SENHA_EMAIL')
-
         # Verifica se a senha está configurada
-        if not senha_email:
+        if not config_smtp()['senha']:
             logger.warning("Senha de email não configurada")
             logger.info(f"[DEMO] Token gerado: {token}")
-            logger.info(f"[DEMO] Link: https://petdor.streamlit.app/reset_senha?token={token}")
+            logger.info(f"[DEMO] Link: {URL_APP}/reset_senha?token={token}")
             return True, "Email enviado (modo demo - configure SENHA_EMAIL para envio real)"
 
-        # Cria a mensagem
-        msg = MIMEMultipart('alternative')
-        msg['From'] = f"PETDor <{email_remetente}>"
-        msg['To'] = email_destino
-        msg['Subject'] = "PETDor - Recuperação de Senha"
-
-        # Corpo do email em texto simples
-        texto_simples = f"""
-Olá!
-
-Você solicitou a recuperação de senha da sua conta PETDor.
-
-Para redefinir sua senha, clique no link abaixo:
-https://petdor.streamlit.app/reset_senha?token={token}
-
-⚠️ Este link expira em 1 hora por questões de segurança.
-
-Se você não solicitou esta recuperação, ignore este email.
-
-Atenciosamente,
-Equipe PETDor
-        """
-
-        # Corpo do email em HTML
-        texto_html = f"""
-        <html>
-          <head>
-            <style>
-              body {{
-                font-family: Arial, sans-serif;
-                line-height: 1.6;
-                color: #333;
-              }}
-              .container {{
-                max-width: 600px;
-                margin: 0 auto;
-                padding: 20px;
-                background-color: #f9f9f9;
-                border-radius: 10px;
-              }}
-              .header {{
-                background: linear-gradient(135deg, #AEE3FF, #C7F9CC);
-                padding: 20px;
-                text-align: center;
-                border-radius: 10px 10px 0 0;
-              }}
-              .content {{
-                background: white;
-                padding: 30px;
-                border-radius: 0 0 10px 10px;
-              }}
-              .button {{
-                display: inline-block;
-                padding: 15px 30px;
-                background-color: #28a745;
-                color: white;
-                text-decoration: none;
-                border-radius: 5px;
-                margin: 20px 0;
-                font-weight: bold;
-              }}
-              .warning {{
-                background-color: #fff3cd;
-                border-left: 4px solid #ffc107;
-                padding: 10px;
-                margin: 20px 0;
-              }}
-              .footer {{
-                text-align: center;
-                color: #666;
-                font-size: 12px;
-                margin-top: 20px;
-              }}
-            </style>
-          </head>
-          <body>
-            <div class="container">
-              <div class="header">
-                <h1 style="margin: 0; color: #2d3748;">🐾 PETDor</h1>
-                <p style="margin: 5px 0; color: #4a5568;">Recuperação de Senha</p>
-              </div>
-              <div class="content">
-                <p>Olá!</p>
-                <p>Você solicitou a recuperação de senha da sua conta PETDor.</p>
-                <p>Para redefinir sua senha, clique no botão abaixo:</p>
-                <div style="text-align: center;">
-                  <a href="https://petdor.streamlit.app/reset_senha?token={token}" class="button">
-                    Redefinir Senha
-                  </a>
-                </div>
-                <div class="warning">
-                  <strong>⚠️ Atenção:</strong> Este link expira em 1 hora por questões de segurança.
-                </div>
-                <p>Se você não solicitou esta recuperação, ignore este email.</p>
-                <p>Atenciosamente,<br><strong>Equipe PETDor</strong></p>
-              </div>
-              <div class="footer">
-                <p>Este é um email automático, por favor não responda.</p>
-                <p>&copy; 2024 PETDor - Todos os direitos reservados</p>
-              </div>
-            </div>
-          </body>
-        </html>
-        """
-
-        # Anexa as versões texto e HTML
-        parte_texto = MIMEText(texto_simples, 'plain', 'utf-8')
-        parte_html = MIMEText(texto_html, 'html', 'utf-8')
-
-        msg.attach(parte_texto)
-        msg.attach(parte_html)
-
-        # Conecta ao servidor SMTP GoDaddy (usa SSL na porta 465)
-        logger.info(f"Conectando ao servidor SMTP GoDaddy: {smtp_server}:{smtp_port}")
-
-        context = ssl.create_default_context()
-
-        with smtplib.SMTP_SSL(smtp_server, smtp_port, context=context) as server:
-            server.login(email_remetente, senha_email)
-            server.send_message(msg)
-
-        logger.info(f"Email de reset enviado com sucesso para: {email_destino}")
-        return True, "Email enviado com sucesso! Verifique sua caixa de entrada."
-
-    except smtplib.SMTPAuthenticationError:
-        logger.error("Erro de autenticação SMTP - verifique email e senha")
-        return False, "Erro ao enviar email - credenciais inválidas"
-
-    except smtplib.SMTPException as e:
-        logger.error(f"Erro SMTP: {e}")
-        return False, f"Erro ao enviar email: {str(e)}"
+        email = renderizar_email("reset_senha", link=f"{URL_APP}/reset_senha?token={token}")
+        _enfileirar(email_destino, *email, tipo="reset_senha")
+
+        logger.info(f"Email de reset enfileirado para: {email_destino}")
+        return True, "Email enviado com sucesso! Verifique sua caixa de entrada em alguns minutos."
 
     except Exception as e:
         logger.error(f"Erro inesperado ao enviar email: {e}")
@@ -0,0 +1,300 @@
+"""
+Modelos de email do PETDOR (compilados uma vez)
+
+Cada modelo (reset de senha, confirmação de email, alerta de dor e
+resumo/digest) tem assunto, corpo em texto e corpo em HTML. Na
+importação do módulo cada fonte é compilada: o layout comum, o CSS e
+todo o texto fixo viram trechos literais prontos, e só os campos
+personalizados ficam para a hora do envio. Renderizar é escapar os
+valores dos campos e juntar tudo com um único "".join():
+
+    email = renderizar_email("reset_senha", link="https://...")
+    email.assunto, email.texto, email.html
+
+Sintaxe das fontes: `{campo}` marca um campo; chaves literais são
+escritas `{{` e `}}`. No HTML os valores são escapados, exceto os campos
+terminados em `_html` (fragmentos já renderizados por outro modelo,
+como os itens do digest).
+"""
+
+import html
+from dataclasses import dataclass
+from string import Formatter
+from typing import Dict, List, NamedTuple, Tuple
+
+
+class ErroModelo(ValueError):
+    """Fonte de modelo inválida ou campo faltando na renderização."""
+
+
+class ModeloCompilado:
+    """Fonte já dividida em trechos literais e nomes de campos."""
+
+    __slots__ = ("nome", "literais", "campos", "escapar")
+
+    def __init__(self, nome: str, fonte: str, escapar: bool):
+        literais: List[str] = []
+        campos: List[str] = []
+        atual = []
+        for literal, campo, formato, conversao in Formatter().parse(fonte):
+            atual.append(literal)
+            if campo is None:
+                continue
+            if not campo.isidentifier() or formato or conversao:
+                raise ErroModelo(f"Modelo '{nome}': campo inválido {{{campo}}}")
+            literais.append("".join(atual))
+            campos.append(campo)
+            atual = []
+        literais.append("".join(atual))
+
+        self.nome = nome
+        self.literais: Tuple[str, ...] = tuple(literais)
+        self.campos: Tuple[str, ...] = tuple(campos)
+        # Por campo: escapa o valor? (HTML, exceto fragmentos *_html)
+        self.escapar: Tuple[bool, ...] = tuple(
+            escapar and not c.endswith("_html") for c in campos
+        )
+
+    def renderizar(self, campos: Dict[str, object]) -> str:
+        if not self.campos:
+            return self.literais[0]
+
+        saida = [""] * (2 * len(self.campos) + 1)
+        saida[0::2] = self.literais
+        try:
+            for i, (campo, escapar) in enumerate(zip(self.campos, self.escapar)):
+                valor = str(campos[campo])
+                saida[2 * i + 1] = html.escape(valor) if escapar else valor
+        except KeyError as e:
+            raise ErroModelo(f"Modelo '{self.nome}': falta o campo {e}") from None
+        return "".join(saida)
+
+
+class EmailRenderizado(NamedTuple):
+    assunto: str
+    texto: str
+    html: str
+
+
+@dataclass(frozen=True)
+class ModeloEmail:
+    nome: str
+    assunto: ModeloCompilado
+    texto: ModeloCompilado
+    html: ModeloCompilado
+
+    def renderizar(self, **campos) -> EmailRenderizado:
+        return EmailRenderizado(
+            self.assunto.renderizar(campos),
+            self.texto.renderizar(campos),
+            self.html.renderizar(campos),
+        )
+
+
+# ---------------------------------------------------------
+# 🎨 Layout comum (CSS entra uma vez, na compilação)
+# ---------------------------------------------------------
+_CSS = """
+      body { font-family: Arial, sans-serif; line-height: 1.6; color: #333; }
+      .container { max-width: 600px; margin: 0 auto; padding: 20px; background-color: #f9f9f9; border-radius: 10px; }
+      .header { background: linear-gradient(135deg, #AEE3FF, #C7F9CC); padding: 20px; text-align: center; border-radius: 10px 10px 0 0; }
+      .content { background: white; padding: 30px; border-radius: 0 0 10px 10px; }
+      .button { display: inline-block; padding: 15px 30px; background-color: #28a745; color: white; text-decoration: none; border-radius: 5px; margin: 20px 0; font-weight: bold; }
+      .warning { background-color: #fff3cd; border-left: 4px solid #ffc107; padding: 10px; margin: 20px 0; }
+      .alerta { border-collapse: collapse; width: 100%; }
+      .alerta td, .alerta th { border-bottom: 1px solid #eee; padding: 8px; text-align: left; }
+      .footer { text-align: center; color: #666; font-size: 12px; margin-top: 20px; }
+"""
+
+_LAYOUT = """<html>
+  <head>
+    <style>/*CSS*/</style>
+  </head>
+  <body>
+    <div class="container">
+      <div class="header">
+        <h1 style="margin: 0; color: #2d3748;">🐾 PETDor</h1>
+        <p style="margin: 5px 0; color: #4a5568;">/*SUBTITULO*/</p>
+      </div>
+      <div class="content">
+/*CONTEUDO*/
+      </div>
+      <div class="footer">
+        <p>Este é um email automático, por favor não responda.</p>
+        <p>&copy; 2024 PETDor - Todos os direitos reservados</p>
+      </div>
+    </div>
+  </body>
+</html>
+"""
+
+
+def _escapar_chaves(texto: str) -> str:
+    return texto.replace("{", "{{").replace("}", "}}")
+
+
+def _html(subtitulo: str, conteudo: str) -> str:
+    """Fonte HTML completa: layout + CSS + conteúdo do modelo."""
+    return (
+        _LAYOUT
+        .replace("/*CSS*/", _escapar_chaves(_CSS))
+        .replace("/*SUBTITULO*/", subtitulo)
+        .replace("/*CONTEUDO*/", conteudo)
+    )
+
+
+# ---------------------------------------------------------
+# 📝 Fontes dos modelos
+# ---------------------------------------------------------
+_FONTES = {
+    "reset_senha": {
+        'assunto': "PETDor - Recuperação de Senha",
+        'texto': """Olá!
+
+Você solicitou a recuperação de senha da sua conta PETDor.
+
+Para redefinir sua senha, clique no link abaixo:
+{link}
+
+⚠️ Este link expira em 1 hora por questões de segurança.
+
+Se você não solicitou esta recuperação, ignore este email.
+
+Atenciosamente,
+Equipe PETDor
+""",
+        'html': _html("Recuperação de Senha", """
+        <p>Olá!</p>
+        <p>Você solicitou a recuperação de senha da sua conta PETDor.</p>
+        <p>Para redefinir sua senha, clique no botão abaixo:</p>
+        <div style="text-align: center;">
+          <a href="{link}" class="button">Redefinir Senha</a>
+        </div>
+        <div class="warning">
+          <strong>⚠️ Atenção:</strong> Este link expira em 1 hora por questões de segurança.
+        </div>
+        <p>Se você não solicitou esta recuperação, ignore este email.</p>
+        <p>Atenciosamente,<br><strong>Equipe PETDor</strong></p>"""),
+    },
+
+    "confirmacao": {
+        'assunto': "PETDor - Confirme seu email",
+        'texto': """Olá, {nome}!
+
+Bem-vindo(a) ao PETDor. Para ativar sua conta, confirme seu email pelo link abaixo:
+{link}
+
+O link expira em 24 horas.
+
+Se você não criou uma conta no PETDor, ignore este email.
+
+Atenciosamente,
+Equipe PETDor
+""",
+        'html': _html("Confirmação de Email", """
+        <p>Olá, {nome}!</p>
+        <p>Bem-vindo(a) ao PETDor. Para ativar sua conta, confirme seu email:</p>
+        <div style="text-align: center;">
+          <a href="{link}" class="button">Confirmar Email</a>
+        </div>
+        <p>O link expira em 24 horas.</p>
+        <p>Se você não criou uma conta no PETDor, ignore este email.</p>
+        <p>Atenciosamente,<br><strong>Equipe PETDor</strong></p>"""),
+    },
+
+    "alerta_dor": {
+        'assunto': "{titulo}",
+        'texto': """{titulo}
+
+Pet: {pet_nome}
+Nível de dor: {percentual}% ({nivel})
+Data: {data}
+Observações: {observacoes}
+
+Ver histórico completo: {link}
+""",
+        'html': _html("Alerta de Dor", """
+        <h2>{titulo}</h2>
+        <p><strong>Pet:</strong> {pet_nome}</p>
+        <p><strong>Nível de dor:</strong> {percentual}% ({nivel})</p>
+        <p><strong>Data:</strong> {data}</p>
+        <p><strong>Observações:</strong> {observacoes}</p>
+        <div style="text-align: center;">
+          <a href="{link}" class="button">📊 Ver Histórico Completo</a>
+        </div>"""),
+    },
+
+    "digest": {
+        'assunto': "PETDor - {total} alertas de dor ({periodo})",
+        'texto': """Olá, {nome}!
+
+Resumo dos alertas de dor dos seus pacientes ({periodo}):
+
+{itens_texto}
+Os alertas também estão nas suas notificações no PETDor.
+
+Atenciosamente,
+Equipe PETDor
+""",
+        'html': _html("Resumo de Alertas de Dor", """
+        <p>Olá, {nome}!</p>
+        <p>Resumo dos alertas de dor dos seus pacientes ({periodo}):</p>
+        <table class="alerta">
+          <tr><th>Pet</th><th>Dor</th><th>Alertas</th><th>Último</th></tr>
+{itens_html}
+        </table>
+        <p>Os alertas também estão nas suas notificações no PETDor.</p>
+        <p>Atenciosamente,<br><strong>Equipe PETDor</strong></p>"""),
+    },
+}
+
+# Linha de um pet no digest (HTML e texto)
+_ITEM_DIGEST_HTML = ModeloCompilado(
+    "item_digest",
+    """          <tr><td><a href="{link}">{pet_nome}</a></td><td>{emoji} {maximo}% ({nivel})</td><td>{alertas}</td><td>{ultimo}</td></tr>
+""",
+    escapar=True,
+)
+_ITEM_DIGEST_TEXTO = ModeloCompilado(
+    "item_digest",
+    "- {pet_nome}: até {maximo}% ({nivel}), {alertas} alerta(s), último em {ultimo}\n",
+    escapar=False,
+)
+
+
+def _compilar(nome: str, fontes: Dict[str, str]) -> ModeloEmail:
+    return ModeloEmail(
+        nome=nome,
+        assunto=ModeloCompilado(nome, fontes['assunto'], escapar=False),
+        texto=ModeloCompilado(nome, fontes['texto'], escapar=False),
+        html=ModeloCompilado(nome, fontes['html'], escapar=True),
+    )
+
+
+# Compilados uma única vez, na importação
+MODELOS: Dict[str, ModeloEmail] = {nome: _compilar(nome, f) for nome, f in _FONTES.items()}
+
+
+# ---------------------------------------------------------
+# ✉️ API
+# ---------------------------------------------------------
+def renderizar_email(nome: str, **campos) -> EmailRenderizado:
+    """Assunto, texto e HTML do modelo `nome` com os campos preenchidos."""
+    modelo = MODELOS.get(nome)
+    if modelo is None:
+        raise ErroModelo(f"Modelo de email desconhecido: {nome!r}")
+    return modelo.renderizar(**campos)
+
+
+def renderizar_digest(nome: str, periodo: str, itens: List[dict]) -> EmailRenderizado:
+    """
+    Email de resumo com uma linha por pet. Cada item traz pet_nome,
+    link, emoji, maximo, nivel, alertas e ultimo.
+    """
+    return MODELOS["digest"].renderizar(
+        nome=nome,
+        periodo=periodo,
+        total=sum(int(i["alertas"]) for i in itens),
+        itens_html="".join(_ITEM_DIGEST_HTML.renderizar(i) for i in itens),
+        itens_texto="".join(_ITEM_DIGEST_TEXTO.renderizar(i) for i in itens),
+    )
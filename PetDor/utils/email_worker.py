@@ -0,0 +1,255 @@
+"""
+Trabalhador da outbox de emails do PETDOR
+
+Esvazia a tabela email_outbox (database/outbox.py): reserva um lote de
+emails vencidos, envia cada um via SMTP e registra o resultado. A cada
+ciclo também enfileira os digests de alertas vencidos (utils/digest.py).
+
+- servidor fora do ar ou login recusado: o lote volta para a fila sem
+  gastar tentativas, com espera exponencial pelas falhas seguidas do
+  servidor (até OUTBOX_BACKOFF_MAX);
+- falha temporária da mensagem (respostas 4xx): o email volta para a
+  fila com espera exponencial e gasta uma tentativa;
+- falha definitiva (destinatário recusado, respostas 5xx): o email vai
+  direto para "morto", sem novas tentativas.
+
+Duas formas de rodar:
+
+- embutido (padrão): uma thread daemon no processo do Streamlit, iniciada
+  uma vez na carga do app (iniciar_trabalhador) e acordada a cada email
+  enfileirado;
+- processo separado (EMAIL_WORKER_EMBUTIDO=0 no app):
+
+    python -m utils.email_worker            # roda até Ctrl+C
+    python -m utils.email_worker --uma-vez  # envia o que está vencido e sai
+
+Configuração: EMAIL_WORKER_LOTE (padrão 20), EMAIL_WORKER_INTERVALO
+(segundos entre consultas à fila quando ela está vazia, padrão 15),
+EMAIL_WORKER_EMBUTIDO (padrão 1).
+"""
+import sys
+from pathlib import Path
+
+# Adiciona a raiz do projeto ao path
+root_path = Path(__file__).parent.parent
+if str(root_path) not in sys.path:
+    sys.path.insert(0, str(root_path))
+
+import argparse
+import logging
+import os
+import smtplib
+import threading
+import time
+
+from database.outbox import (
+    MORTO,
+    adiar,
+    espera_backoff,
+    marcar_enviados,
+    metricas_outbox,
+    registrar_falha,
+    reenviar_mortos,
+    reservar_lote,
+)
+from utils.digest import gerar_digests
+from utils.email_sender import config_smtp, enviar_mensagens, montar_mensagem
+from utils.smtp_pool import erro_de_conexao, fechar_pools, metricas_smtp
+
+logger = logging.getLogger(__name__)
+
+EMAIL_WORKER_CONFIG = {
+    'lote': int(os.getenv("EMAIL_WORKER_LOTE", "20")),
+    'intervalo': float(os.getenv("EMAIL_WORKER_INTERVALO", "15")),
+    'embutido': os.getenv("EMAIL_WORKER_EMBUTIDO", "1") == "1",
+}
+
+
+def falha_definitiva(erro: Exception) -> bool:
+    """True se tentar de novo não adianta (o problema é a mensagem, não o servidor)."""
+    if isinstance(erro, smtplib.SMTPRecipientsRefused):
+        return True
+    if isinstance(erro, smtplib.SMTPAuthenticationError):
+        return False  # Configuração errada: os emails esperam a correção
+    if isinstance(erro, smtplib.SMTPResponseException):
+        return 500 <= erro.smtp_code < 600
+    return False
+
+
+def falha_do_servidor(erro: Exception) -> bool:
+    """True se a falha não é da mensagem: sem conexão ou login recusado."""
+    return erro_de_conexao(erro) or isinstance(erro, smtplib.SMTPAuthenticationError)
+
+
+class TrabalhadorEmail:
+    """Envia os emails da outbox numa thread dedicada."""
+
+    def __init__(self, lote: int, intervalo: float):
+        self.lote = lote
+        self.intervalo = intervalo
+        self._thread = None
+        self._acordar = threading.Event()
+        self._parar = threading.Event()
+        self._lock = threading.Lock()
+        self._falhas_servidor = 0   # Lotes seguidos sem conseguir falar com o SMTP
+        self._metricas = {'enviados': 0, 'falhas': 0, 'mortos': 0, 'adiados': 0, 'lotes': 0}
+
+    def processar_lote(self) -> int:
+        """Envia um lote de emails vencidos; retorna quantos foram reservados."""
+        emails = reservar_lote(self.lote)
+        if not emails:
+            return 0
+
+        config = config_smtp()
+        mensagens = [
+            montar_mensagem(e["destinatario"], e["assunto"], e["corpo_texto"],
+                            e["corpo_html"], config['remetente'])
+            for e in emails
+        ]
+        # O lote inteiro sai pelas mesmas sessões SMTP (utils/smtp_pool.py)
+        erros = enviar_mensagens(mensagens, config)
+
+        enviados, adiados, erro_servidor = [], [], None
+        for email, erro in zip(emails, erros):
+            if erro is None:
+                enviados.append(email["id"])
+                continue
+            if falha_do_servidor(erro):
+                adiados.append(email["id"])
+                erro_servidor = erro
+                continue
+            status = registrar_falha(email["id"], f"{type(erro).__name__}: {erro}",
+                                     definitiva=falha_definitiva(erro))
+            logger.warning(f"Falha ao enviar email {email['id']} para "
+                           f"{email['destinatario']}: {erro}")
+            with self._lock:
+                self._metricas['mortos' if status == MORTO else 'falhas'] += 1
+
+        marcar_enviados(enviados)
+
+        if enviados:
+            self._falhas_servidor = 0
+        if adiados:
+            self._falhas_servidor += 1
+            espera = espera_backoff(self._falhas_servidor)
+            adiar(adiados, f"{type(erro_servidor).__name__}: {erro_servidor}", espera)
+            logger.warning(f"Servidor SMTP indisponível ({erro_servidor}); "
+                           f"{len(adiados)} emails adiados por {espera:.0f}s")
+
+        with self._lock:
+            self._metricas['enviados'] += len(enviados)
+            self._metricas['adiados'] += len(adiados)
+            self._metricas['lotes'] += 1
+        return len(emails)
+
+    def drenar(self) -> int:
+        """Processa lotes até não haver email vencido; retorna o total reservado."""
+        total = 0
+        while not self._parar.is_set():
+            quantidade = self.processar_lote()
+            total += quantidade
+            if quantidade < self.lote or self._falhas_servidor:
+                break   # Fila vazia, ou servidor fora: o resto espera o próximo ciclo
+        return total
+
+    def _loop(self):
+        while not self._parar.is_set():
+            try:
+                gerar_digests()
+                self.drenar()
+            except Exception as e:
+                # Banco indisponível etc.: tenta de novo no próximo ciclo
+                logger.error(f"[ERRO] TrabalhadorEmail: {e}")
+            self._acordar.wait(self.intervalo)
+            self._acordar.clear()
+
+    def iniciar(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._parar.clear()
+                self._thread = threading.Thread(
+                    target=self._loop, name="petdor-email", daemon=True
+                )
+                self._thread.start()
+
+    def acordar(self):
+        """Inicia a thread, se preciso, e faz ela olhar a fila agora."""
+        self.iniciar()
+        self._acordar.set()
+
+    def parar(self, timeout: float = None):
+        self._parar.set()
+        self._acordar.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def metricas(self) -> dict:
+        with self._lock:
+            return dict(self._metricas)
+
+
+_trabalhador = TrabalhadorEmail(
+    lote=EMAIL_WORKER_CONFIG['lote'],
+    intervalo=EMAIL_WORKER_CONFIG['intervalo'],
+)
+
+
+def iniciar_trabalhador():
+    """
+    Garante a thread de envio rodando, sem acordá-la (barato o bastante
+    para cada rerun do Streamlit). O primeiro ciclo já envia o que
+    ficou na outbox.
+    """
+    if EMAIL_WORKER_CONFIG['embutido']:
+        _trabalhador.iniciar()
+
+
+def acordar_trabalhador():
+    """Avisa que há email novo na outbox (no-op se o envio roda em outro processo)."""
+    if EMAIL_WORKER_CONFIG['embutido']:
+        _trabalhador.acordar()
+
+
+def metricas_email() -> dict:
+    """Métricas do trabalhador deste processo, da outbox e das sessões SMTP."""
+    return {**_trabalhador.metricas(), 'outbox': metricas_outbox(), 'smtp': metricas_smtp()}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Envia os emails da outbox do PETDOR")
+    parser.add_argument("--uma-vez", action="store_true",
+                        help="Envia os emails vencidos e sai")
+    parser.add_argument("--reenviar-mortos", action="store_true",
+                        help="Devolve os emails mortos para a fila antes de começar")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    from database.migration import migrar_banco_completo
+    migrar_banco_completo()
+
+    if args.reenviar_mortos:
+        logger.info(f"{reenviar_mortos()} emails mortos devolvidos para a fila")
+
+    if args.uma_vez:
+        gerar_digests()
+        _trabalhador.drenar()
+        logger.info(f"Métricas: {metricas_email()}")
+        fechar_pools()
+        return 0
+
+    _trabalhador.iniciar()
+    try:
+        while True:
+            time.sleep(60)
+            logger.info(f"Métricas: {metricas_email()}")
+    except KeyboardInterrupt:
+        _trabalhador.parar()
+    fechar_pools()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
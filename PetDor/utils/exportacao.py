@@ -0,0 +1,253 @@
+"""
+Exportação em streaming (CSV e Parquet) do PETDOR
+
+Usuários, pets, avaliações e respostas saem do SQLite em lotes pelos
+iteradores keyset (database/paginacao.py), sem nunca montar a tabela
+inteira em memória:
+
+- CSV: `exportar_csv(entidade)` é um gerador de pedaços de texto
+  (cabeçalho + um pedaço por lote), bom para gravar em arquivo ou
+  responder em streaming;
+- Parquet: `exportar_parquet(entidade, destino)` grava um row group por
+  lote, com os tipos das colunas (inteiros, reais, booleanos, datas).
+  O pyarrow só é importado aqui, quando um Parquet é pedido.
+
+Pela linha de comando:
+
+    python -m utils.exportacao avaliacoes --formato parquet --saida avaliacoes.parquet
+    python -m utils.exportacao todas --formato csv --saida exportacao/
+
+Configuração: EXPORTACAO_TAMANHO_LOTE (padrão 1000 linhas por lote).
+"""
+import sys
+from pathlib import Path
+
+# Adiciona a raiz do projeto ao path
+root_path = Path(__file__).parent.parent
+if str(root_path) not in sys.path:
+    sys.path.insert(0, str(root_path))
+
+import argparse
+import csv
+import io
+import logging
+import os
+from dataclasses import dataclass
+from datetime import date, datetime
+from itertools import islice
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from database.avaliacoes import iterar_respostas
+from database.paginacao import iterar_avaliacoes, iterar_pets, iterar_usuarios
+
+logger = logging.getLogger(__name__)
+
+EXPORTACAO_CONFIG = {
+    'tamanho_lote': int(os.getenv("EXPORTACAO_TAMANHO_LOTE", "1000")),
+}
+
+FORMATOS = ("csv", "parquet")
+
+
+# ---------------------------------------------------------
+# 📐 Entidades exportáveis
+#     Tipos: int, float, bool, text, data (AAAA-MM-DD), timestamp
+# ---------------------------------------------------------
+@dataclass(frozen=True)
+class Exportacao:
+    nome: str
+    colunas: Tuple[Tuple[str, str], ...]                 # (coluna, tipo)
+    iterar: Callable[[int], Iterator[dict]]              # tamanho_lote -> linhas
+
+    @property
+    def nomes_colunas(self) -> List[str]:
+        return [nome for nome, _ in self.colunas]
+
+
+ENTIDADES: Dict[str, Exportacao] = {
+    e.nome: e for e in (
+        Exportacao(
+            "usuarios",
+            (("id", "int"), ("nome", "text"), ("email", "text"),
+             ("data_criacao", "timestamp"), ("ativo", "bool"), ("tipo_usuario", "text")),
+            lambda lote: iterar_usuarios(tamanho_lote=lote),
+        ),
+        Exportacao(
+            "pets",
+            (("id", "int"), ("tutor_id", "int"), ("nome", "text"), ("especie", "text"),
+             ("raca", "text"), ("peso", "float"), ("idade", "int"), ("sexo", "text"),
+             ("data_nascimento", "data"), ("data_cadastro", "timestamp")),
+            lambda lote: iterar_pets(tamanho_lote=lote),
+        ),
+        Exportacao(
+            "avaliacoes",
+            (("id", "int"), ("pet_id", "int"), ("usuario_id", "int"),
+             ("percentual_dor", "float"), ("observacoes", "text"),
+             ("data_avaliacao", "timestamp"), ("pet_nome", "text"), ("pet_especie", "text")),
+            lambda lote: iterar_avaliacoes(tamanho_lote=lote),
+        ),
+        Exportacao(
+            "respostas",
+            (("avaliacao_id", "int"), ("pergunta_id", "text"), ("resposta", "text")),
+            lambda lote: iterar_respostas(tamanho_lote=lote),
+        ),
+    )
+}
+
+
+def obter_exportacao(entidade: str) -> Exportacao:
+    if entidade not in ENTIDADES:
+        raise KeyError(f"Entidade '{entidade}' não exportável. Disponíveis: {list(ENTIDADES)}")
+    return ENTIDADES[entidade]
+
+
+def _lotes(exportacao: Exportacao, tamanho_lote: Optional[int]) -> Iterator[List[dict]]:
+    tamanho_lote = tamanho_lote or EXPORTACAO_CONFIG['tamanho_lote']
+    linhas = exportacao.iterar(tamanho_lote)
+    while True:
+        lote = list(islice(linhas, tamanho_lote))
+        if not lote:
+            return
+        yield lote
+
+
+# ---------------------------------------------------------
+# 📄 CSV
+# ---------------------------------------------------------
+def exportar_csv(entidade: str, tamanho_lote: Optional[int] = None) -> Iterator[str]:
+    """Gera o CSV da entidade em pedaços de texto (cabeçalho, depois um por lote)."""
+    exportacao = obter_exportacao(entidade)
+    colunas = exportacao.nomes_colunas
+
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+
+    def esvaziar() -> str:
+        texto = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return texto
+
+    escritor.writerow(colunas)
+    yield esvaziar()
+
+    for lote in _lotes(exportacao, tamanho_lote):
+        escritor.writerows([linha.get(c) for c in colunas] for linha in lote)
+        yield esvaziar()
+
+
+# ---------------------------------------------------------
+# 🏹 Parquet (pyarrow)
+# ---------------------------------------------------------
+def _timestamp(valor) -> Optional[datetime]:
+    if not valor:
+        return None
+    try:
+        return datetime.fromisoformat(str(valor))
+    except ValueError:
+        return None
+
+
+def _data(valor) -> Optional[date]:
+    if not valor:
+        return None
+    try:
+        return date.fromisoformat(str(valor)[:10])
+    except ValueError:
+        return None
+
+
+_CONVERSORES = {
+    'timestamp': _timestamp,
+    'data': _data,
+    'bool': lambda v: None if v is None else bool(v),
+}
+
+
+def _schema(pa, exportacao: Exportacao):
+    tipos = {
+        'int': pa.int64(),
+        'float': pa.float64(),
+        'bool': pa.bool_(),
+        'text': pa.string(),
+        'data': pa.date32(),
+        'timestamp': pa.timestamp('s'),
+    }
+    return pa.schema([(nome, tipos[tipo]) for nome, tipo in exportacao.colunas])
+
+
+def exportar_parquet(entidade: str, destino, tamanho_lote: Optional[int] = None) -> int:
+    """
+    Grava a entidade em Parquet (caminho ou arquivo binário aberto), um
+    row group por lote. Retorna o número de linhas gravadas.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    exportacao = obter_exportacao(entidade)
+    schema = _schema(pa, exportacao)
+    conversores = [(nome, _CONVERSORES.get(tipo)) for nome, tipo in exportacao.colunas]
+
+    total = 0
+    with pq.ParquetWriter(destino, schema) as escritor:
+        for lote in _lotes(exportacao, tamanho_lote):
+            colunas = []
+            for nome, converter in conversores:
+                valores = [linha.get(nome) for linha in lote]
+                colunas.append(list(map(converter, valores)) if converter else valores)
+            escritor.write_batch(pa.RecordBatch.from_arrays(colunas, schema=schema))
+            total += len(lote)
+    return total
+
+
+# ---------------------------------------------------------
+# 💾 Para arquivo
+# ---------------------------------------------------------
+def exportar_para_arquivo(entidade: str, formato: str, destino,
+                          tamanho_lote: Optional[int] = None) -> int:
+    """
+    Exporta para um caminho ou arquivo binário aberto. Retorna o número
+    de linhas (Parquet) ou de bytes (CSV) gravados.
+    """
+    if formato == "parquet":
+        return exportar_parquet(entidade, destino, tamanho_lote)
+    if formato != "csv":
+        raise ValueError(f"Formato de exportação inválido: {formato!r} (use {FORMATOS})")
+
+    if isinstance(destino, (str, Path)):
+        with open(destino, "wb") as arquivo:
+            return exportar_para_arquivo(entidade, formato, arquivo, tamanho_lote)
+
+    total = 0
+    for pedaco in exportar_csv(entidade, tamanho_lote):
+        total += destino.write(pedaco.encode("utf-8"))
+    return total
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Exportação do banco PETDOR em CSV ou Parquet")
+    parser.add_argument("entidade", choices=[*ENTIDADES, "todas"])
+    parser.add_argument("--formato", choices=FORMATOS, default="csv")
+    parser.add_argument("--saida", required=True,
+                        help="Arquivo de saída, ou diretório quando a entidade é 'todas'")
+    parser.add_argument("--lote", type=int, default=None, help="Linhas por lote")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if args.entidade == "todas":
+        diretorio = Path(args.saida)
+        diretorio.mkdir(parents=True, exist_ok=True)
+        destinos = [(nome, diretorio / f"{nome}.{args.formato}") for nome in ENTIDADES]
+    else:
+        destinos = [(args.entidade, Path(args.saida))]
+
+    for entidade, caminho in destinos:
+        total = exportar_para_arquivo(entidade, args.formato, caminho, args.lote)
+        unidade = "linhas" if args.formato == "parquet" else "bytes"
+        logger.info(f"✅ {entidade}: {total} {unidade} em {caminho}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+"""
+Gráficos do PETDOR renderizados no servidor, com cache
+
+Os gráficos são desenhados a partir de dados já agregados (listas de
+rótulos e valores) e entregues como bytes PNG ou SVG, prontos para
+st.image() ou para embutir num PDF:
+
+    png = grafico_pizza(["Ativos", "Desativados"], [10, 2], periodo="Hoje")
+    st.image(png)
+
+Cada imagem fica num cache LRU em memória, compartilhado entre sessões,
+cuja chave é um hash de (tipo do gráfico, dados, período, formato).
+Dados iguais nunca são desenhados duas vezes, e dados novos geram uma
+chave nova, então o cache não precisa ser invalidado.
+
+Detalhes:
+- o matplotlib só é importado no primeiro gráfico pedido;
+- as figuras usam matplotlib.figure.Figure direto (sem pyplot), então
+  não entram no registro global de figuras, e são limpas no `finally`
+  mesmo se o desenho falhar.
+
+Configuração: GRAFICOS_CACHE_ITENS (padrão 64), GRAFICOS_DPI (padrão 100).
+"""
+
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+GRAFICOS_CONFIG = {
+    'cache_max_itens': int(os.getenv("GRAFICOS_CACHE_ITENS", "64")),
+    'dpi': int(os.getenv("GRAFICOS_DPI", "100")),
+}
+
+FORMATOS = ("png", "svg")
+
+_cache: "OrderedDict[str, bytes]" = OrderedDict()
+_lock = threading.Lock()
+_metricas = {'acertos': 0, 'falhas': 0, 'renderizados': 0}
+
+
+# ---------------------------------------------------------
+# 🗄️ Cache
+# ---------------------------------------------------------
+def _chave(tipo: str, dados: dict, periodo: Optional[str], formato: str) -> str:
+    conteudo = json.dumps(
+        {'tipo': tipo, 'dados': dados, 'periodo': periodo, 'formato': formato,
+         'dpi': GRAFICOS_CONFIG['dpi']},
+        sort_keys=True, ensure_ascii=False, default=str,
+    )
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+
+def _do_cache(chave: str) -> Optional[bytes]:
+    with _lock:
+        imagem = _cache.get(chave)
+        if imagem is None:
+            _metricas['falhas'] += 1
+            return None
+        _cache.move_to_end(chave)
+        _metricas['acertos'] += 1
+        return imagem
+
+
+def _guardar(chave: str, imagem: bytes):
+    with _lock:
+        _cache[chave] = imagem
+        _cache.move_to_end(chave)
+        while len(_cache) > GRAFICOS_CONFIG['cache_max_itens']:
+            _cache.popitem(last=False)
+
+
+def limpar_cache_graficos():
+    with _lock:
+        _cache.clear()
+
+
+def metricas_graficos() -> dict:
+    with _lock:
+        return {**_metricas, 'itens_em_cache': len(_cache)}
+
+
+# ---------------------------------------------------------
+# 🖌️ Renderização
+# ---------------------------------------------------------
+def _nova_figura(tamanho):
+    # Import tardio: quem nunca pede um gráfico não carrega o matplotlib
+    from matplotlib.figure import Figure
+    return Figure(figsize=tamanho, dpi=GRAFICOS_CONFIG['dpi'])
+
+
+def _renderizar(tipo: str, dados: dict, periodo: Optional[str], formato: str,
+                desenhar: Callable, tamanho=(10, 6)) -> bytes:
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de gráfico inválido: {formato!r} (use {FORMATOS})")
+
+    chave = _chave(tipo, dados, periodo, formato)
+    imagem = _do_cache(chave)
+    if imagem is not None:
+        return imagem
+
+    fig = _nova_figura(tamanho)
+    try:
+        desenhar(fig.subplots(), **dados)
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=formato, bbox_inches="tight")
+        imagem = buffer.getvalue()
+    finally:
+        fig.clear()
+
+    with _lock:
+        _metricas['renderizados'] += 1
+    _guardar(chave, imagem)
+    return imagem
+
+
+def _titulo(ax, titulo: str):
+    ax.set_title(titulo, fontsize=14, fontweight='bold')
+
+
+def _desenhar_pizza(ax, rotulos, valores, cores, titulo, destaque):
+    ax.pie(valores, explode=destaque, labels=rotulos, colors=cores,
+           autopct='%1.1f%%', shadow=True, startangle=90)
+    ax.axis('equal')  # Mantém a pizza redonda
+    _titulo(ax, titulo)
+
+
+def _desenhar_barras(ax, rotulos, valores, cores, titulo, eixo):
+    barras = ax.bar(rotulos, valores, color=cores)
+    ax.set_ylabel(eixo)
+    _titulo(ax, titulo)
+    ax.tick_params(axis='x', rotation=45)
+
+    # Valores em cima das barras
+    for barra in barras:
+        altura = barra.get_height()
+        ax.text(barra.get_x() + barra.get_width() / 2., altura,
+                f'{int(altura)}', ha='center', va='bottom')
+
+
+def _desenhar_linha(ax, rotulos, valores, cor, titulo, eixo, limite_y):
+    posicoes = range(len(rotulos))
+    ax.plot(posicoes, valores, color=cor, marker='o' if len(valores) <= 60 else None)
+    if limite_y is not None:
+        ax.set_ylim(*limite_y)
+    ax.set_ylabel(eixo)
+    _titulo(ax, titulo)
+    ax.grid(True, alpha=0.3)
+
+    # Poucos rótulos no eixo x, senão viram um borrão
+    passo = max(1, len(rotulos) // 8)
+    ax.set_xticks(list(posicoes)[::passo])
+    ax.set_xticklabels(rotulos[::passo], rotation=45, ha='right')
+
+
+def _desenhar_barras_horizontais(ax, rotulos, valores, cores, titulo, eixo):
+    posicoes = range(len(rotulos))
+    ax.barh(posicoes, valores, color=cores)
+    ax.set_yticks(posicoes)
+    ax.set_yticklabels(rotulos)
+    ax.invert_yaxis()  # Primeiro rótulo no topo
+    ax.set_xlabel(eixo)
+    _titulo(ax, titulo)
+
+    for i, v in enumerate(valores):
+        ax.text(v + 0.5, i, str(v), va='center')
+
+
+# ---------------------------------------------------------
+# 📊 Gráficos disponíveis
+# ---------------------------------------------------------
+def grafico_pizza(rotulos: Sequence[str], valores: Sequence[float],
+                  cores: Optional[Sequence[str]] = None, titulo: str = "",
+                  destaque: Optional[Sequence[float]] = None,
+                  periodo: Optional[str] = None, formato: str = "png") -> bytes:
+    """Gráfico de pizza em bytes PNG/SVG."""
+    dados = {
+        'rotulos': list(rotulos),
+        'valores': list(valores),
+        'cores': list(cores) if cores else None,
+        'titulo': titulo,
+        'destaque': list(destaque) if destaque else None,
+    }
+    return _renderizar("pizza", dados, periodo, formato, _desenhar_pizza, tamanho=(8, 6))
+
+
+def grafico_barras(rotulos: Sequence[str], valores: Sequence[float],
+                   cores=None, titulo: str = "", eixo: str = "",
+                   periodo: Optional[str] = None, formato: str = "png") -> bytes:
+    """Barras verticais com o valor escrito em cada barra."""
+    dados = {
+        'rotulos': list(rotulos),
+        'valores': list(valores),
+        'cores': list(cores) if isinstance(cores, (list, tuple)) else cores,
+        'titulo': titulo,
+        'eixo': eixo,
+    }
+    return _renderizar("barras", dados, periodo, formato, _desenhar_barras)
+
+
+def grafico_linha(rotulos: Sequence[str], valores: Sequence[float],
+                  cor: str = '#dc3545', titulo: str = "", eixo: str = "",
+                  limite_y: Optional[Sequence[float]] = None,
+                  periodo: Optional[str] = None, formato: str = "png") -> bytes:
+    """Série (ex.: evolução da dor por dia), rótulos no eixo x."""
+    dados = {
+        'rotulos': list(rotulos),
+        'valores': list(valores),
+        'cor': cor,
+        'titulo': titulo,
+        'eixo': eixo,
+        'limite_y': list(limite_y) if limite_y else None,
+    }
+    return _renderizar("linha", dados, periodo, formato, _desenhar_linha)
+
+
+def grafico_barras_horizontais(rotulos: Sequence[str], valores: Sequence[float],
+                               cores=None, titulo: str = "", eixo: str = "",
+                               periodo: Optional[str] = None, formato: str = "png") -> bytes:
+    """Barras horizontais (ranking), primeiro item no topo."""
+    dados = {
+        'rotulos': list(rotulos),
+        'valores': list(valores),
+        'cores': list(cores) if isinstance(cores, (list, tuple)) else cores,
+        'titulo': titulo,
+        'eixo': eixo,
+    }
+    return _renderizar("barras_horizontais", dados, periodo, formato,
+                       _desenhar_barras_horizontais)
@@ -1,5 +1,12 @@
 """
 Geração de relatórios em PDF do PETDor
+
+Os relatórios são montados em memória e devolvidos como bytes, prontos
+para st.download_button() ou para anexar num email; nada é gravado em
+disco.
+
+Relatórios iguais saem do cache (utils/cache_pdf.py). Ao mudar o layout
+de um relatório, suba VERSAO_TEMPLATE para não servir PDFs antigos.
 """
 import sys
 from pathlib import Path
@@ -11,15 +18,22 @@ if str(root_path) not in sys.path:
 
 from fpdf import FPDF
 from datetime import datetime
-import tempfile
+from typing import Callable, Optional
+
+from utils.cache_pdf import CACHE_PDF, chave_relatorio
+
+# Versão do layout dos relatórios (entra na chave do cache)
+VERSAO_TEMPLATE = 1
 
 
 class PDFRelatorio(FPDF):
     """Classe customizada para relatórios PETDor"""
 
+    titulo = "PETDor - Relatório de Avaliação"
+
     def header(self):
         self.set_font("Arial", "B", 16)
-        self.cell(0, 10, "PETDor - Relatório de Avaliação", 0, 1, "C")
+        self.cell(0, 10, self.titulo, 0, 1, "C")
         self.ln(5)
 
     def footer(self):
@@ -36,10 +50,43 @@ def gerar_relatorio_pdf(
     pontuacao_maxima: int,
     usuario_nome: str,
     idade: float,
-) -> str:
+    data_avaliacao: Optional[str] = None,
+    avaliacao_id: Optional[int] = None,
+) -> bytes:
     """
-    Gera relatório PDF da avaliação e retorna o caminho do arquivo temporário.
+    Gera relatório PDF da avaliação e retorna o conteúdo do PDF.
+
+    `data_avaliacao` (dd/mm/aaaa hh:mm) é a da avaliação salva. Só com
+    ela o PDF vai para o cache: sem data, o relatório leva o momento
+    atual e nunca se repetiria. Com `avaliacao_id`, o PDF em cache é
+    descartado quando a avaliação é excluída.
     """
+    dados = {
+        'pet_nome': pet_nome,
+        'especie': especie,
+        'percentual': percentual,
+        'pontuacao_total': pontuacao_total,
+        'pontuacao_maxima': pontuacao_maxima,
+        'usuario_nome': usuario_nome,
+        'idade': idade,
+        'data_avaliacao': data_avaliacao or datetime.now().strftime('%d/%m/%Y %H:%M'),
+    }
+    if data_avaliacao is None:
+        return _renderizar_relatorio(**dados)
+    return relatorio_em_cache(
+        "avaliacao", dados, lambda: _renderizar_relatorio(**dados), avaliacao_id
+    )
+
+
+def relatorio_em_cache(tipo: str, dados: dict, gerar: Callable[[], bytes],
+                       avaliacao_id: Optional[int] = None) -> bytes:
+    """Bytes do relatório `tipo` para `dados`, renderizando só se não estiver no cache."""
+    chave = chave_relatorio(tipo, VERSAO_TEMPLATE, dados)
+    return CACHE_PDF.obter_ou_gerar(chave, gerar, avaliacao_id)
+
+
+def _renderizar_relatorio(pet_nome, especie, percentual, pontuacao_total,
+                          pontuacao_maxima, usuario_nome, idade, data_avaliacao) -> bytes:
     pdf = PDFRelatorio()
     pdf.add_page()
 
@@ -50,7 +97,7 @@ def gerar_relatorio_pdf(
     pdf.cell(0, 8, f"Nome: {pet_nome}", 0, 1)
     pdf.cell(0, 8, f"Espécie: {especie}", 0, 1)
     pdf.cell(0, 8, f"Idade: {idade} anos", 0, 1)
-    pdf.cell(0, 8, f"Data da Avaliação: {datetime.now().strftime('%d/%m/%Y %H:%M')}", 0, 1)
+    pdf.cell(0, 8, f"Data da Avaliação: {data_avaliacao}", 0, 1)
     pdf.cell(0, 8, f"Avaliador: {usuario_nome}", 0, 1)
     pdf.ln(10)
 
@@ -87,7 +134,9 @@ def gerar_relatorio_pdf(
         "A avaliação final deve ser realizada por um médico veterinário qualificado.",
     )
 
-    # Salvar em arquivo temporário
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-    pdf.output(temp_file.name)
-    return temp_file.name
+    return pdf_em_bytes(pdf)
+
+
+def pdf_em_bytes(pdf: FPDF) -> bytes:
+    """Renderiza o documento direto num buffer em memória (fpdf2 devolve bytearray)."""
+    return bytes(pdf.output())
@@ -0,0 +1,285 @@
+"""
+Relatório longitudinal (histórico completo de dor) de um pet
+
+Um PDF com todas as avaliações do pet: capa com dados do pet, resumo e
+gráfico da evolução da dor, seguida de cada avaliação em ordem
+cronológica com a tabela de respostas por pergunta.
+
+As avaliações nunca são carregadas todas de uma vez. O histórico é lido
+duas vezes, em lotes, pela listagem keyset cronológica
+(iterar_avaliacoes_pet):
+
+1. resumo: contagem, média, mínimo/máximo, médias por dia para o
+   gráfico e uma impressão digital (sha256) do histórico, usada como
+   chave do cache de PDFs;
+2. renderização: um lote de avaliações por vez, com as respostas do
+   lote numa só consulta, escrito direto no PDF e descartado.
+
+A memória usada cresce com o número de dias com avaliação (gráfico) e
+com o próprio PDF, não com as avaliações e respostas lidas.
+
+Configuração: RELATORIO_PET_LOTE (padrão 100 avaliações por lote).
+"""
+import sys
+from pathlib import Path
+
+# Adiciona a raiz do projeto ao path
+root_path = Path(__file__).parent.parent
+if str(root_path) not in sys.path:
+    sys.path.insert(0, str(root_path))
+
+import hashlib
+import io
+import logging
+import os
+from itertools import islice
+from typing import Dict, List, Optional
+
+from database.models import buscar_pet_por_id, buscar_respostas_agrupadas
+from database.paginacao import iterar_avaliacoes_pet
+from especies.loader import buscar_especie
+from utils.graficos import grafico_linha
+from utils.pdf_generator import PDFRelatorio, pdf_em_bytes, relatorio_em_cache
+
+logger = logging.getLogger(__name__)
+
+RELATORIO_PET_CONFIG = {
+    'tamanho_lote': int(os.getenv("RELATORIO_PET_LOTE", "100")),
+}
+
+
+class PDFHistoricoPet(PDFRelatorio):
+    titulo = "PETDor - Histórico de Dor"
+
+
+def _texto(valor) -> str:
+    # As fontes padrão do PDF só têm latin-1 (observações podem ter emoji)
+    return str(valor if valor is not None else "").encode("latin-1", "replace").decode("latin-1")
+
+
+def _data(valor: Optional[str]) -> str:
+    """'2026-01-31 10:00:00' -> '31/01/2026 10:00'."""
+    if not valor or len(valor) < 10:
+        return valor or "-"
+    data = f"{valor[8:10]}/{valor[5:7]}/{valor[0:4]}"
+    return f"{data} {valor[11:16]}" if len(valor) >= 16 else data
+
+
+def _lotes(pet_id: int, tamanho_lote: int):
+    avaliacoes = iterar_avaliacoes_pet(pet_id, tamanho_lote)
+    while True:
+        lote = list(islice(avaliacoes, tamanho_lote))
+        if not lote:
+            return
+        yield lote
+
+
+# ---------------------------------------------------------
+# 1️⃣ Primeira passada: resumo + impressão digital
+# ---------------------------------------------------------
+def _resumir(pet_id: int, tamanho_lote: int) -> dict:
+    impressao = hashlib.sha256()
+    total = 0
+    soma = 0.0
+    minimo = maximo = None
+    por_dia: Dict[str, List[float]] = {}      # dia -> [soma, quantidade]
+    primeira = ultima = None
+
+    for lote in _lotes(pet_id, tamanho_lote):
+        for a in lote:
+            percentual = a["percentual_dor"] or 0.0
+            impressao.update(
+                f"{a['id']}|{percentual}|{a['data_avaliacao']}|{a['observacoes']}\n".encode("utf-8")
+            )
+            total += 1
+            soma += percentual
+            minimo = percentual if minimo is None else min(minimo, percentual)
+            maximo = percentual if maximo is None else max(maximo, percentual)
+
+            dia = (a["data_avaliacao"] or "")[:10]
+            acumulado = por_dia.setdefault(dia, [0.0, 0])
+            acumulado[0] += percentual
+            acumulado[1] += 1
+
+            primeira = primeira or a["data_avaliacao"]
+            ultima = a["data_avaliacao"]
+
+    return {
+        'total': total,
+        'media': soma / total if total else 0.0,
+        'minimo': minimo,
+        'maximo': maximo,
+        'primeira': primeira,
+        'ultima': ultima,
+        'dias': sorted(por_dia),
+        'medias_dia': [por_dia[d][0] / por_dia[d][1] for d in sorted(por_dia)],
+        'impressao': impressao.hexdigest(),
+    }
+
+
+# ---------------------------------------------------------
+# 2️⃣ Segunda passada: renderização por lotes
+# ---------------------------------------------------------
+def _capa(pdf: PDFHistoricoPet, pet: dict, resumo: dict):
+    pdf.set_font("Arial", "B", 14)
+    pdf.cell(0, 10, "Dados do Paciente", 0, 1)
+    pdf.set_font("Arial", "", 12)
+    pdf.cell(0, 8, _texto(f"Nome: {pet['nome']}"), 0, 1)
+    pdf.cell(0, 8, _texto(f"Espécie: {pet['especie']}"), 0, 1)
+    if pet.get("raca"):
+        pdf.cell(0, 8, _texto(f"Raça: {pet['raca']}"), 0, 1)
+    if pet.get("idade") is not None:
+        pdf.cell(0, 8, f"Idade: {pet['idade']} anos", 0, 1)
+    pdf.ln(5)
+
+    pdf.set_font("Arial", "B", 14)
+    pdf.cell(0, 10, "Resumo do Histórico", 0, 1)
+    pdf.set_font("Arial", "", 12)
+    pdf.cell(0, 8, f"Avaliações: {resumo['total']}", 0, 1)
+    pdf.cell(0, 8, f"Período: {_data(resumo['primeira'])} a {_data(resumo['ultima'])}", 0, 1)
+    pdf.cell(0, 8, f"Dor média: {resumo['media']:.1f}%", 0, 1)
+    pdf.cell(0, 8, f"Menor / maior: {resumo['minimo']:.1f}% / {resumo['maximo']:.1f}%", 0, 1)
+    pdf.ln(5)
+
+    if len(resumo['dias']) > 1:
+        png = grafico_linha(
+            [_data(d) for d in resumo['dias']],
+            resumo['medias_dia'],
+            titulo="Evolução da Dor (média por dia)",
+            eixo="Dor (%)",
+            limite_y=(0, 100),
+        )
+        pdf.image(io.BytesIO(png), w=pdf.epw)
+
+
+class TabelaRespostas:
+    """
+    Tabela Pergunta | Resposta desenhada com cell().
+
+    As mesmas perguntas se repetem em todas as avaliações, então a quebra
+    de linha de cada texto é calculada uma vez só (pdf.table() refaz esse
+    cálculo em toda célula, o que domina o tempo em históricos longos).
+    """
+    ALTURA_LINHA = 5
+
+    def __init__(self, pdf: PDFHistoricoPet, textos: Dict[str, str]):
+        self.pdf = pdf
+        self.textos = textos
+        self.largura_resposta = pdf.epw / 4
+        self.largura_pergunta = pdf.epw - self.largura_resposta
+        self._linhas: Dict[str, List[str]] = {}
+
+    def _quebrar(self, pergunta_id: str) -> List[str]:
+        linhas = self._linhas.get(pergunta_id)
+        if linhas is None:
+            texto = _texto(self.textos.get(pergunta_id, pergunta_id))
+            linhas = self.pdf.multi_cell(
+                self.largura_pergunta - 2, self.ALTURA_LINHA, texto,
+                dry_run=True, output="LINES",
+            ) or [""]
+            self._linhas[pergunta_id] = linhas
+        return linhas
+
+    def _linha(self, linhas: List[str], resposta: str):
+        pdf = self.pdf
+        altura = self.ALTURA_LINHA * len(linhas)
+        if pdf.will_page_break(altura):
+            pdf.add_page()
+
+        x, y = pdf.l_margin, pdf.get_y()
+        for i, linha in enumerate(linhas):
+            pdf.set_xy(x, y + i * self.ALTURA_LINHA)
+            pdf.cell(self.largura_pergunta, self.ALTURA_LINHA, linha)
+        pdf.rect(x, y, self.largura_pergunta, altura)
+        pdf.set_xy(x + self.largura_pergunta, y)
+        pdf.cell(self.largura_resposta, altura, resposta, border=1)
+        pdf.set_xy(x, y + altura)
+
+    def desenhar(self, respostas: Dict[str, str]):
+        self.pdf.set_font("Arial", "B", 9)
+        self._linha(["Pergunta"], "Resposta")
+        self.pdf.set_font("Arial", "", 9)
+        for pergunta_id, resposta in respostas.items():
+            self._linha(self._quebrar(pergunta_id), _texto(resposta))
+
+
+def _avaliacao(pdf: PDFHistoricoPet, numero: int, avaliacao: dict,
+               respostas: Dict[str, str], tabela: TabelaRespostas):
+    pdf.set_font("Arial", "B", 12)
+    pdf.cell(
+        0, 8,
+        f"Avaliação {numero} - {_data(avaliacao['data_avaliacao'])} - "
+        f"Dor: {avaliacao['percentual_dor']:.1f}%",
+        0, 1,
+    )
+    if avaliacao.get("observacoes"):
+        pdf.set_font("Arial", "I", 10)
+        pdf.multi_cell(0, 5, _texto(f"Observações: {avaliacao['observacoes']}"))
+
+    if respostas:
+        tabela.desenhar(respostas)
+    else:
+        pdf.set_font("Arial", "", 10)
+        pdf.cell(0, 6, "Sem respostas detalhadas.", 0, 1)
+    pdf.ln(4)
+
+
+def _renderizar(pet: dict, resumo: dict, tamanho_lote: int) -> bytes:
+    config = buscar_especie(pet["especie"])
+    textos = {p.id: p.texto for p in config.perguntas} if config else {}
+
+    pdf = PDFHistoricoPet()
+    pdf.add_page()
+    _capa(pdf, pet, resumo)
+
+    pdf.add_page()
+    tabela = TabelaRespostas(pdf, textos)
+    numero = 0
+    for lote in _lotes(pet["id"], tamanho_lote):
+        respostas = buscar_respostas_agrupadas([a["id"] for a in lote])
+        for avaliacao in lote:
+            numero += 1
+            _avaliacao(pdf, numero, avaliacao, respostas.get(avaliacao["id"], {}), tabela)
+
+    pdf.set_font("Arial", "I", 10)
+    pdf.multi_cell(
+        0,
+        5,
+        "Observação: Este relatório é uma ferramenta de apoio à decisão clínica. "
+        "A avaliação final deve ser realizada por um médico veterinário qualificado.",
+    )
+    return pdf_em_bytes(pdf)
+
+
+def montar_relatorio_pet(pet_id: int, tamanho_lote: Optional[int] = None) -> Optional[bytes]:
+    """
+    Como gerar_relatorio_pet(), mas repassa as exceções (o lote noturno
+    precisa distinguir "pet sem avaliações" de "relatório falhou").
+    """
+    tamanho_lote = tamanho_lote or RELATORIO_PET_CONFIG['tamanho_lote']
+    pet = buscar_pet_por_id(pet_id)
+    if pet is None:
+        return None
+
+    resumo = _resumir(pet_id, tamanho_lote)
+    if resumo['total'] == 0:
+        return None
+
+    # Mesmo pet e mesmo histórico: mesmo PDF
+    dados = {'pet': pet, 'historico': resumo['impressao'], 'total': resumo['total']}
+    return relatorio_em_cache(
+        "historico_pet", dados, lambda: _renderizar(pet, resumo, tamanho_lote)
+    )
+
+
+def gerar_relatorio_pet(pet_id: int, tamanho_lote: Optional[int] = None) -> Optional[bytes]:
+    """
+    PDF com o histórico completo de dor do pet, ou None se o pet não
+    existir ou não tiver avaliações.
+    """
+    try:
+        return montar_relatorio_pet(pet_id, tamanho_lote)
+
+    except Exception as e:
+        logger.error(f"[ERRO] gerar_relatorio_pet: {e}")
+        return None
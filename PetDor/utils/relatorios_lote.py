@@ -0,0 +1,178 @@
+"""
+Lote de relatórios PDF para clínicas
+
+Gera o relatório longitudinal (utils/relatorio_pet.py) de cada pet
+vinculado a uma clínica/veterinário (vinculos_pets) e entrega tudo num
+único ZIP. Renderizar PDF é trabalho de CPU, então os relatórios são
+distribuídos num ProcessPoolExecutor, um processo por núcleo.
+
+- Os processos usam o contexto "spawn": cada um abre o próprio pool de
+  conexões SQLite (conexões não podem atravessar um fork).
+- O ZIP é escrito no processo principal à medida que os PDFs ficam
+  prontos, e no máximo 2 × workers relatórios ficam em trânsito, então a
+  memória não cresce com o número de pets. O destino pode ser um stream
+  sem seek (ex.: stdout).
+- PDFs já saem comprimidos do fpdf2; vão para o ZIP sem recompressão.
+
+Cada relatório traz o tempo de renderização; o lote traz tempo total e
+vazão, que também vão para o ZIP em metricas.json. Relatórios que
+falharam ficam em `falhas` (pet_id e erro), e o comando sai com código
+1 se houver alguma, para o cron acusar o lote incompleto.
+
+Uso noturno (cron):
+
+    python -m utils.relatorios_lote --usuario 42 --saida /backups/clinica_42.zip
+"""
+import sys
+from pathlib import Path
+
+# Adiciona a raiz do projeto ao path
+root_path = Path(__file__).parent.parent
+if str(root_path) not in sys.path:
+    sys.path.insert(0, str(root_path))
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import re
+import time
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import List, Optional
+
+from database.models import buscar_pets_vinculados
+
+logger = logging.getLogger(__name__)
+
+RELATORIOS_LOTE_CONFIG = {
+    'workers': int(os.getenv("RELATORIOS_LOTE_WORKERS", "0")) or (os.cpu_count() or 1),
+}
+
+
+def _renderizar_pet(pet_id: int) -> dict:
+    """Roda num processo do pool: gera o PDF de um pet e mede o tempo."""
+    # Import aqui: o processo filho carrega fpdf/matplotlib só quando trabalha
+    from utils.relatorio_pet import montar_relatorio_pet
+
+    inicio = time.perf_counter()
+    pdf = montar_relatorio_pet(pet_id)
+    return {'pet_id': pet_id, 'pdf': pdf, 'segundos': time.perf_counter() - inicio}
+
+
+def _nome_arquivo(pet: dict) -> str:
+    nome = re.sub(r"[^\w\-]+", "_", pet["nome"]).strip("_") or "pet"
+    return f"{nome}_{pet['id']}.pdf"
+
+
+def gerar_lote_clinica(usuario_id: int, destino, workers: Optional[int] = None,
+                       pet_ids: Optional[List[int]] = None) -> dict:
+    """
+    Escreve em `destino` (caminho ou arquivo binário) um ZIP com o
+    relatório de cada pet vinculado ao usuário. Pets sem avaliações
+    (`sem_relatorio`) e relatórios que falharam (`falhas`) ficam de fora
+    e aparecem nas métricas.
+
+    Retorna as métricas do lote.
+    """
+    workers = workers or RELATORIOS_LOTE_CONFIG['workers']
+    pets = buscar_pets_vinculados(usuario_id)
+    if pet_ids is not None:
+        pets = [p for p in pets if p["id"] in set(pet_ids)]
+    por_id = {p["id"]: p for p in pets}
+
+    relatorios = []
+    sem_relatorio = []
+    falhas = []
+    total_bytes = 0
+    inicio = time.perf_counter()
+
+    contexto = multiprocessing.get_context("spawn")
+    with zipfile.ZipFile(destino, "w", compression=zipfile.ZIP_STORED) as zip_saida, \
+            ProcessPoolExecutor(max_workers=workers, mp_context=contexto) as executor:
+
+        pendentes = iter(por_id)
+        em_transito = {}   # futuro -> pet_id
+
+        def enviar():
+            # Janela limitada: não acumula PDFs prontos esperando o ZIP
+            while len(em_transito) < workers * 2:
+                pet_id = next(pendentes, None)
+                if pet_id is None:
+                    return
+                em_transito[executor.submit(_renderizar_pet, pet_id)] = pet_id
+
+        enviar()
+        while em_transito:
+            prontos, _ = wait(em_transito, return_when=FIRST_COMPLETED)
+            for futuro in prontos:
+                pet_id = em_transito.pop(futuro)
+                try:
+                    resultado = futuro.result()
+                except Exception as e:
+                    logger.error(f"[ERRO] gerar_lote_clinica: relatório do pet {pet_id}: {e}")
+                    falhas.append({'pet_id': pet_id, 'erro': f"{type(e).__name__}: {e}"})
+                    continue
+
+                pet = por_id[resultado['pet_id']]
+                if resultado['pdf'] is None:
+                    sem_relatorio.append(pet["id"])
+                    continue
+
+                zip_saida.writestr(_nome_arquivo(pet), resultado['pdf'])
+                total_bytes += len(resultado['pdf'])
+                relatorios.append({
+                    'pet_id': pet["id"],
+                    'pet_nome': pet["nome"],
+                    'bytes': len(resultado['pdf']),
+                    'segundos': round(resultado['segundos'], 3),
+                })
+            enviar()
+
+        duracao = time.perf_counter() - inicio
+        metricas = {
+            'usuario_id': usuario_id,
+            'workers': workers,
+            'pets': len(pets),
+            'relatorios': len(relatorios),
+            'sem_relatorio': sem_relatorio,
+            'falhas': falhas,
+            'bytes': total_bytes,
+            'segundos': round(duracao, 3),
+            'relatorios_por_segundo': round(len(relatorios) / duracao, 2) if duracao else 0.0,
+            'segundos_cpu_relatorios': round(sum(r['segundos'] for r in relatorios), 3),
+            'por_relatorio': relatorios,
+        }
+        zip_saida.writestr("metricas.json", json.dumps(metricas, ensure_ascii=False, indent=2))
+
+    logger.info(
+        f"Lote da clínica {usuario_id}: {len(relatorios)} relatórios em {duracao:.1f}s "
+        f"({metricas['relatorios_por_segundo']}/s, {workers} workers)"
+    )
+    if falhas:
+        logger.error(f"Lote da clínica {usuario_id}: {len(falhas)} relatórios falharam")
+    return metricas
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Lote de relatórios PDF dos pets de uma clínica")
+    parser.add_argument("--usuario", type=int, required=True,
+                        help="ID do usuário (clínica/veterinário) em vinculos_pets")
+    parser.add_argument("--saida", required=True, help="Arquivo ZIP de saída ('-' para stdout)")
+    parser.add_argument("--workers", type=int, default=None, help="Processos de renderização")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stderr)
+
+    destino = sys.stdout.buffer if args.saida == "-" else args.saida
+    metricas = gerar_lote_clinica(args.usuario, destino, args.workers)
+    for r in metricas['por_relatorio']:
+        logger.info(f"  {r['pet_nome']}: {r['segundos']:.2f}s, {r['bytes']} bytes")
+    for f in metricas['falhas']:
+        logger.error(f"  pet {f['pet_id']}: {f['erro']}")
+    return 1 if metricas['falhas'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,272 @@
+"""
+Pool de sessões SMTP do PETDOR
+
+Abrir uma sessão SMTP custa conexão TCP + handshake TLS + AUTH, várias
+idas e voltas ao servidor antes do primeiro byte do email. O pool mantém
+sessões já autenticadas abertas e as reutiliza:
+
+    pool = obter_pool(config_smtp())
+    erros = pool.enviar_lote([msg1, msg2, msg3])   # [None, None, SMTPDataError(...)]
+
+- sessões ociosas há mais de SMTP_POOL_OCIOSA segundos são fechadas (o
+  servidor derrubaria a conexão de qualquer jeito); as ociosas há mais
+  de alguns segundos passam por um NOOP antes de serem reutilizadas;
+- uma sessão é reciclada depois de SMTP_POOL_MAX_MENSAGENS mensagens
+  (provedores costumam limitar mensagens por conexão);
+- se a conexão cair no meio de um lote, o lote continua numa sessão
+  nova; erros da mensagem (destinatário recusado etc.) não derrubam a
+  sessão.
+
+Segurança da conexão (SMTP_SEGURANCA): "ssl" (padrão na porta 465),
+"starttls" (padrão nas outras) ou "nenhuma" — só para um servidor SMTP
+local de testes, ex.:
+
+    python -m smtpd -n -c DebuggingServer localhost:1025
+    SMTP_SERVER=localhost SMTP_PORT=1025 SMTP_SEGURANCA=nenhuma SENHA_EMAIL=x ...
+
+Configuração: SMTP_POOL_TAMANHO (sessões simultâneas, padrão 2),
+SMTP_POOL_OCIOSA (padrão 60), SMTP_POOL_MAX_MENSAGENS (padrão 100),
+SMTP_TIMEOUT (padrão 30).
+"""
+
+import logging
+import os
+import smtplib
+import ssl
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SMTP_POOL_CONFIG = {
+    'tamanho': int(os.getenv("SMTP_POOL_TAMANHO", "2")),
+    'ociosa_max': float(os.getenv("SMTP_POOL_OCIOSA", "60")),
+    'max_mensagens': int(os.getenv("SMTP_POOL_MAX_MENSAGENS", "100")),
+    'timeout': float(os.getenv("SMTP_TIMEOUT", "30")),
+    'seguranca': os.getenv("SMTP_SEGURANCA", ""),
+}
+
+# Ociosa há menos que isso: usa direto, sem NOOP
+_VERIFICAR_APOS = 5.0
+
+
+def erro_de_conexao(erro: Exception) -> bool:
+    """True se a falha é da conexão (vale reconectar), não da mensagem."""
+    if isinstance(erro, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError)):
+        return True
+    if isinstance(erro, smtplib.SMTPResponseException):
+        # 421: serviço indisponível, o servidor vai fechar a conexão
+        return erro.smtp_code == 421
+    # SMTPException herda de OSError: só erros de socket contam como queda
+    return isinstance(erro, OSError) and not isinstance(erro, smtplib.SMTPException)
+
+
+@dataclass
+class _Sessao:
+    smtp: smtplib.SMTP
+    usada: float = field(default_factory=time.monotonic)
+    mensagens: int = 0
+
+
+class PoolSMTP:
+    """Sessões SMTP autenticadas, reutilizadas entre envios."""
+
+    def __init__(self, config: dict, tamanho: int, ociosa_max: float,
+                 max_mensagens: int, timeout: float, seguranca: str = ""):
+        self.config = config
+        self.ociosa_max = ociosa_max
+        self.max_mensagens = max_mensagens
+        self.timeout = timeout
+        self.seguranca = seguranca or ("ssl" if int(config['porta']) == 465 else "starttls")
+        self._ociosas: List[_Sessao] = []
+        self._vagas = threading.BoundedSemaphore(tamanho)
+        self._lock = threading.Lock()
+        self._metricas = {'conexoes': 0, 'reutilizadas': 0, 'descartadas': 0, 'mensagens': 0}
+
+    # ---------------------------------------------------------
+    # 🔌 Conexões
+    # ---------------------------------------------------------
+    def _conectar(self) -> _Sessao:
+        servidor, porta = self.config['servidor'], int(self.config['porta'])
+        logger.info(f"Conectando ao servidor SMTP: {servidor}:{porta} ({self.seguranca})")
+
+        if self.seguranca == "ssl":
+            smtp = smtplib.SMTP_SSL(servidor, porta, timeout=self.timeout,
+                                    context=ssl.create_default_context())
+        else:
+            smtp = smtplib.SMTP(servidor, porta, timeout=self.timeout)
+        try:
+            if self.seguranca == "starttls":
+                smtp.starttls(context=ssl.create_default_context())
+            # has_extn() só enxerga as extensões depois do EHLO
+            smtp.ehlo_or_helo_if_needed()
+            if self.seguranca != "nenhuma" or smtp.has_extn("auth"):
+                smtp.login(self.config['remetente'], self.config['senha'])
+        except BaseException:
+            self._fechar(smtp)
+            raise
+
+        with self._lock:
+            self._metricas['conexoes'] += 1
+        return _Sessao(smtp)
+
+    @staticmethod
+    def _fechar(smtp: smtplib.SMTP):
+        try:
+            smtp.quit()
+        except Exception:
+            smtp.close()
+
+    def _descartar(self, sessao: _Sessao):
+        with self._lock:
+            self._metricas['descartadas'] += 1
+        self._fechar(sessao.smtp)
+
+    def _utilizavel(self, sessao: _Sessao) -> bool:
+        ociosa = time.monotonic() - sessao.usada
+        if ociosa > self.ociosa_max or sessao.mensagens >= self.max_mensagens:
+            return False
+        if ociosa < _VERIFICAR_APOS:
+            return True
+        try:
+            return sessao.smtp.noop()[0] == 250
+        except Exception:
+            return False
+
+    def _obter(self) -> _Sessao:
+        while True:
+            with self._lock:
+                sessao = self._ociosas.pop() if self._ociosas else None
+            if sessao is None:
+                return self._conectar()
+            if self._utilizavel(sessao):
+                with self._lock:
+                    self._metricas['reutilizadas'] += 1
+                return sessao
+            self._descartar(sessao)
+
+    def _devolver(self, sessao: _Sessao):
+        sessao.usada = time.monotonic()
+        if sessao.mensagens >= self.max_mensagens:
+            self._descartar(sessao)
+            return
+        with self._lock:
+            self._ociosas.append(sessao)
+
+    # ---------------------------------------------------------
+    # ✉️ API
+    # ---------------------------------------------------------
+    @contextmanager
+    def sessao(self):
+        """
+        Empresta uma sessão autenticada. Se o bloco levantar erro de
+        conexão, a sessão é descartada em vez de voltar ao pool.
+        """
+        if not self._vagas.acquire(timeout=self.timeout):
+            raise TimeoutError("Nenhuma sessão SMTP livre no pool")
+        try:
+            sessao = self._obter()
+            try:
+                yield sessao
+            except BaseException as e:
+                if isinstance(e, Exception) and not erro_de_conexao(e):
+                    self._devolver(sessao)
+                else:
+                    self._descartar(sessao)
+                raise
+            else:
+                self._devolver(sessao)
+        finally:
+            self._vagas.release()
+
+    def _enviar(self, sessao: _Sessao, msg):
+        sessao.smtp.send_message(msg)
+        sessao.mensagens += 1
+        with self._lock:
+            self._metricas['mensagens'] += 1
+
+    def enviar_lote(self, mensagens: list) -> List[Optional[Exception]]:
+        """
+        Envia as mensagens reutilizando sessões; retorna, para cada uma,
+        None (enviada) ou a exceção que a impediu.
+
+        Uma queda de conexão faz a mensagem ser reenviada uma vez numa
+        sessão nova; se a reconexão também falhar, o erro fica para ela
+        e para as restantes.
+        """
+        resultados: List[Optional[Exception]] = [None] * len(mensagens)
+        posicao = 0
+        reconectou = False
+        while posicao < len(mensagens):
+            try:
+                with self.sessao() as sessao:
+                    while posicao < len(mensagens):
+                        if sessao.mensagens >= self.max_mensagens:
+                            break   # Recicla a sessão no meio do lote
+                        try:
+                            self._enviar(sessao, mensagens[posicao])
+                        except Exception as e:
+                            if erro_de_conexao(e):
+                                raise
+                            resultados[posicao] = e
+                        posicao += 1
+                        reconectou = False
+            except Exception as e:
+                if not erro_de_conexao(e) and not isinstance(e, smtplib.SMTPException):
+                    raise
+                if reconectou or not erro_de_conexao(e):
+                    # Sem conexão (ou login recusado): o resto do lote fica com o erro
+                    for i in range(posicao, len(mensagens)):
+                        resultados[i] = e
+                    break
+                logger.warning(f"Conexão SMTP perdida, reconectando: {e}")
+                reconectou = True
+        return resultados
+
+    def fechar(self):
+        """Fecha as sessões ociosas."""
+        with self._lock:
+            ociosas, self._ociosas = self._ociosas, []
+        for sessao in ociosas:
+            self._fechar(sessao.smtp)
+
+    def metricas(self) -> dict:
+        with self._lock:
+            return {**self._metricas, 'ociosas': len(self._ociosas)}
+
+
+# Um pool por configuração (servidor, porta, conta)
+_pools: Dict[tuple, PoolSMTP] = {}
+_pools_lock = threading.Lock()
+
+
+def obter_pool(config: dict) -> PoolSMTP:
+    chave = (config['servidor'], int(config['porta']), config['remetente'], config['senha'])
+    with _pools_lock:
+        pool = _pools.get(chave)
+        if pool is None:
+            pool = _pools[chave] = PoolSMTP(
+                config,
+                tamanho=SMTP_POOL_CONFIG['tamanho'],
+                ociosa_max=SMTP_POOL_CONFIG['ociosa_max'],
+                max_mensagens=SMTP_POOL_CONFIG['max_mensagens'],
+                timeout=SMTP_POOL_CONFIG['timeout'],
+                seguranca=SMTP_POOL_CONFIG['seguranca'],
+            )
+        return pool
+
+
+def fechar_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.fechar()
+
+
+def metricas_smtp() -> dict:
+    with _pools_lock:
+        pools = list(_pools.items())
+    return {f"{chave[2]}@{chave[0]}:{chave[1]}": pool.metricas() for chave, pool in pools}